@@ -0,0 +1,121 @@
+#scripted agents that play PacmanEnv, used as baselines and tournament entrants
+
+import importlib
+from constants import *
+from rng import RandomSource
+from rng import STREAMAGENT
+
+class Agent(object):
+    def __init__(self, seed=None):
+        """
+        Initializes the Agent object.
+
+        Args:
+            seed (int, optional): Seeds the agent's own random stream. Defaults to None.
+        """
+        self.rng = RandomSource(seed).stream(STREAMAGENT)
+
+    def reset(self, obs):
+        """
+        Called with the first observation of every episode.
+
+        Args:
+            obs (dict): The observation returned by PacmanEnv.reset.
+        """
+        pass
+
+    def act(self, obs):
+        """
+        Chooses the next action.
+
+        Args:
+            obs (dict): The latest observation.
+
+        Returns:
+            int: An index into env.ACTIONS.
+        """
+        raise NotImplementedError
+
+
+class RandomAgent(Agent):
+    def act(self, obs):
+        # Any action, including STOP, with equal chance
+        return int(self.rng.random() * 5)
+
+
+class WanderAgent(Agent):
+    def reset(self, obs):
+        self.action = 0
+
+    def act(self, obs):
+        # Keeps going until Pac-Man is stopped by a wall, then picks a new direction
+        if self.action == 0 or obs["entities"][0, 2] == 0:
+            self.action = 1 + int(self.rng.random() * 4)
+        return self.action
+
+
+class GreedyAgent(Agent):
+    def __init__(self, seed=None, player=0, caution=3):
+        """
+        Initializes the GreedyAgent object, which heads for the nearest pellet along the pelletDistance field.
+
+        Args:
+            seed (int, optional): Seeds the agent's own random stream, used to break ties. Defaults to None.
+            player (int, optional): The Pac-Man it steers. Defaults to 0.
+            caution (int, optional): Tiles from a hunting ghost that count as dangerous. Defaults to 3.
+        """
+        Agent.__init__(self, seed)
+        self.player = player
+        self.caution = caution
+        self.action = 0
+
+    def reset(self, obs):
+        self.action = 0
+
+    def act(self, obs):
+        distance = obs["pelletDistance"]
+        rows, cols = distance.shape
+        entities = obs["entities"]
+        row, col = int(round(entities[self.player, 1])), int(round(entities[self.player, 0]))
+        # Ghosts Pac-Man has to stay away from, frightened and returning ones are harmless
+        ghosts = [(entities[i, 1], entities[i, 0]) for i in range(len(entities) - 4, len(entities))
+                  if obs["ghostModes"][i - len(entities) + 4] not in (FREIGHT, SPAWN)]
+        best, choices = None, []
+        for action, (dr, dc) in ((1, (-1, 0)), (2, (1, 0)), (3, (0, -1)), (4, (0, 1))):
+            r, c = row + dr, (col + dc) % cols  # Columns wrap for the portals at the maze edges
+            if not 0 <= r < rows or distance[r, c] < 0:
+                continue
+            cost = distance[r, c]
+            for gr, gc in ghosts:
+                if abs(gr - r) + abs(gc - c) < self.caution:
+                    cost += rows * cols
+            if best is None or cost < best:
+                best, choices = cost, [action]
+            elif cost == best:
+                choices.append(action)
+        if not choices:
+            return int(self.rng.random() * 5)
+        # Keeps going on ties, so Pac-Man does not turn back and forth between equally good tiles
+        if self.action not in choices:
+            self.action = choices[int(self.rng.random() * len(choices))]
+        return self.action
+
+
+AGENTS = {"random": RandomAgent,
+          "wander": WanderAgent,
+          "greedy": GreedyAgent}
+
+def loadAgent(name):
+    """
+    Looks up an agent class.
+
+    Args:
+        name (str): A key of AGENTS, or "module:Class" for an agent defined elsewhere.
+
+    Returns:
+        type: The agent class.
+    """
+    if name in AGENTS:
+        return AGENTS[name]
+    module, _, attr = name.partition(":")
+    return getattr(importlib.import_module(module), attr)
@@ -0,0 +1,122 @@
+#finds which entities are close enough to collide, so only those pairs are checked exactly
+
+from constants import *
+
+class SpatialGrid(object):
+    def __init__(self, cellsize=TILEWIDTH):
+        """
+        Initializes the SpatialGrid object, a uniform grid of buckets over the maze.
+
+        Entities are kept in the bucket of the cell their position is in,
+        one set of buckets per layer (GHOST, FRUIT, ...). refresh moves an
+        entity only when it crossed into another cell, and a query looks at
+        the few cells its collide radius can reach, so its cost does not
+        grow with the number of entities elsewhere in the maze.
+
+        Args:
+            cellsize (int, optional): Width and height of a cell in pixels. Defaults to TILEWIDTH.
+        """
+        self.cellsize = cellsize
+        self.layers = {}  # Layer -> {(column, row): {entity: None}}, dicts keep the order entities were added in
+        self.where = {}  # Entity -> (layer, cell)
+        self.order = {}  # Entity -> serial number, candidates come back in the order they were added
+        self.radius = {}  # Layer -> largest collide radius in it
+        self.serial = 0
+
+    def cell(self, position):
+        return (int(position.x // self.cellsize), int(position.y // self.cellsize))
+
+    def add(self, entity, layer):
+        """
+        Starts tracking an entity.
+
+        Args:
+            entity (Entity): Anything with a position and a collideRadius.
+            layer (int): The group it belongs to, usually its entity type.
+        """
+        if entity in self.where:
+            self.remove(entity)
+        key = self.cell(entity.position)
+        self.layers.setdefault(layer, {}).setdefault(key, {})[entity] = None
+        self.where[entity] = (layer, key)
+        self.order[entity] = self.serial
+        self.serial += 1
+        self.radius[layer] = max(self.radius.get(layer, 0), entity.collideRadius)
+
+    def remove(self, entity):
+        """
+        Stops tracking an entity, nothing happens if it was not tracked.
+
+        Args:
+            entity (Entity): The entity to drop.
+        """
+        if entity not in self.where:
+            return
+        layer, key = self.where.pop(entity)
+        del self.order[entity]
+        bucket = self.layers[layer][key]
+        del bucket[entity]
+        if not bucket:
+            del self.layers[layer][key]
+
+    def move(self, entity):
+        # Puts an entity in the bucket of the cell it is in now, if that changed
+        layer, key = self.where[entity]
+        new = self.cell(entity.position)
+        if new != key:
+            cells = self.layers[layer]
+            bucket = cells[key]
+            del bucket[entity]
+            if not bucket:
+                del cells[key]
+            cells.setdefault(new, {})[entity] = None
+            self.where[entity] = (layer, new)
+
+    def refresh(self):
+        """
+        Brings every tracked entity's bucket up to date, call it after entities moved.
+        """
+        for entity in list(self.where):
+            self.move(entity)
+
+    def near(self, entity, layer):
+        """
+        Returns the entities of a layer that could touch an entity.
+
+        Args:
+            entity (Entity): The entity asking, it does not need to be tracked.
+            layer (int): The layer to look in.
+
+        Returns:
+            list: Candidates in the order they were added, never the entity itself.
+        """
+        cells = self.layers.get(layer)
+        if not cells:
+            return []
+        reach = entity.collideRadius + self.radius[layer]
+        size = self.cellsize
+        x, y = entity.position.x, entity.position.y
+        found = []
+        for col in range(int((x - reach) // size), int((x + reach) // size) + 1):
+            for row in range(int((y - reach) // size), int((y + reach) // size) + 1):
+                bucket = cells.get((col, row))
+                if bucket:
+                    found.extend(bucket)
+        if entity in self.order:
+            found = [other for other in found if other is not entity]
+        if len(found) > 1:
+            found.sort(key=self.order.__getitem__)
+        return found
+
+    def pairs(self, entities, layer):
+        """
+        Returns the candidate pairs for the exact collideCheck.
+
+        Args:
+            entities (list): The entities asking, usually the Pac-Men.
+            layer (int): The layer they are checked against.
+
+        Returns:
+            list: (entity, other) tuples, grouped by entity in the order given.
+        """
+        return [(entity, other) for entity in entities for other in self.near(entity, layer)]
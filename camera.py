@@ -0,0 +1,192 @@
+#scrolls the view over mazes larger than the screen and caches their layers in chunks
+
+from collections import OrderedDict
+import pygame
+from vector import Vector2
+from constants import *
+
+class Camera(object):
+    def __init__(self, viewsize=SCREENSIZE, worldsize=SCREENSIZE):
+        """
+        Initializes the Camera object.
+
+        Args:
+            viewsize (tuple, optional): Size of the screen in pixels. Defaults to SCREENSIZE.
+            worldsize (tuple, optional): Size of the maze in pixels. Defaults to SCREENSIZE.
+        """
+        self.width, self.height = viewsize
+        self.offset = Vector2()  # World position of the top left corner of the screen
+        self.setWorld(worldsize)
+
+    def setWorld(self, worldsize):
+        """
+        Sets the size of the maze being shown.
+
+        Args:
+            worldsize (tuple): Size of the maze in pixels.
+        """
+        self.worldWidth, self.worldHeight = worldsize
+        self.offset = Vector2()
+
+    def covers(self):
+        """
+        Checks whether the maze fills the whole screen.
+
+        Returns:
+            bool: False when part of the screen is outside the maze and has to be cleared.
+        """
+        return self.worldWidth >= self.width and self.worldHeight >= self.height
+
+    def follow(self, position):
+        """
+        Centres the view on a position without showing anything beyond the maze edges.
+
+        Args:
+            position (Vector2): The world position to follow.
+        """
+        x = min(max(position.x - self.width // 2, 0), max(self.worldWidth - self.width, 0))
+        y = min(max(position.y - self.height // 2, 0), max(self.worldHeight - self.height, 0))
+        self.offset = Vector2(int(x), int(y))
+
+    def isVisible(self, position, margin=TILEWIDTH):
+        """
+        Checks whether something at a world position can be seen.
+
+        Args:
+            position (Vector2): The world position.
+            margin (int, optional): Extra pixels around the view, for sprites bigger than a point. Defaults to TILEWIDTH.
+
+        Returns:
+            bool: True if it is on screen or within margin of it.
+        """
+        return (self.offset.x - margin <= position.x <= self.offset.x + self.width + margin and
+                self.offset.y - margin <= position.y <= self.offset.y + self.height + margin)
+
+    def visibleTiles(self):
+        """
+        Returns the tiles the view overlaps.
+
+        Returns:
+            tuple: (first row, last row + 1, first column, last column + 1), not clipped to the maze.
+        """
+        row0 = int(self.offset.y // TILEHEIGHT)
+        col0 = int(self.offset.x // TILEWIDTH)
+        return (row0, row0 + self.height // TILEHEIGHT + 2, col0, col0 + self.width // TILEWIDTH + 2)
+
+
+class TileChunks(object):
+    def __init__(self, shape, draw, chunk=16, limit=64, colorkey=None):
+        """
+        Initializes the TileChunks object, a tile layer drawn in square chunks.
+
+        Chunks are drawn the first time they come into view and kept in a
+        least recently used cache, so a huge maze never needs one surface
+        of its full size.
+
+        Args:
+            shape (tuple): (rows, columns) of the maze.
+            draw (callable): draw(surface, row0, col0, rows, cols) paints the tiles of one chunk,
+                with tile (row0, col0) at the surface's top left corner.
+            chunk (int, optional): Tiles per chunk side. Defaults to 16.
+            limit (int, optional): Most chunks kept drawn. Defaults to 64.
+            colorkey (tuple, optional): Transparent colour of the chunks. Defaults to None.
+        """
+        self.rows, self.cols = shape
+        self.draw = draw
+        self.chunk = chunk
+        self.limit = limit
+        self.colorkey = colorkey
+        self.chunks = OrderedDict()  # (chunk row, chunk column) -> Surface, least recently used first
+
+    def span(self, index, size):
+        return min(self.chunk, size - index * self.chunk)
+
+    def build(self, key):
+        crow, ccol = key
+        rows = self.span(crow, self.rows)
+        cols = self.span(ccol, self.cols)
+        surface = pygame.surface.Surface((cols * TILEWIDTH, rows * TILEHEIGHT))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        surface.fill(BLACK)
+        if self.colorkey is not None:
+            surface.set_colorkey(self.colorkey)
+        self.draw(surface, crow * self.chunk, ccol * self.chunk, rows, cols)
+        return surface
+
+    def get(self, key):
+        """
+        Returns a chunk, drawing it if it is not cached.
+
+        Args:
+            key (tuple): (chunk row, chunk column).
+
+        Returns:
+            pygame.Surface: The chunk.
+        """
+        if key in self.chunks:
+            self.chunks.move_to_end(key)
+        else:
+            self.chunks[key] = self.build(key)
+            if len(self.chunks) > self.limit:
+                self.chunks.popitem(last=False)
+        return self.chunks[key]
+
+    def prebuild(self):
+        """
+        Draws every chunk up front when they all fit in the cache, so small mazes never draw while playing.
+        """
+        crows = -(-self.rows // self.chunk)
+        ccols = -(-self.cols // self.chunk)
+        if crows * ccols <= self.limit:
+            for crow in range(crows):
+                for ccol in range(ccols):
+                    self.get((crow, ccol))
+
+    def locate(self, row, col):
+        # The cached chunk holding a tile and the tile's pixel position in it, or None if it is not drawn
+        key = (row // self.chunk, col // self.chunk)
+        if key not in self.chunks:
+            return None, None
+        return self.chunks[key], ((col % self.chunk) * TILEWIDTH, (row % self.chunk) * TILEHEIGHT)
+
+    def eraseTile(self, row, col):
+        """
+        Clears one tile in its cached chunk.
+
+        Args:
+            row (int): The tile row.
+            col (int): The tile column.
+        """
+        surface, position = self.locate(row, col)
+        if surface is not None:
+            surface.fill(BLACK, position + (TILEWIDTH, TILEHEIGHT))
+
+    def invalidate(self, cells):
+        """
+        Drops the cached chunks holding any of the given tiles, they are drawn again when next seen.
+
+        Args:
+            cells (iterable): (row, column) tiles.
+        """
+        for row, col in cells:
+            self.chunks.pop((row // self.chunk, col // self.chunk), None)
+
+    def render(self, screen, camera=None):
+        """
+        Blits the chunks that overlap the view.
+
+        Args:
+            screen (pygame.Surface): The surface to draw on.
+            camera (Camera, optional): The view, the whole layer from the origin when None. Defaults to None.
+        """
+        if camera is None:
+            offset = Vector2()
+            row0, row1, col0, col1 = 0, self.rows, 0, self.cols
+        else:
+            offset = camera.offset
+            row0, row1, col0, col1 = camera.visibleTiles()
+        size = self.chunk
+        for crow in range(max(row0, 0) // size, min(row1, self.rows - 1) // size + 1):
+            for ccol in range(max(col0, 0) // size, min(col1, self.cols - 1) // size + 1):
+                screen.blit(self.get((crow, ccol)), (ccol * size * TILEWIDTH - offset.x, crow * size * TILEHEIGHT - offset.y))
@@ -0,0 +1,549 @@
+#saves a running game to a small binary file and resumes it exactly where it was
+
+import os
+import struct
+import threading
+from functools import partial
+import numpy as np
+from vector import Vector2
+from constants import *
+from fruit import Fruit
+from level import Level
+from sprites import Spritesheet
+from sprites import DEATH
+from text import Text
+from timers import Timer
+
+MAGIC = b"PMCK"
+VERSION = 1
+
+# Magic, version, players, level, games, score, lives, levels cleared, deaths, pellets eaten, next text id,
+# swarm points, mode phase, pause flags, pause callback, status text, flags, then the clock of every timer group
+HEADER = struct.Struct("<4sHBiiiiiiiiiBBbbB4d")
+# Maze name and seed lengths, grid rows and columns, access entries, timers, popups, captured fruit, swarm ghosts, extra bytes
+COUNTS = struct.Struct("<BBHHIHHBII")
+PCG = struct.Struct("<16s16sBI")  # A PCG64 state: state, increment, has_uint32, uinteger
+STREAM = struct.Struct("<BI")  # Whether a batch was drawn and the position in it, then two PCG states
+
+PLAYER = np.dtype([("score", "<i4"), ("lives", "<i4"), ("out", "u1"), ("frame", "u1", 5), ("elapsed", "<f8", 5),
+                   ("finished", "u1", 5), ("stop", "u1", 2)])
+# Pac-Men, the four ghosts, then the fruit. Nodes are their NodeGroup keys, images are sprite sheet offsets
+ENTITY = np.dtype([("node", "<f4", 2), ("target", "<f4", 2), ("position", "<f8", 2), ("direction", "i1"),
+                   ("speed", "<f8"), ("flags", "u1"), ("mode", "i1"), ("points", "<i4"), ("goal", "<f8", 2),
+                   ("image", "<u2", 2)])
+TIMER = np.dtype([("kind", "u1"), ("group", "u1"), ("repeat", "u1"), ("arg", "<i4"), ("due", "<f8"), ("delay", "<f8")])
+POPUP = np.dtype([("id", "<i4"), ("points", "<i4"), ("position", "<f8", 2)])
+SWARM = np.dtype([("start", "<i4"), ("node", "<i4"), ("target", "<i4"), ("position", "<f8", 2), ("direction", "i1"),
+                  ("speed", "<f8"), ("mode", "i1"), ("home", "u1"), ("goal", "<f8", 2)])
+
+# ENTITY flags
+VISIBLE = 1
+ALIVE = 2
+PRESENT = 4  # The fruit slot is in use
+HASIMAGE = 8
+RANDOM = 16  # Turns at random, a ghost in FREIGHT
+DESTROY = 32  # The fruit's lifespan ran out
+
+# Header flags
+FLASHBG = 1
+FLASHED = 2  # The flashing background is the one showing
+POWERHIDDEN = 4
+SWARMVISIBLE = 8
+
+PAUSED = 1
+TIMEDPAUSE = 2
+
+# Timer kinds, what each pending timer calls
+PHASE = 0
+ENDFREIGHT = 1
+FRUITEXPIRE = 2
+RESPAWN = 3
+PELLETFLASH = 4
+BACKGROUNDFLASH = 5
+PAUSEEXPIRE = 6
+POPUPEXPIRE = 7
+
+PAUSEFUNCS = ("restartGame", "resetLevel", "nextLevel", "showEntities")
+STATUSTEXTS = (READYTXT, PAUSETXT, GAMEOVERTXT)
+NAMES = (PACMAN, BLINKY, PINKY, INKY, CLYDE, FRUIT)  # Bit order of the node access masks
+ANIMATIONS = (LEFT, RIGHT, UP, DOWN, DEATH)
+
+def packStream(stream):
+    """
+    Packs the state of a RandomStream.
+
+    Args:
+        stream (RandomStream): The stream.
+
+    Returns:
+        bytes: STREAM.size + 2 * PCG.size bytes.
+    """
+    origin, index, current = stream.getState()
+    return STREAM.pack(origin is not None, index) + packPCG(origin) + packPCG(current)
+
+def unpackStream(stream, data, offset=0):
+    """
+    Continues a RandomStream from a state packed by packStream.
+
+    Args:
+        stream (RandomStream): The stream to set.
+        data (bytes): The packed state.
+        offset (int, optional): Where it starts in data. Defaults to 0.
+
+    Returns:
+        int: The offset just past the state.
+    """
+    drawn, index = STREAM.unpack_from(data, offset)
+    offset += STREAM.size
+    origin = unpackPCG(data, offset) if drawn else None
+    current = unpackPCG(data, offset + PCG.size)
+    stream.setState((origin, index, current))
+    return offset + 2 * PCG.size
+
+def packPCG(state):
+    if state is None:
+        return bytes(PCG.size)
+    inner = state["state"]
+    return PCG.pack(inner["state"].to_bytes(16, "little"), inner["inc"].to_bytes(16, "little"),
+                    state["has_uint32"], state["uinteger"])
+
+def unpackPCG(data, offset):
+    value, inc, hasUint32, uinteger = PCG.unpack_from(data, offset)
+    return {"bit_generator": "PCG64",
+            "state": {"state": int.from_bytes(value, "little"), "inc": int.from_bytes(inc, "little")},
+            "has_uint32": hasUint32, "uinteger": uinteger}
+
+def nodeKey(node):
+    # The node's pixel position, its key in nodesLUT. The ghost house sits half a tile over, so not always whole tiles
+    return node.position.asTuple()
+
+def offset(image):
+    return image.get_offset() if image is not None else (0, 0)
+
+def timerRecord(game, timer):
+    # What a pending timer calls, as a (kind, argument) pair. None for a timer that would do nothing
+    func = timer.func
+    if isinstance(func, partial):
+        if func.func == game.respawn:
+            return RESPAWN, func.args[0].index
+        if func.func == game.textgroup.removeText:
+            return POPUPEXPIRE, func.args[0]
+    elif func == game.ghosts.mainmode.nextPhase:
+        return PHASE, 0
+    elif func == game.ghosts.mainmode.endFreight:
+        return ENDFREIGHT, 0
+    elif func == game.pellets.flash:
+        return PELLETFLASH, 0
+    elif func == game.flashBackground:
+        return BACKGROUNDFLASH, 0
+    elif func == game.pause.expire:
+        return PAUSEEXPIRE, 0
+    elif isinstance(getattr(func, "__self__", None), Fruit):
+        if func.__self__ is game.fruit:
+            return FRUITEXPIRE, 0
+        return None  # The lifespan of a fruit that was already eaten
+    raise ValueError("no checkpoint record for the timer calling %r" % (func,))
+
+def timerFunc(game, kind, arg):
+    if kind == RESPAWN:
+        return partial(game.respawn, game.pacmen.pacmen[arg])
+    if kind == POPUPEXPIRE:
+        return partial(game.textgroup.removeText, arg)
+    if kind == FRUITEXPIRE:
+        return game.fruit.expire
+    return {PHASE: game.ghosts.mainmode.nextPhase, ENDFREIGHT: game.ghosts.mainmode.endFreight,
+            PELLETFLASH: game.pellets.flash, BACKGROUNDFLASH: game.flashBackground,
+            PAUSEEXPIRE: game.pause.expire}[kind]
+
+def encode(game, extra=b""):
+    """
+    Packs the state of a game into a checkpoint.
+
+    Everything the next steps depend on is kept: level, score and lives,
+    the pellets left as two bitmaps, every entity's node, target, exact
+    position, direction, speed and mode, the access rules of every node,
+    the pending timers with the clock of their group, the pause, the
+    random streams of the ghosts and the seed later levels draw from. A checkpoint of a game in the arcade
+    maze is about 2 KB. The Pac-Men's keyboard input is not kept.
+
+    Args:
+        game (GameController): The game, between two steps.
+        extra (bytes, optional): Appended as is, for state the caller keeps around the game. Defaults to b"".
+
+    Returns:
+        bytes: The checkpoint.
+    """
+    pause = game.pause
+    timers = game.timers
+    textgroup = game.textgroup
+    mainmode = game.ghosts.mainmode
+    pauseFunc = -1
+    for i, name in enumerate(PAUSEFUNCS):
+        if pause.func is not None and pause.func == getattr(game, name):
+            pauseFunc = i
+    if pause.func is not None and pauseFunc < 0:
+        raise ValueError("no checkpoint record for the pause calling %r" % (pause.func,))
+    status = -1
+    for i, key in enumerate(STATUSTEXTS):
+        if textgroup.alltext[key].visible:
+            status = i
+    flags = 0
+    if game.flashBG:
+        flags |= FLASHBG
+    if game.background is game.background_flash:
+        flags |= FLASHED
+    if game.pellets.powerpellets and not game.pellets.powerpellets[0].visible:
+        flags |= POWERHIDDEN
+    swarm = game.swarm
+    if swarm is not None and swarm.visible:
+        flags |= SWARMVISIBLE
+    pauseFlags = (PAUSED if pause.paused else 0) | (TIMEDPAUSE if pause.pauseTime is not None else 0)
+    clocks = [timers.groups[group].clock for group in (WORLDTIMERS, LEVELTIMERS, HUDTIMERS, PAUSETIMERS)]
+    header = HEADER.pack(MAGIC, VERSION, game.players, game.level, game.games, game.score, game.lives,
+                         game.levelsCleared, game.deaths, game.pellets.numEaten, textgroup.nextid,
+                         swarm.points if swarm is not None else 0, mainmode.phase, pauseFlags, pauseFunc,
+                         status, flags, *clocks)
+
+    players = np.zeros(game.players, dtype=PLAYER)
+    for pacman, row in zip(game.pacmen, players):
+        row["score"] = game.playerScores[pacman.index]
+        row["lives"] = game.playerLives[pacman.index]
+        row["out"] = pacman.out
+        for i, key in enumerate(ANIMATIONS):
+            animation = pacman.sprites.animations[key]
+            row["frame"][i] = animation.current_frame
+            row["elapsed"][i] = animation.dt
+            row["finished"][i] = animation.finished
+        row["stop"] = pacman.sprites.stopimage
+
+    entities = np.zeros(game.players + 5, dtype=ENTITY)
+    for entity, row in zip(list(game.pacmen) + game.ghosts.ghosts + [game.fruit], entities):
+        if entity is None:
+            continue
+        row["node"] = nodeKey(entity.node)
+        row["target"] = nodeKey(entity.target)
+        row["position"] = entity.position.asTuple()
+        row["direction"] = entity.direction
+        row["speed"] = entity.speed
+        row["flags"] = (PRESENT | (VISIBLE if entity.visible else 0) | (HASIMAGE if entity.image is not None else 0)
+                        | (ALIVE if getattr(entity, "alive", True) else 0)
+                        | (RANDOM if entity.directionMethod == entity.randomDirection else 0)
+                        | (DESTROY if getattr(entity, "destroy", False) else 0))
+        row["image"] = offset(entity.image)
+        if entity.name not in (PACMAN, FRUIT):
+            row["mode"] = entity.mode.current
+            row["points"] = entity.points
+            row["goal"] = entity.goal.asTuple()
+
+    records = []
+    for group in (WORLDTIMERS, LEVELTIMERS, HUDTIMERS, PAUSETIMERS):
+        for timer in timers.pending(group):
+            record = timerRecord(game, timer)
+            if record is not None:
+                records.append((record[0], group, timer.repeat, record[1], timer.due, timer.delay))
+    records = np.array(records, dtype=TIMER)
+    popups = np.array([(id, int(text.text), text.position.asTuple()) for id, text in textgroup.popups.items()], dtype=POPUP)
+    fruits = np.array([offset(image) for image in game.fruitCaptured], dtype="<u2").reshape(-1, 2)
+
+    access = np.array([sum(1 << i for i, name in enumerate(NAMES) if name in node.access[direction])
+                       for node in game.nodes.nodesLUT.values() for direction in (UP, DOWN, LEFT, RIGHT)], dtype=np.uint8)
+    grid = game.pellets.grid
+    pellets = np.packbits(grid == PELLET).tobytes() + np.packbits(grid == POWERPELLET).tobytes()
+    streams = b"".join(packStream(ghost.rng) for ghost in game.ghosts)
+
+    ghosts = np.zeros(0, dtype=SWARM)
+    if swarm is not None:
+        streams += packStream(swarm.rng)
+        ghosts = np.zeros(swarm.count, dtype=SWARM)
+        ghosts["start"] = swarm.startNodes
+        ghosts["node"] = swarm.node
+        ghosts["target"] = swarm.target
+        ghosts["position"] = swarm.position
+        ghosts["direction"] = swarm.direction
+        ghosts["speed"] = swarm.speed
+        ghosts["mode"] = swarm.mode
+        ghosts["home"] = swarm.homeAccess
+        ghosts["goal"] = swarm.goal
+
+    name = game.mazedata.obj.name.encode()
+    entropy = game.random.entropy  # The streams of the levels still to come are derived from it
+    seed = entropy.to_bytes((entropy.bit_length() + 7) // 8, "little")
+    counts = COUNTS.pack(len(name), len(seed), grid.shape[0], grid.shape[1], len(access), len(records), len(popups),
+                         len(fruits), len(ghosts), len(extra))
+    return b"".join((header, counts, name, seed, players.tobytes(), entities.tobytes(), records.tobytes(), popups.tobytes(),
+                     fruits.tobytes(), access.tobytes(), pellets, streams, ghosts.tobytes(), extra))
+
+def decode(game, data):
+    """
+    Puts a game in the state a checkpoint was taken in.
+
+    The level is built again from its maze file and everything that
+    changed since it started is applied to it, so this costs about as
+    much as starting the level, however long the game had been running.
+
+    Args:
+        game (GameController): A game with the same players, ghost schedule, mazes and swarm size as the one saved.
+        data (bytes): A checkpoint made by encode.
+
+    Returns:
+        bytes: The extra bytes given to encode.
+    """
+    if data[:4] != MAGIC:
+        raise ValueError("not a checkpoint")
+    version = struct.unpack_from("<H", data, 4)[0]
+    if version != VERSION:
+        raise ValueError("checkpoint version %d, this game reads version %d" % (version, VERSION))
+    (magic, version, players, level, games, score, lives, levelsCleared, deaths, numEaten, nextid, swarmPoints,
+     phase, pauseFlags, pauseFunc, status, flags, *clocks) = HEADER.unpack_from(data)
+    (nameLength, seedLength, rows, cols, accessCount, timerCount, popupCount, fruitCount, swarmCount,
+     extraLength) = COUNTS.unpack_from(data, HEADER.size)
+    at = HEADER.size + COUNTS.size
+    name = data[at:at + nameLength].decode()
+    at += nameLength
+    entropy = int.from_bytes(data[at:at + seedLength], "little")
+    at += seedLength
+
+    def take(dtype, count):
+        nonlocal at
+        array = np.frombuffer(data, dtype, count, at)
+        at += array.nbytes
+        return array
+
+    if players != game.players:
+        raise ValueError("checkpoint has %d players, the game %d" % (players, game.players))
+    if swarmCount != game.swarmSize:
+        raise ValueError("checkpoint has %d swarm ghosts, the game %d" % (swarmCount, game.swarmSize))
+    playerRows = take(PLAYER, players)
+    entityRows = take(ENTITY, players + 5)
+    records = take(TIMER, timerCount)
+    popups = take(POPUP, popupCount)
+    fruits = take(np.dtype(("<u2", 2)), fruitCount)
+    access = take(np.uint8, accessCount)
+    cells = rows * cols
+    packed = (cells + 7) // 8
+    pellets = np.unpackbits(take(np.uint8, packed))[:cells].reshape(rows, cols).astype(np.int8) * PELLET
+    pellets[np.unpackbits(take(np.uint8, packed))[:cells].reshape(rows, cols).astype(bool)] = POWERPELLET
+
+    # A fresh copy of the level, checked before the game is touched, set up with the player counters
+    built = Level(level, game.ghostSchedule, game.mazes, game.players)
+    if built.mazedata.obj.name != name:
+        raise ValueError("checkpoint was taken in %s, level %d is %s here" % (name, level, built.mazedata.obj.name))
+    if len(built.nodes.nodesLUT) * 4 != accessCount or built.pellets.grid.shape != (rows, cols):
+        raise ValueError("%s has changed since the checkpoint was taken" % name)
+    game.pause.cancel()
+    game.removeFruit()
+    game.random.entropy = entropy
+    game.level = level
+    game.games = games
+    game.playerScores = playerRows["score"].tolist()
+    game.playerLives = playerRows["lives"].tolist()
+    game.setLevel(built)
+    game.score = score
+    game.lives = lives
+    game.levelsCleared = levelsCleared
+    game.deaths = deaths
+
+    for (row, col), kind in zip(np.argwhere(built.pellets.grid != pellets).tolist(),
+                                pellets[built.pellets.grid != pellets].tolist()):
+        game.pellets.setCell(row, col, {0: " ", PELLET: ".", POWERPELLET: "P"}[kind])
+    game.pellets.numEaten = numEaten
+    for powerpellet in game.pellets.powerpellets:
+        powerpellet.visible = not flags & POWERHIDDEN
+    masks = access.reshape(-1, 4).tolist()
+    for node, bits in zip(game.nodes.nodesLUT.values(), masks):
+        for direction, mask in zip((UP, DOWN, LEFT, RIGHT), bits):
+            node.access[direction] = [name for i, name in enumerate(NAMES) if mask >> i & 1]
+
+    nodes = game.nodes
+    sheet = Spritesheet()
+    fruitRow = entityRows[-1]
+    if fruitRow["flags"] & PRESENT:
+        game.fruit = Fruit(nodes.getNodeFromTiles(*game.mazedata.obj.fruitStart))
+    for entity, row in zip(list(game.pacmen) + game.ghosts.ghosts + [game.fruit], entityRows):
+        if entity is None:
+            continue
+        rowFlags = int(row["flags"])
+        entity.node = nodes.getNodeFromPixels(*row["node"].tolist())
+        entity.target = nodes.getNodeFromPixels(*row["target"].tolist())
+        entity.position = Vector2(*row["position"].tolist())
+        entity.direction = int(row["direction"])
+        entity.speed = float(row["speed"])
+        entity.visible = bool(rowFlags & VISIBLE)
+        entity.image = None
+        if rowFlags & HASIMAGE:
+            sx, sy = row["image"].tolist()
+            entity.image = sheet.getImage(sx / TILEWIDTH, sy / TILEHEIGHT, 2*TILEWIDTH, 2*TILEHEIGHT)
+        entity.directionMethod = entity.randomDirection if rowFlags & RANDOM else entity.goalDirection
+        if entity.name == PACMAN:
+            entity.alive = bool(rowFlags & ALIVE)
+        elif entity.name == FRUIT:
+            entity.destroy = bool(rowFlags & DESTROY)
+        else:
+            entity.mode.current = int(row["mode"])
+            entity.points = int(row["points"])
+            entity.goal = Vector2(*row["goal"].tolist())
+    for pacman, row in zip(game.pacmen, playerRows):
+        pacman.out = bool(row["out"])
+        for i, key in enumerate(ANIMATIONS):
+            animation = pacman.sprites.animations[key]
+            animation.current_frame = int(row["frame"][i])
+            animation.dt = float(row["elapsed"][i])
+            animation.finished = bool(row["finished"][i])
+        pacman.sprites.stopimage = tuple(row["stop"].tolist())
+        if pacman.input is not None:
+            pacman.input.clear()
+    if game.fruit is not None:
+        game.grid.add(game.fruit, FRUIT)
+    game.grid.refresh()
+
+    for stream in [ghost.rng for ghost in game.ghosts] + ([game.swarm.rng] if game.swarm is not None else []):
+        at = unpackStream(stream, data, at)
+    if game.swarm is not None:
+        swarm = take(SWARM, swarmCount)
+        game.swarm.startNodes = swarm["start"].astype(np.int64)
+        game.swarm.node = swarm["node"].astype(np.int64)
+        game.swarm.target = swarm["target"].astype(np.int64)
+        game.swarm.position = swarm["position"].astype(np.float64)
+        game.swarm.direction = swarm["direction"].astype(np.int64)
+        game.swarm.speed = swarm["speed"].astype(np.float64)
+        game.swarm.mode = swarm["mode"].astype(np.int8)
+        game.swarm.homeAccess = swarm["home"].astype(bool)
+        game.swarm.goal = swarm["goal"].astype(np.float64)
+        game.swarm.points = swarmPoints
+        game.swarm.visible = bool(flags & SWARMVISIBLE)
+
+    # The ghost modes and every pending timer, due on the same group clocks as before
+    mainmode = game.ghosts.mainmode
+    mainmode.setPhase(phase)
+    mainmode.phaseTimer = None
+    mainmode.freightTimer = None
+    pause = game.pause
+    pending = {group: [] for group in (WORLDTIMERS, LEVELTIMERS, HUDTIMERS, PAUSETIMERS)}
+    for record in records.tolist():
+        kind, group, repeat, arg, due, delay = record
+        timer = Timer(due, delay, timerFunc(game, kind, arg), group, bool(repeat))
+        pending[group].append(timer)
+        if kind == PHASE:
+            mainmode.phaseTimer = timer
+        elif kind == ENDFREIGHT:
+            mainmode.freightTimer = timer
+        elif kind == PAUSEEXPIRE:
+            pause.timer = timer
+    for (group, timers), clock in zip(pending.items(), clocks):
+        game.timers.restore(group, clock, timers)
+    pause.func = getattr(game, PAUSEFUNCS[pauseFunc]) if pauseFunc >= 0 else None
+    pause.pauseTime = pause.timer.delay if pauseFlags & TIMEDPAUSE and pause.timer is not None else None
+    pause.paused = bool(pauseFlags & PAUSED)
+
+    # What is on screen: the HUD, the popups and the background
+    textgroup = game.textgroup
+    textgroup.popups = {}
+    for id, points, position in popups.tolist():
+        textgroup.popups[id] = Text(str(points), WHITE, position[0], position[1], 8, time=1)
+    textgroup.nextid = nextid
+    textgroup.hideText()
+    if status >= 0:
+        textgroup.showText(STATUSTEXTS[status])
+    textgroup.updateScore(score)
+    textgroup.updateLevel(level)
+    game.lifesprites.resetLives(lives)
+    game.fruitCaptured = [sheet.getImage(sx / TILEWIDTH, sy / TILEHEIGHT, 2*TILEWIDTH, 2*TILEHEIGHT)
+                          for sx, sy in fruits.tolist()]
+    game.hud.setFruit(game.fruitCaptured)
+    game.flashBG = bool(flags & FLASHBG)
+    game.background = game.background_flash if flags & FLASHED else game.background_norm
+    if game.rewind is not None:
+        game.rewind.clear()
+    game.playhead = None
+    return data[at:at + extraLength]
+
+def save(game, path, extra=b""):
+    """
+    Writes a checkpoint of a game, replacing any file at path in one step.
+
+    Args:
+        game (GameController): The game.
+        path (str): The file to write.
+        extra (bytes, optional): See encode. Defaults to b"".
+    """
+    writeAtomic(path, encode(game, extra))
+
+def load(game, path):
+    """
+    Resumes a game from a checkpoint file.
+
+    Args:
+        game (GameController): The game, see decode.
+        path (str): The file written by save.
+
+    Returns:
+        bytes: The extra bytes it was saved with.
+    """
+    with open(path, "rb") as f:
+        return decode(game, f.read())
+
+def writeAtomic(path, data):
+    # A crash mid write leaves the previous checkpoint in place, never half of a new one
+    temp = "%s.%d.%d.tmp" % (path, os.getpid(), threading.get_ident())
+    with open(temp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+
+
+class CheckpointWriter(object):
+    def __init__(self, path):
+        """
+        Initializes the CheckpointWriter object.
+
+        The game loop only encodes the checkpoint, which takes well under a
+        millisecond. Writing and syncing it to disk happens on a background
+        thread, and a checkpoint still waiting there is replaced by a newer
+        one, so a slow disk never holds up a frame.
+
+        Args:
+            path (str): The file every checkpoint replaces.
+        """
+        self.path = path
+        self.pending = None
+        self.busy = False
+        self.written = 0
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.run, name="checkpoint", daemon=True)
+        self.thread.start()
+
+    def submit(self, data):
+        """
+        Queues a checkpoint for writing.
+
+        Args:
+            data (bytes): A checkpoint made by encode.
+        """
+        with self.condition:
+            self.pending = data
+            self.condition.notify_all()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None:
+                    self.condition.wait()
+                data, self.pending = self.pending, None
+                self.busy = True
+            try:
+                writeAtomic(self.path, data)
+                self.written += 1
+            except OSError as error:
+                print("Could not write checkpoint %s: %s" % (self.path, error))
+            with self.condition:
+                self.busy = False
+                self.condition.notify_all()
+
+    def flush(self):
+        """
+        Waits until every submitted checkpoint is on disk.
+        """
+        with self.condition:
+            while self.pending is not None or self.busy:
+                self.condition.wait()
@@ -50,6 +50,18 @@ CLYDE = 7  # Clyde ghost
 # Other game entities
 FRUIT = 8  # Fruit entity
 
+# Frame pacing
+FPS = 30  # Simulation and render rate
+
+# Level loading
+PREFETCHPELLETS = 10  # Start building the next level once this many pellets are left
+
+# Timer groups
+WORLDTIMERS = 0  # Gameplay timers, frozen while the game is paused
+LEVELTIMERS = 1  # Effects that belong to the current maze, dropped when it is replaced
+HUDTIMERS = 2  # Score popups
+PAUSETIMERS = 3  # The pause countdown itself
+
 # Text types for UI
 SCORETXT = 0  # Score text
 LEVELTXT = 1  # Level text
@@ -0,0 +1,405 @@
+#streams headless episodes to columnar shards on disk and samples minibatches back out of them
+
+import os
+import json
+import queue
+import argparse
+import threading
+import numpy as np
+from constants import *
+from checkpoint import writeAtomic
+from rng import RandomSource
+from rng import STREAMDATASET
+
+VERSION = 1
+INDEX = "index.json"
+
+# Observation keys stored as they are, the grids are packed separately and the distance fields can be
+# recomputed from the pellets and walls with distancefield.DistanceField
+OBSERVED = ("entities", "ghostModes", "freightTimer")
+
+def columnLayout(obs, action, reward, gridShape):
+    """
+    Lays out the columns of a dataset from the first step written to it.
+
+    Args:
+        obs (dict): An observation from PacmanEnv.
+        action (int or sequence): The action taken, one per player when there are several.
+        reward (int or numpy.ndarray): The reward, one per player when there are several.
+        gridShape (tuple): Maze rows and columns.
+
+    Returns:
+        list: (name, dtype string, shape) per column, in the order they are stored.
+    """
+    packed = (2 * gridShape[0] * gridShape[1] + 7) // 8  # A PELLET and a POWERPELLET bit per tile
+    columns = [("episode", "<u4", ()),
+               ("step", "<u4", ()),
+               ("pellets", "u1", (packed,)),
+               ("maze", "<u2", ())]  # Row of the shard's wall table
+    for key in OBSERVED:
+        columns.append((key, obs[key].dtype.str, obs[key].shape))
+    columns += [("action", "i1", np.shape(action)),
+                ("reward", "<i4", np.shape(reward)),
+                ("terminated", "u1", ()),
+                ("truncated", "u1", ())]
+    return [(name, dtype, tuple(shape)) for name, dtype, shape in columns]
+
+def packPellets(grid):
+    return np.packbits(np.stack((grid == PELLET, grid == POWERPELLET)))
+
+def unpackPellets(packed, gridShape):
+    """
+    Turns packed pellet rows back into pellet grids.
+
+    Args:
+        packed (numpy.ndarray): Rows of the pellets column.
+        gridShape (tuple): Maze rows and columns.
+
+    Returns:
+        numpy.ndarray: PELLET or POWERPELLET per tile, one grid per row, like obs["pellets"].
+    """
+    rows, cols = gridShape
+    bits = np.unpackbits(packed, axis=-1, count=2 * rows * cols).reshape(packed.shape[:-1] + (2, rows, cols))
+    return (bits[..., 0, :, :] * PELLET + bits[..., 1, :, :] * POWERPELLET).astype(np.int8)
+
+
+class TrajectoryWriter(object):
+    def __init__(self, path, shardSteps=32768, buffers=3):
+        """
+        Opens a dataset directory for writing, carrying on after the shards already in it.
+
+        Steps are copied into preallocated column buffers, one shard's worth
+        each. A full buffer is handed to a background thread, which writes
+        it as one shard file and then updates the index, so the index only
+        ever lists complete shards. When every buffer is still waiting to be
+        written the game waits for the disk instead of using more memory,
+        and no step is ever dropped.
+
+        Every shard stores its columns one after another as raw arrays,
+        so a reader can memory map any column of any shard. Pellet grids
+        are packed to two bits per tile, and the wall grid, which only
+        changes with the maze, is stored once per shard with a row index
+        per step.
+
+        Args:
+            path (str): The dataset directory, created if needed.
+            shardSteps (int, optional): Steps per shard. Defaults to 32768.
+            buffers (int, optional): Shards that can be held in memory, counting the one being filled. Defaults to 3.
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.shardSteps = shardSteps
+        self.index = {"version": VERSION, "gridShape": None, "columns": None, "steps": 0, "episodes": 0, "shards": []}
+        if os.path.exists(os.path.join(path, INDEX)):
+            self.index = readIndex(path)
+        self.episode = self.index["episodes"] - 1  # Numbered on from the episodes already stored
+        self.spare = buffers  # Buffers not allocated yet
+        self.free = queue.Queue()
+        self.pending = queue.Queue()
+        self.current = None  # Column buffers being filled
+        self.walls = []  # Wall grids of the current shard
+        self.wallRows = {}  # Wall grid bytes -> row in walls
+        self.count = 0  # Steps in the current shard
+        self.row = None  # Row begin has filled, waiting for end
+        self.error = None  # Why the writer thread stopped, raised again on the game thread
+        self.thread = threading.Thread(target=self.run, name="dataset", daemon=True)
+        self.thread.start()
+
+    def startEpisode(self):
+        """
+        Numbers the steps that follow as a new episode.
+        """
+        self.episode += 1
+        self.index["episodes"] = self.episode + 1
+
+    def allocate(self):
+        # The first buffers are made on demand, once the column layout is known
+        try:
+            return self.free.get_nowait()
+        except queue.Empty:
+            if self.spare > 0:
+                self.spare -= 1
+                return dict((name, np.zeros((self.shardSteps,) + shape, dtype=dtype))
+                            for name, dtype, shape in self.index["columns"])
+        return self.free.get()  # Every buffer is waiting for the disk
+
+    def begin(self, obs, action, step):
+        """
+        Stores the observation an action was chosen from. PacmanEnv calls this at the start of step.
+
+        Args:
+            obs (dict): The observation, copied before the environment overwrites it.
+            action (int or sequence): The action, one per player when there are several.
+            step (int): Steps taken in the episode so far.
+
+        Raises:
+            ValueError: If the maze size differs from the rest of the dataset.
+        """
+        if self.error is not None:
+            raise self.error
+        walls = obs["walls"]
+        if self.index["columns"] is None:
+            self.index["gridShape"] = list(walls.shape)
+            reward = np.zeros(np.shape(action), dtype=np.int32) if np.ndim(action) else 0
+            self.index["columns"] = columnLayout(obs, action, reward, walls.shape)
+        if list(walls.shape) != self.index["gridShape"]:
+            raise ValueError("the dataset holds %s mazes, this one is %s" % (tuple(self.index["gridShape"]), walls.shape))
+        if self.current is None:
+            self.current = self.allocate()
+        wallKey = walls.tobytes()
+        if wallKey not in self.wallRows:
+            self.wallRows[wallKey] = len(self.walls)
+            self.walls.append(walls.copy())
+        columns, i = self.current, self.count
+        columns["episode"][i] = self.episode
+        columns["step"][i] = step
+        columns["pellets"][i] = packPellets(obs["pellets"])
+        columns["maze"][i] = self.wallRows[wallKey]
+        for key in OBSERVED:
+            columns[key][i] = obs[key]
+        columns["action"][i] = action
+        self.row = i
+
+    def end(self, reward, terminated, truncated):
+        """
+        Stores what the action begun with begin led to. PacmanEnv calls this at the end of step.
+
+        Args:
+            reward (int or numpy.ndarray): The score gained, one per player when there are several.
+            terminated (bool): The episode ended.
+            truncated (bool): The episode was cut off.
+        """
+        columns, i = self.current, self.row
+        columns["reward"][i] = reward
+        columns["terminated"][i] = terminated
+        columns["truncated"][i] = truncated
+        self.row = None
+        self.count += 1
+        if self.count == self.shardSteps:
+            self.submit()
+
+    def submit(self):
+        # Hands the current shard to the writer thread
+        if self.count:
+            self.pending.put((self.current, self.count, np.array(self.walls, dtype=np.int8)))
+            self.current = None
+        self.count = 0
+        self.walls = []
+        self.wallRows = {}
+
+    def run(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            columns, count, walls = item
+            try:
+                self.writeShard(columns, count, walls)
+            except Exception as error:
+                self.error = error  # Raised on the game thread by the next begin or by close
+            finally:
+                self.free.put(columns)  # Always handed back, or allocate would wait for it forever
+
+    def writeShard(self, columns, count, walls):
+        name = "shard%06d.bin" % len(self.index["shards"])
+        temp = os.path.join(self.path, name + ".tmp")
+        with open(temp, "wb") as f:
+            for column, dtype, shape in self.index["columns"]:
+                f.write(columns[column][:count].data)
+            f.write(walls.data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, os.path.join(self.path, name))
+        self.index["shards"].append({"file": name, "steps": count, "walls": len(walls)})
+        self.index["steps"] += count
+        writeAtomic(os.path.join(self.path, INDEX), json.dumps(self.index, indent=1).encode())
+
+    def close(self):
+        """
+        Writes everything still in memory and stops the writer thread.
+
+        Returns:
+            str: What the dataset holds now.
+        """
+        self.submit()
+        self.pending.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+        return "Dataset %s: %d steps in %d episodes and %d shards" % (
+            self.path, self.index["steps"], self.index["episodes"], len(self.index["shards"]))
+
+
+def readIndex(path):
+    with open(os.path.join(path, INDEX)) as f:
+        index = json.load(f)
+    if index["version"] != VERSION:
+        raise ValueError("dataset version %d, this game reads version %d" % (index["version"], VERSION))
+    index["columns"] = [(name, dtype, tuple(shape)) for name, dtype, shape in index["columns"]]
+    return index
+
+
+class Shard(object):
+    def __init__(self, path, entry, columns, gridShape):
+        """
+        Initializes the Shard object, a read only view of one shard file.
+
+        Args:
+            path (str): The dataset directory.
+            entry (dict): The shard's entry in the index.
+            columns (list): (name, dtype string, shape) per column.
+            gridShape (tuple): Maze rows and columns.
+        """
+        filename = os.path.join(path, entry["file"])
+        self.steps = entry["steps"]
+        self.columns = {}
+        offset = 0
+        for name, dtype, shape in columns:
+            self.columns[name] = np.memmap(filename, dtype=dtype, mode="r", offset=offset, shape=(self.steps,) + shape)
+            offset += self.steps * np.dtype(dtype).itemsize * int(np.prod(shape))
+        self.walls = np.memmap(filename, dtype=np.int8, mode="r", offset=offset, shape=(entry["walls"],) + gridShape)
+
+
+class TrajectoryReader(object):
+    def __init__(self, paths, seed=None):
+        """
+        Opens one or more datasets written by TrajectoryWriter as one.
+
+        Shards are memory mapped, so only the rows a minibatch touches are
+        read from disk and a dataset can be far larger than memory. Datasets
+        written in parallel, such as one per process, can be read together
+        as long as their columns match.
+
+        Args:
+            paths (str or list): Dataset directories.
+            seed (int, optional): Seeds the minibatch sampling. Defaults to None.
+        """
+        if isinstance(paths, str):
+            paths = [paths]
+        self.shards = []
+        self.starts = []  # First global row of every shard, for bisect
+        self.steps = 0
+        self.columns = None
+        self.gridShape = None
+        for path in paths:
+            index = readIndex(path)
+            if not index["shards"]:
+                continue
+            if self.columns is None:
+                self.columns, self.gridShape = index["columns"], tuple(index["gridShape"])
+            elif index["columns"] != self.columns or tuple(index["gridShape"]) != self.gridShape:
+                raise ValueError("%s does not have the columns of %s" % (path, paths[0]))
+            for entry in index["shards"]:
+                self.shards.append(Shard(path, entry, self.columns, self.gridShape))
+                self.starts.append(self.steps)
+                self.steps += entry["steps"]
+        self.bounds = np.array(self.starts + [self.steps], dtype=np.int64)
+        self.rng = RandomSource(seed).stream(STREAMDATASET)
+
+    def __len__(self):
+        return self.steps
+
+    def gather(self, rows, names=None):
+        # Reads rows from the shards they fall in, a shard at a time, and unpacks the grids
+        if names is None:
+            names = [name for name, dtype, shape in self.columns]
+        layout = dict((name, (dtype, shape)) for name, dtype, shape in self.columns)
+        shard = np.searchsorted(self.bounds, rows, side="right") - 1
+        batch = dict((name, np.empty((len(rows),) + layout[name][1], dtype=layout[name][0])) for name in names)
+        if "maze" in names:
+            batch["walls"] = np.empty((len(rows),) + self.gridShape, dtype=np.int8)
+        for s in np.unique(shard).tolist():
+            picked = np.flatnonzero(shard == s)
+            local = rows[picked] - self.starts[s]
+            columns = self.shards[s].columns
+            for name in names:
+                batch[name][picked] = columns[name][local]
+            if "maze" in names:
+                batch["walls"][picked] = self.shards[s].walls[batch["maze"][picked]]
+        if "maze" in names:
+            del batch["maze"]
+        if "pellets" in names:
+            batch["pellets"] = unpackPellets(batch["pellets"], self.gridShape)
+        return batch
+
+    def batch(self, rows, nextObs=False):
+        """
+        Reads steps by their position in the dataset.
+
+        Args:
+            rows (sequence): Global step numbers, each below len(self).
+            nextObs (bool, optional): Also return the observation each action led to, under
+                "next" + key, such as "nextPellets". A step that ended its episode, or the
+                last one written, gets its own observation. Defaults to False.
+
+        Returns:
+            dict: pellets and walls grids, the other observation keys, action, reward,
+                terminated, truncated, episode and step, one row per step.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        batch = self.gather(rows)
+        if nextObs:
+            following = np.minimum(rows + 1, self.steps - 1)
+            after = self.gather(following, ("episode", "step"))
+            same = (after["episode"] == batch["episode"]) & (after["step"] == batch["step"] + 1)
+            same &= (batch["terminated"] == 0) & (batch["truncated"] == 0)
+            after = self.gather(np.where(same, following, rows), ("pellets", "maze") + OBSERVED)
+            for key, value in after.items():
+                batch["next" + key[0].upper() + key[1:]] = value
+        return batch
+
+    def sample(self, size, nextObs=False):
+        """
+        Draws a minibatch of steps uniformly from the whole dataset.
+
+        Args:
+            size (int): Steps in the minibatch.
+            nextObs (bool, optional): Also return the next observations, see batch. Defaults to False.
+
+        Returns:
+            dict: Arrays with size rows, see batch.
+        """
+        rows = (self.rng.draw(size) * self.steps).astype(np.int64)
+        return self.batch(np.sort(rows), nextObs)
+
+
+def record(path, agentName, seeds, maxSteps=10000, startLevel=0, continueLevels=True, shardSteps=32768):
+    """
+    Plays an agent headless and writes every step to a dataset.
+
+    Args:
+        path (str): The dataset directory, added to if it already exists.
+        agentName (str): See agents.loadAgent.
+        seeds (iterable): One episode per seed.
+        maxSteps (int, optional): Steps before an episode is cut off. Defaults to 10000.
+        startLevel (int, optional): Level every episode starts on. Defaults to 0.
+        continueLevels (bool, optional): Keep playing after a level is cleared. Defaults to True.
+        shardSteps (int, optional): Steps per shard. Defaults to 32768.
+
+    Returns:
+        str: What the dataset holds now.
+    """
+    from env import PacmanEnv
+    from agents import loadAgent
+    writer = TrajectoryWriter(path, shardSteps)
+    env = PacmanEnv(maxSteps=maxSteps, startLevel=startLevel, continueLevels=continueLevels, dataset=writer)
+    for seed in seeds:
+        agent = loadAgent(agentName)(seed)
+        obs, info = env.reset(seed=seed)
+        agent.reset(obs)
+        terminated = truncated = False
+        while not (terminated or truncated):
+            obs, reward, terminated, truncated, info = env.step(agent.act(obs))
+    return writer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record headless episodes for offline learning.")
+    parser.add_argument("--out", default="dataset", help="dataset directory, added to if it exists")
+    parser.add_argument("--agent", default="greedy")
+    parser.add_argument("--seeds", type=int, nargs=2, default=[0, 100], metavar=("FIRST", "END"), help="seeds FIRST..END-1, one episode each")
+    parser.add_argument("--max-steps", type=int, default=10000)
+    parser.add_argument("--level", type=int, default=0, help="start level")
+    parser.add_argument("--shard-steps", type=int, default=32768)
+    args = parser.parse_args()
+    print(record(args.out, args.agent, range(*args.seeds), args.max_steps, args.level, shardSteps=args.shard_steps))
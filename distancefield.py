@@ -0,0 +1,230 @@
+#keeps the maze distance from every tile to the nearest pellet up to date as pellets are eaten
+
+import heapq
+from collections import deque
+import numpy as np
+from constants import *
+
+UNREACHABLE = -1  # Distance of walls and of tiles no source can be reached from
+
+def walkableTiles(data, symbols):
+    """
+    Finds the tiles Pac-Man can stand on.
+
+    Args:
+        data (numpy.ndarray): The maze file as symbols.
+        symbols (list): Node and path symbols, such as NodeGroup.nodeSymbols + NodeGroup.pathSymbols.
+
+    Returns:
+        numpy.ndarray: True per walkable tile.
+    """
+    return np.isin(data, symbols)
+
+class DistanceField(object):
+    def __init__(self, walkable, portals=(), sources=()):
+        """
+        Initializes the DistanceField object.
+
+        distance holds, for every tile, the number of tile steps along the
+        maze to the nearest source, with portals one step across. Every
+        tile also remembers which source it is nearest to. Adding a source
+        only floods the tiles it is now closer to, and removing one only
+        fills in the tiles that were nearest to it again, from the tiles
+        around them, so eating a pellet costs about the size of its
+        neighbourhood rather than the whole maze.
+
+        Args:
+            walkable (numpy.ndarray): True per tile that can be walked on.
+            portals (iterable, optional): ((col, row), (col, row)) pairs joined by a portal. Defaults to ().
+            sources (iterable, optional): Flat indices of the source tiles. Defaults to ().
+        """
+        self.shape = walkable.shape
+        self.sources = set(sources)  # Flat tile indices
+        self.distance = np.full(self.shape, UNREACHABLE, dtype=np.int32)
+        self.setWalkable(walkable, portals)
+
+    def setWalkable(self, walkable, portals=()):
+        """
+        Replaces the maze layout and recomputes the whole field.
+
+        Args:
+            walkable (numpy.ndarray): True per tile that can be walked on, the same shape as before.
+            portals (iterable, optional): ((col, row), (col, row)) pairs joined by a portal. Defaults to ().
+        """
+        rows, cols = self.shape
+        self.walkable = walkable.copy()
+        # Plain lists index far faster than numpy element by element, which the flood fills do a lot of
+        flat = walkable.reshape(-1).tolist()
+        self.neighbors = [() for i in range(rows * cols)]
+        for i in np.flatnonzero(walkable).tolist():
+            row, col = divmod(i, cols)
+            around = []
+            for r, c in ((row-1, col), (row+1, col), (row, col-1), (row, col+1)):
+                if 0 <= r < rows and 0 <= c < cols and flat[r * cols + c]:
+                    around.append(r * cols + c)
+            self.neighbors[i] = around
+        for (col1, row1), (col2, row2) in portals:
+            a, b = int(row1) * cols + int(col1), int(row2) * cols + int(col2)
+            if flat[a] and flat[b]:
+                self.neighbors[a] = list(self.neighbors[a]) + [b]
+                self.neighbors[b] = list(self.neighbors[b]) + [a]
+        self.sources = set(i for i in self.sources if flat[i])
+        self.recompute()
+
+    def recompute(self):
+        """
+        Computes every distance from scratch with one breadth first search from all sources.
+        """
+        size = self.shape[0] * self.shape[1]
+        dist = [UNREACHABLE] * size
+        owner = [-1] * size
+        queue = deque(sorted(self.sources))
+        for i in queue:
+            dist[i] = 0
+            owner[i] = i
+        neighbors = self.neighbors
+        while queue:
+            i = queue.popleft()
+            d = dist[i] + 1
+            for n in neighbors[i]:
+                if dist[n] == UNREACHABLE:
+                    dist[n] = d
+                    owner[n] = owner[i]
+                    queue.append(n)
+        self.dist = dist
+        self.owner = owner
+        self.distance[:] = np.array(dist, dtype=np.int32).reshape(self.shape)
+
+    def add(self, row, col):
+        """
+        Makes a tile a source, lowering the distances it is now the nearest source for.
+
+        Args:
+            row (int): Tile row.
+            col (int): Tile column.
+        """
+        i = row * self.shape[1] + col
+        if i in self.sources or not self.walkable[row, col]:
+            return
+        self.sources.add(i)
+        dist, owner, neighbors = self.dist, self.owner, self.neighbors
+        dist[i] = 0
+        owner[i] = i
+        changed = [i]
+        queue = deque(changed)
+        while queue:
+            j = queue.popleft()
+            d = dist[j] + 1
+            for n in neighbors[j]:
+                # Ties move over too, so every tile can still be traced back to its source through tiles of the same source
+                if dist[n] == UNREACHABLE or d < dist[n] or (d == dist[n] and owner[n] != i):
+                    dist[n] = d
+                    owner[n] = i
+                    changed.append(n)
+                    queue.append(n)
+        self.publish(changed)
+
+    def remove(self, row, col):
+        """
+        Stops a tile being a source and repairs the tiles that were nearest to it.
+
+        Args:
+            row (int): Tile row.
+            col (int): Tile column.
+        """
+        i = row * self.shape[1] + col
+        if i not in self.sources:
+            return
+        self.sources.discard(i)
+        dist, owner, neighbors = self.dist, self.owner, self.neighbors
+        if not self.sources:
+            self.recompute()
+            return
+        # The tiles whose nearest source this was, every one of them reached from i through the others
+        region = [i]
+        inside = {i}
+        for j in region:
+            for n in neighbors[j]:
+                if n not in inside and owner[n] == i:
+                    inside.add(n)
+                    region.append(n)
+        # Tiles around the region keep their distance, so they seed it: a Dijkstra over the region alone
+        heap = []
+        for j in region:
+            best = None
+            for n in neighbors[j]:
+                if n not in inside and dist[n] != UNREACHABLE and (best is None or dist[n] < dist[best]):
+                    best = n
+            dist[j] = UNREACHABLE
+            owner[j] = -1
+            if best is not None:
+                heap.append((dist[best] + 1, j, owner[best]))
+        heapq.heapify(heap)
+        while heap:
+            d, j, source = heapq.heappop(heap)
+            if dist[j] != UNREACHABLE and dist[j] <= d:
+                continue
+            dist[j] = d
+            owner[j] = source
+            for n in neighbors[j]:
+                if n in inside and (dist[n] == UNREACHABLE or d + 1 < dist[n]):
+                    heapq.heappush(heap, (d + 1, n, source))
+        self.publish(region)
+
+    def publish(self, changed):
+        # Copies the tiles that changed into the NumPy array
+        index = np.array(changed, dtype=np.int64)
+        self.distance.reshape(-1)[index] = np.array([self.dist[j] for j in changed], dtype=np.int32)
+
+    def at(self, position):
+        """
+        Looks up the distance from a point in the maze.
+
+        Args:
+            position (Vector2): A pixel position, such as an entity's.
+
+        Returns:
+            int: Tile steps to the nearest source from the tile the position is closest to, UNREACHABLE if none.
+        """
+        row, col = int(round(position.y / TILEHEIGHT)), int(round(position.x / TILEWIDTH))
+        if not (0 <= row < self.shape[0] and 0 <= col < self.shape[1]):
+            return UNREACHABLE
+        return self.dist[row * self.shape[1] + col]
+
+
+class PelletDistances(object):
+    def __init__(self, walkable, portals, pellets):
+        """
+        Initializes the PelletDistances object, the distance fields a PelletGroup keeps up to date.
+
+        Args:
+            walkable (numpy.ndarray): True per tile Pac-Man can walk on.
+            portals (iterable): ((col, row), (col, row)) pairs joined by a portal.
+            pellets (PelletGroup): The pellets, it reports every pellet added or removed from now on.
+        """
+        portals = list(portals)
+        self.pellet = DistanceField(walkable, portals, np.flatnonzero(pellets.grid).tolist())  # Nearest pellet of either kind
+        self.power = DistanceField(walkable, portals, np.flatnonzero(pellets.grid == POWERPELLET).tolist())  # Nearest power pellet
+        pellets.distances = self
+
+    def setWalkable(self, walkable, portals):
+        """
+        Recomputes both fields for an edited maze.
+
+        Args:
+            walkable (numpy.ndarray): True per tile Pac-Man can walk on.
+            portals (iterable): ((col, row), (col, row)) pairs joined by a portal.
+        """
+        portals = list(portals)
+        self.pellet.setWalkable(walkable, portals)
+        self.power.setWalkable(walkable, portals)
+
+    def added(self, row, col, kind):
+        self.pellet.add(row, col)
+        if kind == POWERPELLET:
+            self.power.add(row, col)
+
+    def removed(self, row, col, kind):
+        self.pellet.remove(row, col)
+        if kind == POWERPELLET:
+            self.power.remove(row, col)
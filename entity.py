@@ -4,7 +4,7 @@ import pygame
 from pygame.locals import *
 from vector import Vector2  
 from constants import *  # Importing constants
-from random import randint  # Importing random integer function
+from rng import RandomStream  # Seeded random numbers for randomDirection
 
 class Entity(object):
     def __init__(self, node):
@@ -27,6 +27,7 @@ class Entity(object):
         self.disablePortal = False  # Portal usage flag
         self.goal = None  # Goal position
         self.directionMethod = self.goalDirection  # Method to determine direction
+        self.rng = None  # RandomStream used by randomDirection, normally given by the game
         self.setStartNode(node)  # Set start node and initial position
         self.image = None  # Entity image
 
@@ -120,13 +121,18 @@ class Entity(object):
         """
         Chooses a random direction from the list of valid directions.
 
+        Draws from the entity's own stream, so runs are reproducible when the
+        game has been seeded. An entity without one gets an unseeded stream.
+
         Args:
             directions (list): The list of valid directions.
 
         Returns:
             int: A randomly chosen direction.
         """
-        return directions[randint(0, len(directions) - 1)]
+        if self.rng is None:
+            self.rng = RandomStream()
+        return self.rng.choice(directions)
 
     def getNewTarget(self, direction):
         """
@@ -198,18 +204,24 @@ class Entity(object):
         distances = [((self.node.position + self.directions[direction] * TILEWIDTH) - self.goal).magnitudeSquared() for direction in directions]
         return directions[distances.index(min(distances))]
 
-    def render(self, screen):
+    def render(self, screen, camera=None):
         """
         Renders the entity on the screen.
 
         Args:
             screen (pygame.Surface): The surface to draw the entity on.
+            camera (Camera, optional): The view of a maze bigger than the screen. Defaults to None.
         """
         if self.visible:
+            position = self.position
+            if camera is not None:
+                if not camera.isVisible(position, 2*TILEWIDTH):
+                    return  # Off screen
+                position = position - camera.offset
             if self.image is not None:
                 adjust = Vector2(TILEWIDTH, TILEHEIGHT) / 2
-                p = self.position - adjust
+                p = position - adjust
                 screen.blit(self.image, p.asTuple())
             else:
-                p = self.position.asInt()
+                p = position.asInt()
                 pygame.draw.circle(screen, self.color, p, self.radius)
@@ -0,0 +1,278 @@
+#reinforcement learning environment around the game engine
+
+import struct
+import numpy as np
+import pygame
+from constants import *
+from main import GameController
+from mazedata import MazeData
+from pixels import PixelObserver
+from rng import STREAMACTIONS
+import checkpoint
+
+ACTIONS = (STOP, UP, DOWN, LEFT, RIGHT)  # Action index -> Pac-Man direction
+ENVSTATE = struct.Struct("<iB")  # Steps taken and the last action, saved with a checkpoint
+
+class PacmanEnv(object):
+    def __init__(self, frameSkip=4, stickyProb=0.25, maxSteps=10000, fps=30, pixels=None,
+                 startLevel=0, continueLevels=False, ghostSchedule=None, mazes=None, players=1, dataset=None):
+        """
+        Initializes the PacmanEnv object.
+
+        The environment follows the Gym API: reset() returns (observation, info)
+        and step() returns (observation, reward, terminated, truncated, info).
+        Observations are a dict of NumPy arrays that are owned by the
+        environment and overwritten on every call, so copy them to keep them.
+
+        Args:
+            frameSkip (int, optional): Game frames simulated per step. Defaults to 4.
+            stickyProb (float, optional): Chance per frame that the previous action is repeated. Defaults to 0.25.
+            maxSteps (int, optional): Steps before an episode is truncated. Defaults to 10000.
+            fps (int, optional): Simulation rate, every frame advances 1/fps seconds. Defaults to 30.
+            pixels (dict, optional): PixelObserver keyword arguments. When given, the last frame of
+                every step is rendered offscreen and its frame stack is added as obs["pixels"]. Defaults to None.
+            startLevel (int, optional): Level every episode starts on, which also picks the maze. Defaults to 0.
+            continueLevels (bool, optional): Keep playing after a level is cleared instead of ending
+                the episode, so episodes only end when the lives run out. Defaults to False.
+            ghostSchedule (tuple, optional): Scatter/chase durations for the ghosts on every level,
+                None for the arcade tables. Defaults to None.
+            mazes (tuple, optional): Maze names, such as generated ones, played in turn instead of
+                maze1 and maze2. Defaults to None.
+            players (int, optional): Pac-Men in the maze. With more than one, step takes an action
+                per player and returns a reward per player, and the info has each player's score
+                and lives. Pellets are shared and the ghosts chase the nearest Pac-Man. Defaults to 1.
+            dataset (TrajectoryWriter, optional): Every step is written to it, with the observation
+                the action was chosen from. Every maze then has to be the same size. Defaults to None.
+
+        Raises:
+            ValueError: If a dataset is given and the mazes differ in size.
+        """
+        if dataset is not None:
+            MazeData(mazes).gridShape()  # A dataset has one grid size, so a mixed maze set fails now rather than mid run
+        self.game = GameController(headless=True, players=players)
+        self.players = players
+        self.game.ghostSchedule = ghostSchedule
+        self.game.mazes = mazes
+        self.frameSkip = frameSkip
+        self.stickyProb = stickyProb
+        self.maxSteps = maxSteps
+        self.startLevel = startLevel
+        self.continueLevels = continueLevels
+        self.dt = 1.0 / fps
+        self.numActions = len(ACTIONS)
+        self.rng = self.game.random.stream(STREAMACTIONS)
+        self.lastAction = 0  # Index of the action applied on the previous frame
+        self.lastActions = [0] * players  # The same per player
+        self.steps = 0
+        self.walls = None  # Background the wall grid was computed for
+        self.obs = None
+        self.dataset = dataset
+        self.pixels = None
+        if pixels is not None:
+            self.pixels = PixelObserver(self.game.screen, **pixels)
+        self.game.startGame()
+        self.allocate()
+
+    def allocate(self):
+        """
+        Creates the observation buffers for the current maze size.
+        """
+        shape = self.game.pellets.grid.shape
+        self.obs = {"pellets": np.zeros(shape, dtype=np.int8),  # PELLET or POWERPELLET per tile
+                    "walls": np.zeros(shape, dtype=np.int8),  # 1 where no entity can move
+                    "entities": np.zeros((self.players + 4, 4), dtype=np.float32),  # Pac-Men then the ghosts: col, row, direction, visible
+                    "ghostModes": np.zeros(4, dtype=np.int8),  # SCATTER, CHASE, FREIGHT or SPAWN per ghost
+                    "freightTimer": np.zeros(1, dtype=np.float32),  # Seconds of FREIGHT left
+                    "pelletDistance": np.zeros(shape, dtype=np.int32),  # Tile steps to the nearest pellet, -1 on walls
+                    "powerDistance": np.zeros(shape, dtype=np.int32)}  # Tile steps to the nearest power pellet, -1 once none are left
+        if self.pixels is not None:
+            self.obs["pixels"] = self.pixels.frames
+        self.walls = None
+
+    def seed(self, seed):
+        """
+        Seeds every source of randomness the episode uses.
+
+        The ghosts and the sticky actions draw from streams derived from this
+        seed, so the seed and the actions passed to step fully determine
+        every episode that follows.
+
+        Args:
+            seed (int): The seed.
+        """
+        self.game.seed(seed)
+        self.rng = self.game.random.stream(STREAMACTIONS)
+
+    def reset(self, seed=None):
+        """
+        Starts a new game.
+
+        Args:
+            seed (int, optional): Reseeds the environment when given. Defaults to None.
+
+        Returns:
+            tuple: The first observation and the info dict.
+        """
+        if seed is not None:
+            self.seed(seed)
+        self.game.pause.cancel()  # Drop the game over countdown so it cannot restart the new episode
+        self.game.restartGame(self.startLevel)
+        self.resume()
+        self.lastAction = 0
+        self.lastActions = [0] * self.players
+        self.steps = 0
+        if self.dataset is not None:
+            self.dataset.startEpisode()
+        if self.pixels is not None:
+            self.game.render()
+            self.pixels.reset()
+        return self.observe(), self.info()
+
+    def resume(self):
+        """
+        Unpauses the game when it is waiting for the player to press space.
+        """
+        game = self.game
+        if game.pause.paused and game.pause.pauseTime is None and game.pacmen.alive():
+            game.pause.paused = False
+            game.textgroup.hideText()
+            game.showEntities()
+
+    def step(self, action):
+        """
+        Applies an action for frameSkip frames.
+
+        Args:
+            action (int): Index into ACTIONS, a sequence of them with one per player when there are several.
+
+        Returns:
+            tuple: observation, reward, terminated, truncated and info.
+        """
+        game = self.game
+        score = game.score
+        scores = list(game.playerScores)
+        terminated = False
+        if self.dataset is not None:
+            self.dataset.begin(self.obs, action, self.steps)
+        for frame in range(self.frameSkip):
+            if self.players == 1:
+                if self.rng.random() >= self.stickyProb:
+                    self.lastAction = action
+                game.pacman.action = ACTIONS[self.lastAction]
+            else:
+                for i, pacman in enumerate(game.pacmen):
+                    # Every player's action sticks on its own draw, taken in player order
+                    if self.rng.random() >= self.stickyProb:
+                        self.lastActions[i] = action[i]
+                    pacman.action = ACTIONS[self.lastActions[i]]
+            self.resume()
+            game.step(self.dt)
+            terminated = game.lives <= 0 or (not self.continueLevels and game.pellets.isEmpty())
+            if terminated:
+                break
+        self.steps += 1
+        if self.pixels is not None:
+            game.render()
+            self.pixels.capture()
+        truncated = not terminated and self.steps >= self.maxSteps
+        reward = game.score - score
+        if self.players > 1:
+            reward = np.array(game.playerScores) - scores
+        if self.dataset is not None:
+            self.dataset.end(reward, terminated, truncated)
+        return self.observe(), reward, terminated, truncated, self.info()
+
+    def save(self, path):
+        """
+        Writes a checkpoint of the episode.
+
+        Args:
+            path (str): The file to write, replaced in one step.
+        """
+        extra = ENVSTATE.pack(self.steps, self.lastAction) + bytes(self.lastActions) + checkpoint.packStream(self.rng)
+        checkpoint.save(self.game, path, extra)
+
+    def load(self, path):
+        """
+        Continues an episode from a checkpoint written by save.
+
+        An environment created with the same arguments carries on exactly
+        as the saved one would have, given the same actions. This takes
+        about as long as starting a level, not as long as the steps taken.
+        With pixel observations the frame stack starts over from the
+        current frame.
+
+        Args:
+            path (str): The checkpoint file.
+
+        Returns:
+            tuple: The observation and the info dict.
+        """
+        extra = checkpoint.load(self.game, path)
+        self.steps, self.lastAction = ENVSTATE.unpack_from(extra)
+        self.lastActions = list(extra[ENVSTATE.size:ENVSTATE.size + self.players])
+        checkpoint.unpackStream(self.rng, extra, ENVSTATE.size + self.players)
+        if self.dataset is not None:
+            self.dataset.startEpisode()  # The steps that follow are numbered on, but are not the steps written before
+        if self.pixels is not None:
+            self.game.render()
+            self.pixels.reset()
+        return self.observe(), self.info()
+
+    def observe(self):
+        """
+        Writes the current game state into the observation buffers.
+
+        Returns:
+            dict: The observation buffers.
+        """
+        game = self.game
+        if self.obs["pellets"].shape != game.pellets.grid.shape:
+            self.allocate()  # The maze changed size, the old buffers no longer fit
+        obs = self.obs
+        if self.walls is not game.background_norm:
+            symbols = game.nodes.nodeSymbols + game.nodes.pathSymbols
+            obs["walls"][:] = ~np.isin(game.mazesprites.data, symbols)
+            self.walls = game.background_norm
+        np.copyto(obs["pellets"], game.pellets.grid)
+        np.copyto(obs["pelletDistance"], game.distances.pellet.distance)
+        np.copyto(obs["powerDistance"], game.distances.power.distance)
+        entities = obs["entities"]
+        for i, entity in enumerate(list(game.pacmen) + game.ghosts.ghosts):
+            entities[i, 0] = entity.position.x / TILEWIDTH
+            entities[i, 1] = entity.position.y / TILEHEIGHT
+            entities[i, 2] = entity.direction
+            entities[i, 3] = entity.visible
+        freight = 0.0
+        for i, ghost in enumerate(game.ghosts):
+            obs["ghostModes"][i] = ghost.mode.current
+            if ghost.mode.current is FREIGHT:
+                freight = game.ghosts.mainmode.freightRemaining()
+        obs["freightTimer"][0] = freight
+        return obs
+
+    def info(self):
+        """
+        Collects the episode statistics.
+
+        Returns:
+            dict: Score, lives, level, levels cleared, deaths and steps taken in this episode,
+                plus the per player scores and lives when there are several players.
+        """
+        game = self.game
+        info = {"score": game.score, "lives": game.lives, "level": game.level,
+                "levelsCleared": game.levelsCleared, "deaths": game.deaths, "steps": self.steps}
+        if self.players > 1:
+            info["playerScores"] = list(game.playerScores)
+            info["playerLives"] = list(game.playerLives)
+        return info
+
+    def render(self):
+        """
+        Draws the current frame.
+
+        Returns:
+            numpy.ndarray: A (height, width, 3) RGB copy of the frame.
+        """
+        self.game.render()
+        return pygame.surfarray.array3d(self.game.screen).swapaxes(0, 1)
@@ -18,19 +18,16 @@ class Fruit(Entity):
         self.name = FRUIT  # Set the name to FRUIT (constant from constants.py)
         self.color = GREEN  # Set the color of the fruit
         self.lifespan = 5  # Lifespan of the fruit in seconds
-        self.timer = 0  # Timer to track lifespan
         self.destroy = False  # Flag to indicate if the fruit should be destroyed
         self.points = 100 + level * 20  # Points awarded for collecting the fruit (scaled with level)
         self.setBetweenNodes(RIGHT)  # Start the fruit moving towards the right
         self.sprites = FruitSprites(self, level)  # Create fruit sprites for animation
 
-    def update(self, dt):
+    def expire(self):
         """
-        Updates the state of the fruit over time.
+        Marks the fruit for removal once its lifespan has run out.
 
-        Args:
-            dt (float): The time elapsed since the last update.
+        Scheduled by the game controller on the world timers, so the
+        lifespan only counts down while the game is running.
         """
-        self.timer += dt  # Increment the timer by the elapsed time
-        if self.timer >= self.lifespan:
-            self.destroy = True  # Set the destroy flag if the fruit's lifespan is over
+        self.destroy = True  # Set the destroy flag, checkFruitEvents removes the fruit
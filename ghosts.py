@@ -3,11 +3,11 @@ from pygame.locals import *
 from vector import Vector2
 from constants import *
 from entity import Entity
-from modes import ModeController
+from modes import MainMode, ModeController
 from sprites import GhostSprites
 
 class Ghost(Entity):
-    def __init__(self, node, pacman=None, blinky=None):
+    def __init__(self, node, pacman=None, blinky=None, mainmode=None):
         """
         Initializes a Ghost object.
 
@@ -15,15 +15,22 @@ class Ghost(Entity):
             node (Node): The starting node for the ghost.
             pacman (Entity): The Pac-Man entity the ghost interacts with.
             blinky (Ghost): The Blinky ghost instance for certain behaviors.
+            mainmode (MainMode, optional): The shared scatter/chase scheduler, which runs once
+                it is started. A ghost without one gets a private scheduler that it ticks itself.
         """
         Entity.__init__(self, node)
         self.name = GHOST  # Assigning the entity name
         self.points = 200  # Points awarded for catching this ghost
         self.goal = Vector2()  # Initial goal position for the ghost
-        self.pacman = pacman  # Reference to the Pac-Man entity
-        self.mode = ModeController(self)  # Mode controller for different ghost behaviors
+        self.pacman = pacman  # Reference to the Pac-Man entity, the one being chased when there are several
+        self.pacmen = None  # PacmanGroup to pick self.pacman from, None with a single player
+        self.assigned = None  # Pac-Man this ghost always chases while it is alive, None for the nearest one
+        self.mode = ModeController(self, mainmode)  # Mode controller for different ghost behaviors
         self.blinky = blinky  # Reference to the Blinky ghost
         self.homeNode = node  # The node where the ghost starts
+        self.scatterTable = None  # Precomputed SCATTER decisions, see setGoalTables
+        self.spawnTable = None  # Precomputed SPAWN decisions, see setGoalTables
+        self.bounds = Vector2(TILEWIDTH*NCOLS, TILEHEIGHT*NROWS)  # Far corner of the maze, for the scatter goals
 
     def update(self, dt):
         """
@@ -34,6 +41,8 @@ class Ghost(Entity):
         """
         self.sprites.update(dt)  # Update ghost sprites/animations
         self.mode.update(dt)  # Update ghost mode (scatter, chase, etc.)
+        if self.pacmen is not None:
+            self.pickTarget()  # Choose which Pac-Man to chase this frame
         if self.mode.current is SCATTER:
             self.scatter()  # Execute scatter behavior
         elif self.mode.current is CHASE:
@@ -48,12 +57,62 @@ class Ghost(Entity):
         self.points = 200  # Reset points awarded for catching the ghost
         self.directionMethod = self.goalDirection  # Reset the direction method to goalDirection
     
+    def scatterGoal(self):
+        """
+        Returns the fixed corner the ghost heads for in SCATTER mode.
+
+        Returns:
+            Vector2: The top left corner.
+        """
+        return Vector2()
+
     def scatter(self):
         """
-        Sets the ghost's goal position to empty, representing a scattered state.
+        Sets the ghost's goal position to its scatter corner.
         """
-        self.goal = Vector2()  # Set the goal position to an empty vector
+        self.goal = self.scatterGoal()  # Set the goal position to the scatter corner
+
+    def setGoalTables(self, nodes):
+        """
+        Looks up the decision tables for the ghost's two fixed goals.
+
+        Args:
+            nodes (NodeGroup): The node graph the ghost moves on.
+        """
+        self.scatterTable = nodes.getGoalTable(self.scatterGoal())
+        self.spawnTable = nodes.getGoalTable(self.spawnNode.position)
+
+    def goalDirection(self, directions):
+        """
+        Determines the direction that brings the ghost closest to its goal.
+
+        The SCATTER and SPAWN goals never move, so those decisions come
+        from precomputed tables instead of the distance calculation.
+
+        Args:
+            directions (list): A list of valid directions.
+
+        Returns:
+            int: The direction that minimizes the distance to the goal.
+        """
+        direction = None
+        if self.mode.current is SCATTER and self.scatterTable is not None:
+            direction = self.scatterTable.choose(self.node, directions)
+        elif self.mode.current is SPAWN and self.spawnTable is not None:
+            direction = self.spawnTable.choose(self.node, directions)
+        if direction is None:
+            return Entity.goalDirection(self, directions)
+        return direction
     
+    def pickTarget(self):
+        """
+        Picks the Pac-Man to chase: the assigned one while it is alive, otherwise the nearest living one.
+        """
+        if self.assigned is not None and self.assigned.alive and not self.assigned.out:
+            self.pacman = self.assigned
+        else:
+            self.pacman = self.pacmen.nearest(self.position)
+
     def chase(self):
         """
         Sets the ghost's goal position to the position of the Pac-Man entity.
@@ -103,7 +162,7 @@ class Ghost(Entity):
             self.spawn()  # Move the ghost to its spawn position
 
 class Blinky(Ghost):
-    def __init__(self, node, pacman=None, blinky=None):
+    def __init__(self, node, pacman=None, blinky=None, mainmode=None):
         """
         Initializes the Blinky ghost.
 
@@ -111,14 +170,15 @@ class Blinky(Ghost):
             node (Node): The starting node for Blinky.
             pacman (Entity): The Pac-Man entity for Blinky to interact with.
             blinky (Ghost): Reference to another Blinky ghost.
+            mainmode (MainMode, optional): The shared scatter/chase scheduler.
         """
-        Ghost.__init__(self, node, pacman, blinky)
+        Ghost.__init__(self, node, pacman, blinky, mainmode)
         self.name = BLINKY  # Name of the ghost
         self.color = RED  # Color of the ghost
         self.sprites = GhostSprites(self)  # Sprite animations for the ghost
 
 class Pinky(Ghost):
-    def __init__(self, node, pacman=None, blinky=None):
+    def __init__(self, node, pacman=None, blinky=None, mainmode=None):
         """
         Initializes the Pinky ghost.
 
@@ -126,17 +186,18 @@ class Pinky(Ghost):
             node (Node): The starting node for Pinky.
             pacman (Entity): The Pac-Man entity for Pinky to interact with.
             blinky (Ghost): Reference to another Blinky ghost.
+            mainmode (MainMode, optional): The shared scatter/chase scheduler.
         """
-        Ghost.__init__(self, node, pacman, blinky)
+        Ghost.__init__(self, node, pacman, blinky, mainmode)
         self.name = PINKY  # Name of the ghost
         self.color = PINK  # Color of the ghost
         self.sprites = GhostSprites(self)  # Sprite animations for the ghost
 
-    def scatter(self):
+    def scatterGoal(self):
         """
-        Sets Pinky's goal position for scatter behavior.
+        Returns Pinky's goal position for scatter behavior.
         """
-        self.goal = Vector2(TILEWIDTH*NCOLS, 0)  # Set goal for scatter behavior
+        return Vector2(self.bounds.x, 0)
 
     def chase(self):
         """
@@ -148,7 +209,7 @@ class Pinky(Ghost):
 
 
 class Inky(Ghost):
-    def __init__(self, node, pacman=None, blinky=None):
+    def __init__(self, node, pacman=None, blinky=None, mainmode=None):
         """
         Initializes the Inky ghost.
 
@@ -156,17 +217,28 @@ class Inky(Ghost):
             node (Node): The starting node for Inky.
             pacman (Entity): The Pac-Man entity for Inky to interact with.
             blinky (Ghost): Reference to a Blinky ghost.
+            mainmode (MainMode, optional): The shared scatter/chase scheduler.
         """
-        Ghost.__init__(self, node, pacman, blinky)
+        Ghost.__init__(self, node, pacman, blinky, mainmode)
         self.name = INKY  # Name of the ghost
         self.color = TEAL  # Color of the ghost
         self.sprites = GhostSprites(self)  # Sprite animations for the ghost
 
-    def scatter(self):
+    def scatterGoal(self):
         """
-        Sets Inky's goal position for scatter behavior.
+        Returns Inky's goal position for scatter behavior.
         """
-        self.goal = Vector2(TILEWIDTH*NCOLS, TILEHEIGHT*NROWS)  # Set goal for scatter behavior
+        return self.bounds.copy()
+
+    def pickTarget(self):
+        """
+        Picks the Pac-Man to chase. Inky's goal is worked out from Blinky's
+        position, so without an assignment it hunts whoever Blinky hunts.
+        """
+        if self.assigned is None:
+            self.pacman = self.blinky.pacman
+        else:
+            Ghost.pickTarget(self)
 
     def chase(self):
         """
@@ -178,7 +250,7 @@ class Inky(Ghost):
 
 
 class Clyde(Ghost):
-    def __init__(self, node, pacman=None, blinky=None):
+    def __init__(self, node, pacman=None, blinky=None, mainmode=None):
         """
         Initializes the Clyde ghost.
 
@@ -186,17 +258,18 @@ class Clyde(Ghost):
             node (Node): The starting node for Clyde.
             pacman (Entity): The Pac-Man entity for Clyde to interact with.
             blinky (Ghost): Reference to a Blinky ghost.
+            mainmode (MainMode, optional): The shared scatter/chase scheduler.
         """
-        Ghost.__init__(self, node, pacman, blinky)
+        Ghost.__init__(self, node, pacman, blinky, mainmode)
         self.name = CLYDE  # Name of the ghost
         self.color = ORANGE  # Color of the ghost
         self.sprites = GhostSprites(self)  # Sprite animations for the ghost
 
-    def scatter(self):
+    def scatterGoal(self):
         """
-        Sets Clyde's goal position for scatter behavior.
+        Returns Clyde's goal position for scatter behavior.
         """
-        self.goal = Vector2(0, TILEHEIGHT*NROWS)  # Set goal for scatter behavior
+        return Vector2(0, self.bounds.y)
 
     def chase(self):
         """
@@ -213,19 +286,23 @@ class Clyde(Ghost):
 
 
 class GhostGroup(object):
-    def __init__(self, node, pacman):
+    def __init__(self, node, pacman, level=0, schedule=None):
         """
         Initializes a group of ghosts.
 
         Args:
             node (Node): The starting node for the ghosts.
             pacman (Entity): The Pac-Man entity for the ghosts to interact with.
+            level (int, optional): The level number, which picks the scatter/chase schedule. Defaults to 0.
+            schedule (tuple, optional): Scatter/chase durations to use instead of the level's. Defaults to None.
         """
+        # One scheduler drives the scatter/chase and FREIGHT timing of every ghost
+        self.mainmode = MainMode(level, schedule)
         # Initialize each type of ghost and store them in a list
-        self.blinky = Blinky(node, pacman)
-        self.pinky = Pinky(node, pacman)
-        self.inky = Inky(node, pacman, self.blinky)
-        self.clyde = Clyde(node, pacman)
+        self.blinky = Blinky(node, pacman, mainmode=self.mainmode)
+        self.pinky = Pinky(node, pacman, mainmode=self.mainmode)
+        self.inky = Inky(node, pacman, self.blinky, self.mainmode)
+        self.clyde = Clyde(node, pacman, mainmode=self.mainmode)
         self.ghosts = [self.blinky, self.pinky, self.inky, self.clyde]
 
     def __iter__(self):
@@ -245,6 +322,26 @@ class GhostGroup(object):
         for ghost in self:
             ghost.update(dt)
 
+    def start(self, timers):
+        """
+        Starts the shared mode scheduler once the level is in play.
+
+        Args:
+            timers (TimerService): The game's timer service.
+        """
+        self.mainmode.start(timers)
+
+    def seed(self, source, *key):
+        """
+        Gives every ghost its own random stream.
+
+        Args:
+            source (RandomSource): The game's random source.
+            *key (int): Identifies the group, the ghost's index is appended to it.
+        """
+        for i, ghost in enumerate(self):
+            ghost.rng = source.stream(*(key + (i,)))
+
     def startFreight(self):
         """
         Initiates freight mode for all ghosts in the group.
@@ -265,6 +362,40 @@ class GhostGroup(object):
         for ghost in self:
             ghost.setSpawnNode(node)
 
+    def setBounds(self, width, height):
+        """
+        Moves the scatter corners to the corners of a maze of the given size.
+
+        Args:
+            width (int): Width of the maze in pixels.
+            height (int): Height of the maze in pixels.
+        """
+        for ghost in self:
+            ghost.bounds = Vector2(width, height)
+
+    def setTargets(self, pacmen, assigned=False):
+        """
+        Lets the ghosts chase one of several Pac-Men.
+
+        Args:
+            pacmen (PacmanGroup): The Pac-Men in the maze.
+            assigned (bool, optional): Give each ghost a Pac-Man of its own, in turn, instead of
+                every ghost chasing the nearest one. Defaults to False.
+        """
+        for i, ghost in enumerate(self):
+            ghost.pacmen = pacmen
+            ghost.assigned = pacmen.pacmen[i % len(pacmen)] if assigned else None
+
+    def setGoalTables(self, nodes):
+        """
+        Gives every ghost its SCATTER and SPAWN decision tables.
+
+        Args:
+            nodes (NodeGroup): The node graph the ghosts move on.
+        """
+        for ghost in self:
+            ghost.setGoalTables(nodes)
+
     def updatePoints(self):
         """
         Updates the points for all ghosts in the group.
@@ -305,13 +436,14 @@ class GhostGroup(object):
         for ghost in self:
             ghost.visible = True
 
-    def render(self, screen):
+    def render(self, screen, camera=None):
         """
         Renders all ghosts in the group.
 
         Args:
             screen: The pygame screen to render the ghosts on.
+            camera (Camera, optional): The view of a maze bigger than the screen.
         """
         # Render each ghost on the screen
         for ghost in self:
-            ghost.render(screen)
+            ghost.render(screen, camera)
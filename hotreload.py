@@ -0,0 +1,158 @@
+#watches the maze files and patches the running level when they are edited
+
+import os
+import time
+import numpy as np
+from constants import *
+from mazedata import reloadMazeFiles
+from level import Level
+from distancefield import walkableTiles
+
+def checkRotations(data, rotdata):
+    """
+    Checks that the rotation file has an entry for every wall tile of the maze file.
+
+    Args:
+        data (numpy.ndarray): The maze symbols.
+        rotdata (numpy.ndarray): The rotation symbols.
+
+    Raises:
+        ValueError: If the files differ in size or a wall tile has no numeric rotation,
+            which is what saving one file before the other looks like.
+    """
+    if data.shape != rotdata.shape:
+        raise ValueError("the rotation file is %dx%d, the maze %dx%d" % (rotdata.shape + data.shape))
+    missing = np.argwhere(np.char.isdigit(data) & ~np.char.isdigit(rotdata))
+    if len(missing):
+        row, col = missing[0]
+        raise ValueError("wall tile (%d, %d) has no rotation" % (col, row))
+
+
+class MazeWatcher(object):
+    def __init__(self, game, interval=0.25):
+        """
+        Initializes the MazeWatcher object.
+
+        Every interval seconds the current maze file and its rotation file
+        are checked for a new modification time. An edit is diffed against
+        the data the level was built from, and only the changed tiles are
+        patched: their nodes and the rows and columns through them, their
+        pellets and the background chunks holding them. Entities stay where they are.
+
+        Args:
+            game (GameController): The running game.
+            interval (float, optional): Seconds between checks of the files. Defaults to 0.25.
+        """
+        self.game = game
+        self.interval = interval
+        self.lastCheck = 0.0
+        self.name = None  # Maze the modification times belong to
+        self.mtimes = {}
+
+    def files(self):
+        name = self.game.mazedata.obj.name
+        return name+".txt", name+"_rotation.txt"
+
+    def watch(self):
+        # Starts over with the maze that is currently being played
+        self.name = self.game.mazedata.obj.name
+        self.mtimes = {path: os.stat(path).st_mtime for path in self.files()}
+
+    def poll(self):
+        """
+        Checks the files, at most once per interval, and reloads them when they changed.
+
+        Returns:
+            bool: True if the level was patched.
+        """
+        now = time.perf_counter()
+        if now - self.lastCheck < self.interval:
+            return False
+        self.lastCheck = now
+        if self.name != self.game.mazedata.obj.name:
+            self.watch()
+            return False
+        changed = False
+        for path in self.files():
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue  # Editors that save by renaming leave the file missing for a moment
+            if mtime != self.mtimes[path]:
+                self.mtimes[path] = mtime
+                changed = True
+        if not changed:
+            return False
+        try:
+            return self.reload()
+        except ValueError as error:
+            print("Could not reload %s: %s" % (self.name, error))  # Probably saved halfway, wait for the next save
+            return False
+
+    def reload(self):
+        """
+        Applies the edited maze files to the running level.
+
+        Returns:
+            bool: True if anything changed.
+        """
+        began = time.perf_counter()
+        game = self.game
+        mazefile, rotfile = self.files()
+        sprites = game.mazesprites
+        # Nothing is patched until both files agree, the changed tiles are only drawn at the next render
+        data, rotdata = reloadMazeFiles((mazefile, rotfile), checkRotations)
+        game.loader.discard("level")  # A prefetched level may have been built from the old files
+        game.prefetching = None
+        if data.shape != sprites.data.shape or rotdata.shape != sprites.rotdata.shape:
+            # The maze changed size, nothing lines up any more, so the level is built again
+            game.setLevel(Level(game.level, game.ghostSchedule, game.mazes, game.players))
+            print("Rebuilt %s in %.1f ms, the maze changed size" % (self.name, (time.perf_counter() - began) * 1000))
+            return True
+        cells = [tuple(cell) for cell in np.argwhere(data != sprites.data)]
+        tiles = set(cells) | set(tuple(cell) for cell in np.argwhere(rotdata != sprites.rotdata))
+        if not tiles:
+            return False
+        sprites.data = data
+        sprites.rotdata = rotdata
+        if cells:
+            self.patchGraph(data, cells)
+            game.distances.setWalkable(walkableTiles(data, game.nodes.nodeSymbols + game.nodes.pathSymbols),
+                                       game.mazedata.obj.portalPairs.values())
+            for row, col in cells:
+                game.pellets.setCell(row, col, data[row][col])
+        game.background_norm.invalidate(tiles)  # Drawn again from the new data when next rendered
+        game.background_flash.invalidate(tiles)
+        print("Reloaded %s: %d tiles in %.1f ms" % (self.name, len(tiles), (time.perf_counter() - began) * 1000))
+        return True
+
+    def patchGraph(self, data, cells):
+        # Patches the nodes, then puts back the links and access rules the maze adds on top of the file
+        game = self.game
+        nodes = game.nodes
+        maze = game.mazedata.obj
+        removed = nodes.patch(data, cells)
+        for key, direction in ((maze.homenodeconnectLeft, LEFT), (maze.homenodeconnectRight, RIGHT)):
+            if nodes.getNodeFromTiles(*key) is not None:
+                nodes.connectHomeNodes(nodes.homekey, key, direction)
+        maze.setPortalPairs(nodes)
+        nodes.denyHomeAccess(game.pacman)
+        maze.denyGhostsAccess(game.ghosts, nodes)
+        if removed:
+            entities = list(game.pacmen) + game.ghosts.ghosts
+            if game.fruit is not None:
+                entities.append(game.fruit)
+            for entity in entities:
+                self.relocate(entity, removed)
+        if game.swarm is not None:
+            game.swarm.relink(nodes, game.ghosts.blinky.spawnNode, nodes.nodesLUT[nodes.homekey])
+
+    def relocate(self, entity, removed):
+        # An entity whose node was deleted moves to the closest node that is left
+        if entity.node not in removed and entity.target not in removed:
+            return
+        nearest = min(self.game.nodes.nodesLUT.values(),
+                      key=lambda node: (node.position - entity.position).magnitudeSquared())
+        entity.node = nearest
+        entity.target = nearest
+        entity.setPosition()
@@ -0,0 +1,64 @@
+#draws score, level, lives and captured fruit into one cached surface
+
+import pygame
+from constants import *
+
+class HUD(object):
+    def __init__(self, textgroup, lifesprites):
+        """
+        Initializes the HUD object.
+
+        Args:
+            textgroup (TextGroup): Supplies the score, level and status text.
+            lifesprites (LifeSprites): Supplies one icon per remaining life.
+        """
+        self.textgroup = textgroup
+        self.lifesprites = lifesprites
+        self.fruitCaptured = []  # Fruit icons shown in the bottom right corner
+        self.surface = pygame.surface.Surface(SCREENSIZE)
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert()
+        self.surface.set_colorkey(BLACK)
+        self.area = self.surface.get_rect()  # Part of the surface that has something drawn on it
+        self.dirty = True  # Set when the surface has to be recomposed
+
+    def setFruit(self, fruitCaptured):
+        """
+        Sets the list of captured fruit icons.
+
+        Args:
+            fruitCaptured (list): The captured fruit images.
+        """
+        self.fruitCaptured = fruitCaptured
+        self.dirty = True
+
+    def compose(self):
+        """
+        Redraws every HUD element into the cached surface.
+        """
+        self.surface.fill(BLACK)
+        self.textgroup.renderStatic(self.surface)
+        for i in range(len(self.lifesprites.images)):
+            x = self.lifesprites.images[i].get_width() * i
+            y = SCREENHEIGHT - self.lifesprites.images[i].get_height()
+            self.surface.blit(self.lifesprites.images[i], (x, y))
+
+        for i in range(len(self.fruitCaptured)):
+            x = SCREENWIDTH - self.fruitCaptured[i].get_width() * (i+1)
+            y = SCREENHEIGHT - self.fruitCaptured[i].get_height()
+            self.surface.blit(self.fruitCaptured[i], (x, y))
+        self.area = self.surface.get_bounding_rect()
+        self.dirty = False
+        self.textgroup.dirty = False
+        self.lifesprites.dirty = False
+
+    def render(self, screen):
+        """
+        Blits the HUD, recomposing it first if anything on it changed.
+
+        Args:
+            screen (pygame.Surface): The surface to draw the HUD on.
+        """
+        if self.dirty or self.textgroup.dirty or self.lifesprites.dirty:
+            self.compose()
+        screen.blit(self.surface, self.area.topleft, self.area)
@@ -0,0 +1,95 @@
+#buffers keyboard input so short taps are never lost and turns happen as early as possible
+
+import time
+from collections import deque
+from pygame.locals import *
+from constants import *
+
+KEYMAP = {K_UP: UP, K_DOWN: DOWN, K_LEFT: LEFT, K_RIGHT: RIGHT}
+WASDMAP = {K_w: UP, K_s: DOWN, K_a: LEFT, K_d: RIGHT}  # The second player's keys
+
+class InputBuffer(object):
+    def __init__(self, cornering=4 * TILEWIDTH / 16, history=1000, keymap=KEYMAP):
+        """
+        Initializes the InputBuffer object.
+
+        Direction keys are taken from KEYDOWN events instead of the key state,
+        so a tap that starts and ends between two frames still counts. The
+        latest direction asked for is kept until Pac-Man can take it.
+
+        Args:
+            cornering (float, optional): Distance in pixels before a node at which Pac-Man may
+                already turn, like the arcade pre-turn. 0 disables it. Defaults to 4 pixels at 16 pixel tiles.
+            history (int, optional): Number of latency samples kept. Defaults to 1000.
+            keymap (dict, optional): Key -> direction, the keys this buffer listens to. Defaults to KEYMAP.
+        """
+        self.keymap = keymap
+        self.cornering = cornering
+        self.intent = STOP  # Direction Pac-Man should take as soon as it can
+        self.stamp = None  # When the key that set the intent was read
+        self.held = []  # Direction keys still down, most recent last
+        self.latencies = deque(maxlen=history)  # Seconds from reading a key to Pac-Man turning
+
+    def handleEvent(self, event):
+        """
+        Records a keyboard event.
+
+        Args:
+            event (pygame.event.Event): A KEYDOWN or KEYUP event, others are ignored.
+        """
+        if event.type == KEYDOWN and event.key in self.keymap:
+            direction = self.keymap[event.key]
+            if direction in self.held:
+                self.held.remove(direction)
+            self.held.append(direction)
+            self.intent = direction
+            self.stamp = time.perf_counter()
+        elif event.type == KEYUP and event.key in self.keymap:
+            if self.keymap[event.key] in self.held:
+                self.held.remove(self.keymap[event.key])
+
+    def direction(self):
+        """
+        Returns the direction Pac-Man should try to take.
+
+        Returns:
+            int: The buffered direction, STOP if there is none.
+        """
+        return self.intent
+
+    def applied(self, direction, turned):
+        """
+        Tells the buffer that Pac-Man is now moving in a direction.
+
+        The intent is used up once it is Pac-Man's direction. A key that is
+        still held keeps asking for its direction, as before.
+
+        Args:
+            direction (int): Pac-Man's direction after this frame.
+            turned (bool): Pac-Man changed direction this frame.
+        """
+        if direction != self.intent or direction is STOP:
+            return
+        if turned and self.stamp is not None:
+            self.latencies.append(time.perf_counter() - self.stamp)
+        self.stamp = None
+        self.intent = self.held[-1] if self.held else STOP
+
+    def clear(self):
+        """
+        Forgets the buffered direction, for when Pac-Man is put back at the start.
+        """
+        self.intent = self.held[-1] if self.held else STOP
+        self.stamp = None
+
+    def report(self):
+        """
+        Summarizes the measured input latency.
+
+        Returns:
+            str: Mean and worst time from reading a key to Pac-Man turning.
+        """
+        if not self.latencies:
+            return "Input latency: no turns measured"
+        return "Input latency over %d turns: %.1f ms mean, %.1f ms max" % (
+            len(self.latencies), sum(self.latencies) / len(self.latencies) * 1000, max(self.latencies) * 1000)
@@ -0,0 +1,91 @@
+#builds everything a maze needs so it can be prepared ahead of time
+
+from functools import partial
+from constants import *
+from camera import TileChunks
+from pacman import PacmanGroup
+from nodes import NodeGroup
+from pellets import PelletGroup
+from ghosts import GhostGroup
+from sprites import MazeSprites
+from mazedata import MazeData
+from distancefield import PelletDistances
+from distancefield import walkableTiles
+
+class Level(object):
+    def __init__(self, level, schedule=None, mazes=None, players=1):
+        """
+        Builds the maze, backgrounds and entities for a level.
+
+        Nothing here touches the running game, so a Level can be built on a
+        loader thread while the current level is still being played.
+
+        Args:
+            level (int): The level number to build.
+            schedule (tuple, optional): Ghost scatter/chase durations replacing the level's own. Defaults to None.
+            mazes (tuple, optional): Maze names played in turn instead of maze1 and maze2. Defaults to None.
+            players (int, optional): Number of Pac-Men. Defaults to 1.
+        """
+        self.level = level
+        self.schedule = schedule
+        self.mazes = mazes
+        self.players = players
+        self.mazedata = MazeData(mazes)
+        self.mazedata.loadMaze(level)
+        self.buildBackgrounds()
+        self.buildEntities()
+
+    def buildBackgrounds(self):
+        """
+        Loads the maze sprites and sets up the normal and flashing backgrounds.
+        """
+        name = self.mazedata.obj.name
+        self.mazesprites = MazeSprites(name+".txt", name+"_rotation.txt")
+        rows, cols = self.mazesprites.data.shape
+        self.worldsize = (cols*TILEWIDTH, rows*TILEHEIGHT)
+        # Drawn in chunks as they scroll into view, a maze the size of the screen is drawn up front
+        self.background_norm = TileChunks((rows, cols), partial(self.mazesprites.drawRegion, self.level%5))
+        self.background_flash = TileChunks((rows, cols), partial(self.mazesprites.drawRegion, 5))
+        self.background_norm.prebuild()
+        self.background_flash.prebuild()
+
+    def buildEntities(self):
+        """
+        Builds the node graph, pellets and their distance fields, Pac-Man and the ghosts, and applies the maze access rules.
+        """
+        maze = self.mazedata.obj
+        self.nodes = NodeGroup(maze.name+".txt")
+        maze.setPortalPairs(self.nodes)
+        maze.connectHomeNodes(self.nodes)
+        self.pacmen = PacmanGroup(self.nodes.getNodeFromTiles(*maze.pacmanStart), self.players)
+        self.pacman = self.pacmen.primary
+        self.pellets = PelletGroup(maze.name+".txt")
+        walkable = walkableTiles(self.mazesprites.data, self.nodes.nodeSymbols + self.nodes.pathSymbols)
+        self.distances = PelletDistances(walkable, maze.portalPairs.values(), self.pellets)
+        self.ghosts = GhostGroup(self.nodes.getStartTempNode(), self.pacman, self.level, self.schedule)
+        self.ghosts.pinky.setStartNode(self.nodes.getNodeFromTiles(*maze.addOffset(2, 3)))
+        self.ghosts.inky.setStartNode(self.nodes.getNodeFromTiles(*maze.addOffset(0, 3)))
+        self.ghosts.clyde.setStartNode(self.nodes.getNodeFromTiles(*maze.addOffset(4, 3)))
+        self.ghosts.setSpawnNode(self.nodes.getNodeFromTiles(*maze.addOffset(2, 3)))
+        self.ghosts.blinky.setStartNode(self.nodes.getNodeFromTiles(*maze.addOffset(2, 0)))
+        self.nodes.denyHomeAccess(self.pacman)
+        self.nodes.denyHomeAccessList(self.ghosts)
+        self.ghosts.inky.startNode.denyAccess(RIGHT, self.ghosts.inky)
+        self.ghosts.clyde.startNode.denyAccess(LEFT, self.ghosts.clyde)
+        maze.denyGhostsAccess(self.ghosts, self.nodes)
+        self.ghosts.setBounds(*self.worldsize)
+        self.ghosts.setGoalTables(self.nodes)
+        if self.players > 1:
+            self.pacmen.spread()
+            self.ghosts.setTargets(self.pacmen)
+
+    def start(self, timers):
+        """
+        Starts the level's timers. Called when the level goes into play
+        rather than when it is built, since it may be built ahead of time.
+
+        Args:
+            timers (TimerService): The game's timer service.
+        """
+        self.ghosts.start(timers)
+        self.pellets.start(timers)
@@ -2,51 +2,134 @@
 #2024-05-20
 #Pacman
 
+import os
+import time
+import argparse
+from functools import partial
 import pygame
 from pygame.locals import *
 from constants import *
-from pacman import Pacman
-from nodes import NodeGroup
-from pellets import PelletGroup
-from ghosts import GhostGroup
 from fruit import Fruit
 from pauser import Pause
 from text import TextGroup
+from text import preloadFonts
+from hud import HUD
 from sprites import LifeSprites
-from sprites import MazeSprites
 from mazedata import MazeData
+from level import Level
+from camera import Camera
+from startup import StartupTimer
+from startup import AssetLoader
+from timers import TimerService
+from rng import RandomSource
+from rng import STREAMGHOSTS
+from rng import STREAMSWARM
+from inputs import InputBuffer
+from inputs import WASDMAP
+from pacer import FramePacer
+from hotreload import MazeWatcher
+from mazegen import listMazes
+from swarm import GhostSwarm
+from broadphase import SpatialGrid
+from recorder import FrameRecorder
+from rewind import RewindBuffer
+from rewind import RewindView
+import checkpoint
+from checkpoint import CheckpointWriter
 
 class GameController(object):
-    def __init__(self):
-        pygame.init()
-        pygame.mixer.init()
-        self.screen = pygame.display.set_mode(SCREENSIZE, 0, 32)
+    def __init__(self, headless=False, seed=None, fps=FPS, maxSkip=4, players=1):
+        # A headless game with a seed is fully determined by the actions it is given
+        self.headless = headless  # No window, sound or background loading, for simulations
+        self.random = RandomSource(seed)
+        self.games = 0  # Games started since the last seed, part of every ghost stream key
+        self.ghostSchedule = None  # Scatter/chase durations for every level, None for the arcade tables
+        self.mazes = None  # Maze names played in turn, None for maze1 and maze2
+        self.swarmSize = 0  # Extra ghosts of the swarm mode, spread over the maze
+        self.players = players  # Pac-Men in the maze, self.pacman is the first of self.pacmen
+        self.swarm = None
+        self.startup = StartupTimer()
+        self.screen = self.startup.measure("display", self.setupDisplay)
+        self.loader = AssetLoader(self.startup)
+        if not self.headless:
+            self.loader.submit("audio", self.loadSound)
+            self.loader.submit("fonts", preloadFonts)
+        self.prefetching = None
+        self.prefetchLevel(0)
+        self.start_sound = None
         self.background = None
         self.background_norm = None
         self.background_flash = None
-        self.clock = pygame.time.Clock()
+        self.camera = Camera()  # Follows Pac-Man through mazes bigger than the screen
+        self.pacer = FramePacer(fps, maxSkip, timer=self.startup)
         self.fruit = None
-        self.pause = Pause(True)
+        self.grid = SpatialGrid()  # Ghosts and fruit by cell, so collisions only check nearby pairs
+        self.timers = TimerService()
+        self.pause = Pause(True, self.timers)
         self.level = 0
-        self.lives = 5
+        self.lives = 5 * players
         self.score = 0
-        self.textgroup = TextGroup()
-        self.lifesprites = LifeSprites(self.lives)
+        self.levelsCleared = 0
+        self.deaths = 0
+        self.playerScores = [0] * players  # Per player, self.score and self.lives are the totals over all players
+        self.playerLives = [5] * players
+        self.lifesprites = self.startup.measure("lifesprites", LifeSprites, self.lives)
+        self.textgroup = self.startup.measure("text", TextGroup, self.timers)
         self.flashBG = False
         self.flashTime = 0.2
-        self.flashTimer = 0
         self.fruitCaptured = []
+        self.hud = HUD(self.textgroup, self.lifesprites)
+        self.recorder = None
+        self.inputs = [InputBuffer(), InputBuffer(keymap=WASDMAP)]  # Keyboard players: arrows, then WASD
+        self.input = self.inputs[0]
+        self.watcher = None  # MazeWatcher in the --watch development mode
+        self.rewind = None  # RewindBuffer recording every step, None when rewinding is off
+        self.rewindView = None
+        self.playhead = None  # Tick shown while scrubbing back, None while playing
+        self.checkpointer = None  # CheckpointWriter saving the game every checkpointEvery seconds
+        self.checkpointEvery = 5.0
+        self.lastCheckpoint = 0.0
+        self.stats = False  # Print the startup, frame pacing, input latency and rewind reports, for --stats
         self.mazedata = MazeData()
-        
-       
-        self.start_sound = pygame.mixer.Sound('intro.mp3')
- 
-    
-    def restartGame(self):
-        self.lives = 5
-        self.level = 0
+
+    def setupDisplay(self):
+        if self.headless:
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+            os.environ.setdefault("SDL_NO_SIGNAL_HANDLERS", "1")  # Let SIGINT/SIGTERM stop simulation workers
+        pygame.display.init()
+        pygame.font.init()
+        if self.headless:
+            pygame.display.set_mode((1, 1), 0, 32)  # Only needed so sprites can be converted
+            screen = pygame.surface.Surface(SCREENSIZE, 0, 32).convert()  # Offscreen render target
+        else:
+            screen = pygame.display.set_mode(SCREENSIZE, 0, 32)
+        screen.fill(BLACK)
+        pygame.display.update()
+        self.startup.markFirstFrame()
+        return screen
+
+    def loadSound(self):
+        pygame.mixer.init()
+        return pygame.mixer.Sound('intro.mp3')
+
+    def playStartSound(self, sound):
+        self.start_sound = sound
+        self.start_sound.play(-1)
+
+    def seed(self, seed):
+        self.random.seed(seed)
+        self.games = 0
+
+    def restartGame(self, level=0):
+        self.games += 1
+        self.lives = 5 * self.players
+        self.playerScores = [0] * self.players
+        self.playerLives = [5] * self.players
+        self.level = level
+        self.levelsCleared = 0
+        self.deaths = 0
         self.pause.paused = True
-        self.fruit = None
+        self.removeFruit()
         self.startGame()
         self.score = 0
         self.textgroup.updateScore(self.score)
@@ -54,98 +137,196 @@ class GameController(object):
         self.textgroup.showText(READYTXT)
         self.lifesprites.resetLives(self.lives)
         self.fruitCaptured = []
+        self.hud.setFruit(self.fruitCaptured)
 
     def resetLevel(self):
+        for buffer in self.inputs:
+            buffer.clear()
         self.pause.paused = True
-        self.pacman.reset()
+        self.retirePlayers()
+        self.pacmen.reset()
         self.ghosts.reset()
-        self.fruit = None
+        if self.swarm is not None:
+            self.swarm.reset()
+        self.removeFruit()
         self.textgroup.showText(READYTXT)
 
     def nextLevel(self):
         self.showEntities()
         self.level += 1
+        self.levelsCleared += 1
         self.pause.paused = True
         self.startGame()
         self.textgroup.updateLevel(self.level)
 
-    def setBackground(self):
-        self.background_norm = pygame.surface.Surface(SCREENSIZE).convert()
-        self.background_norm.fill(BLACK)
-        self.background_flash = pygame.surface.Surface(SCREENSIZE).convert()
-        self.background_flash.fill(BLACK)
-        self.background_norm = self.mazesprites.constructBackground(self.background_norm, self.level%5)
-        self.background_flash = self.mazesprites.constructBackground(self.background_flash, 5)
+    def prefetchLevel(self, level):
+        if not self.headless and self.prefetching != level:
+            self.prefetching = level
+            self.loader.submit("level", Level, level, self.ghostSchedule, self.mazes, self.players)
+
+    def setLevel(self, level):
+        self.mazedata = level.mazedata
+        self.mazesprites = level.mazesprites
+        self.background_norm = level.background_norm
+        self.background_flash = level.background_flash
         self.flashBG = False
         self.background = self.background_norm
+        self.camera.setWorld(level.worldsize)
+        self.nodes = level.nodes
+        self.pacmen = level.pacmen
+        self.pacman = level.pacman
+        self.pellets = level.pellets
+        self.distances = level.distances
+        self.ghosts = level.ghosts
+        self.removeFruit()  # Its node and its expiry timer belong to the previous level
+        self.grid = SpatialGrid()
+        for ghost in self.ghosts:
+            self.grid.add(ghost, GHOST)
+        self.retirePlayers()  # Players out of lives stay out on the next levels too
+        if not self.headless:
+            for pacman, buffer in zip(self.pacmen, self.inputs):
+                pacman.input = buffer  # Agents drive a headless Pac-Man through pacman.action
+                buffer.clear()
+        self.timers.cancelGroup(WORLDTIMERS)  # Mode, FREIGHT and fruit timers of the previous level
+        self.timers.cancelGroup(LEVELTIMERS)
+        level.start(self.timers)
+        self.ghosts.seed(self.random, STREAMGHOSTS, self.games, self.level)
+        self.swarm = None
+        if self.swarmSize:
+            self.swarm = GhostSwarm(self.nodes, self.pacman, self.swarmSize, self.ghosts.mainmode,
+                                    self.ghosts.blinky.spawnNode, self.nodes.nodesLUT[self.nodes.homekey],
+                                    level.worldsize, self.random.stream(STREAMSWARM, self.games, self.level))
+            if self.players > 1:
+                self.swarm.setTargets(self.pacmen)
+
+    def retirePlayers(self):
+        for pacman in self.pacmen:
+            if self.playerLives[pacman.index] <= 0:
+                self.pacmen.retire(pacman)
 
     def startGame(self):
-        self.start_sound.play(-1)  # Play start sound
-        self.mazedata.loadMaze(self.level)
-        self.mazesprites = MazeSprites(self.mazedata.obj.name+".txt", self.mazedata.obj.name+"_rotation.txt")
-        self.setBackground()
-        self.nodes = NodeGroup(self.mazedata.obj.name+".txt")
-        self.mazedata.obj.setPortalPairs(self.nodes)
-        self.mazedata.obj.connectHomeNodes(self.nodes)
-        self.pacman = Pacman(self.nodes.getNodeFromTiles(*self.mazedata.obj.pacmanStart))
-        self.pellets = PelletGroup(self.mazedata.obj.name+".txt")
-        self.ghosts = GhostGroup(self.nodes.getStartTempNode(), self.pacman)
-        self.ghosts.pinky.setStartNode(self.nodes.getNodeFromTiles(*self.mazedata.obj.addOffset(2, 3)))
-        self.ghosts.inky.setStartNode(self.nodes.getNodeFromTiles(*self.mazedata.obj.addOffset(0, 3)))
-        self.ghosts.clyde.setStartNode(self.nodes.getNodeFromTiles(*self.mazedata.obj.addOffset(4, 3)))
-        self.ghosts.setSpawnNode(self.nodes.getNodeFromTiles(*self.mazedata.obj.addOffset(2, 3)))
-        self.ghosts.blinky.setStartNode(self.nodes.getNodeFromTiles(*self.mazedata.obj.addOffset(2, 0)))
-        self.nodes.denyHomeAccess(self.pacman)
-        self.nodes.denyHomeAccessList(self.ghosts)
-        self.ghosts.inky.startNode.denyAccess(RIGHT, self.ghosts.inky)
-        self.ghosts.clyde.startNode.denyAccess(LEFT, self.ghosts.clyde)
-        self.mazedata.obj.denyGhostsAccess(self.ghosts, self.nodes)
+        self.loader.whenReady("audio", self.playStartSound)  # Play start sound once it is decoded
+        level = self.loader.take("level")
+        self.prefetching = None
+        if (level is None or level.level != self.level or level.schedule != self.ghostSchedule
+                or level.mazes != self.mazes or level.players != self.players):
+            level = self.startup.measure("level", Level, self.level, self.ghostSchedule, self.mazes, self.players)
+        self.setLevel(level)
 
     def update(self):
-        dt = self.clock.tick(30) / 1000.0
-        self.textgroup.update(dt)
-        self.pellets.update(dt)
+        steps = self.pacer.beginFrame()
+        if self.watcher is not None:
+            self.watcher.poll()
+        self.checkEvents()  # Before the step, so keys read this frame move Pac-Man this frame
+        for i in range(steps):
+            if self.playhead is None:
+                self.step(self.pacer.dt)
+            else:
+                self.playhead = max(self.playhead - 2, self.rewind.first())  # Back at twice the speed
+        if self.checkpointer is not None and self.playhead is None:
+            now = time.perf_counter()
+            if now - self.lastCheckpoint >= self.checkpointEvery:
+                self.lastCheckpoint = now
+                self.checkpointer.submit(checkpoint.encode(self))
+        if self.pacer.shouldRender():
+            self.pacer.render(self.render)
+
+    def step(self, dt):
         if not self.pause.paused:
+            playing = self.pacmen.alive()  # Taken once, a Pac-Man that dies this step still finishes it
             self.ghosts.update(dt)
-            if self.fruit is not None:
-                self.fruit.update(dt)
-            self.checkPelletEvents()
-            self.checkGhostEvents()
-            self.checkFruitEvents()
-
-        if self.pacman.alive:
-            if not self.pause.paused:
-                self.pacman.update(dt)
+            self.grid.refresh()
+            if self.swarm is not None:
+                self.swarm.update(dt)
+            self.checkPelletEvents(playing)
+            self.checkGhostEvents(playing)
+            if self.swarm is not None:
+                self.checkSwarmEvents(playing)
+            self.checkFruitEvents(playing)
+
+        self.pacmen.update(dt, self.pause.paused)
+
+        self.timers.update(dt)  # Fires whatever became due: modes, FREIGHT, fruit, popups, flashing, pauses
+        if self.rewind is not None:
+            self.rewind.record(self)
+
+    def flashBackground(self):
+        if self.background == self.background_norm:
+            self.background = self.background_flash
         else:
-            self.pacman.update(dt)
-           
-
-        if self.flashBG:
-            self.flashTimer += dt
-            if self.flashTimer >= self.flashTime:
-                self.flashTimer = 0
-                if self.background == self.background_norm:
-                    self.background = self.background_flash
-                else:
-                    self.background = self.background_norm
-
-        afterPauseMethod = self.pause.update(dt)
-        if afterPauseMethod is not None:
-            afterPauseMethod()
-        self.checkEvents()
-        self.render()
-
-    def updateScore(self, points):
+            self.background = self.background_norm
+
+    def updateScore(self, points, pacman=None):
         self.score += points
+        if pacman is not None:
+            self.playerScores[pacman.index] += points
         self.textgroup.updateScore(self.score)
 
+    def startRecording(self, path, fmt="png"):
+        self.recorder = FrameRecorder(path, self.screen, fmt, fps=self.pacer.fps)
+
+    def stopRecording(self):
+        print(self.recorder.stop())
+        self.recorder = None
+
+    def startRewind(self, capacity):
+        self.rewind = RewindBuffer(capacity)
+        self.rewindView = RewindView()
+
+    def saveCheckpoint(self, path):
+        checkpoint.save(self, path)
+
+    def loadCheckpoint(self, path):
+        checkpoint.load(self, path)
+
+    def startCheckpoints(self, path, every=5.0):
+        # Resumes from path when it exists, then keeps saving to it
+        if os.path.exists(path):
+            self.loadCheckpoint(path)
+        self.checkpointer = CheckpointWriter(path)
+        self.checkpointEvery = every
+        self.lastCheckpoint = time.perf_counter()
+
+    def scrub(self, back):
+        # Holding Backspace shows the game going backwards, letting go returns to the live game
+        if back and self.rewind is not None and len(self.rewind) > 0:
+            self.playhead = self.rewind.last()
+        elif not back and self.playhead is not None:
+            self.playhead = None
+            self.textgroup.updateScore(self.score)
+
     def checkEvents(self):
         for event in pygame.event.get():
             if event.type == QUIT:
+                if self.recorder is not None:
+                    self.stopRecording()
+                if self.checkpointer is not None:
+                    self.checkpointer.submit(checkpoint.encode(self))
+                    self.checkpointer.flush()
+                if self.stats:
+                    print(self.input.report())
+                    if self.rewind is not None:
+                        print(self.rewind.report())
+                    print(self.pacer.report())
+                    print(self.startup.report())
                 exit()
+            elif event.type == KEYUP:
+                for buffer in self.inputs:
+                    buffer.handleEvent(event)
+                if event.key == K_BACKSPACE:
+                    self.scrub(False)
             elif event.type == KEYDOWN:
-                if event.key == K_SPACE:
-                    if self.pacman.alive:
+                for buffer in self.inputs:
+                    buffer.handleEvent(event)
+                if event.key == K_BACKSPACE:
+                    self.scrub(True)
+                elif event.key == K_r:
+                    if self.recorder is None:
+                        self.startRecording(os.path.join("recordings", time.strftime("%Y%m%d-%H%M%S")))
+                    else:
+                        self.stopRecording()
+                elif event.key == K_SPACE:
+                    if self.pacmen.alive():
                         self.pause.setPause(playerPaused=True)
                         if not self.pause.paused:
                             self.textgroup.hideText()
@@ -154,37 +335,82 @@ class GameController(object):
                             self.textgroup.showText(PAUSETXT)
                             self.hideEntities()
 
-    def checkGhostEvents(self):
-        for ghost in self.ghosts:
-            if self.pacman.collideGhost(ghost):
+    def checkGhostEvents(self, pacmen=None):
+        if pacmen is None:
+            pacmen = self.pacmen.alive()
+        for pacman, ghost in self.grid.pairs(pacmen, GHOST):
+            if pacman.collideGhost(ghost):
                 if ghost.mode.current is FREIGHT:
-                    self.pacman.visible = False
+                    pacman.visible = False
                     ghost.visible = False
-                    self.updateScore(ghost.points)
+                    self.updateScore(ghost.points, pacman)
                     self.textgroup.addText(str(ghost.points), WHITE, ghost.position.x, ghost.position.y, 8, time=1)
                     self.ghosts.updatePoints()
                     self.pause.setPause(pauseTime=1, func=self.showEntities)
                     ghost.startSpawn()
                     self.nodes.allowHomeAccess(ghost)
                 elif ghost.mode.current is not SPAWN:
-                     if self.pacman.alive:
-                         self.lives -=  1
-                         self.lifesprites.removeImage()
-                         self.pacman.die()
-                         self.ghosts.hide()
-                         if self.lives <= 0:
-                             self.textgroup.showText(GAMEOVERTXT)
-                             self.pause.setPause(pauseTime=3, func=self.restartGame)
-                         else:
-                             self.pause.setPause(pauseTime=3, func=self.resetLevel)
-
-    def checkFruitEvents(self):
+                    self.killPacman(pacman)
+
+    def checkSwarmEvents(self, pacmen=None):
+        # Swarm ghosts are eaten without the pause a regular ghost gets, there may be dozens at once
+        if pacmen is None:
+            pacmen = self.pacmen.alive()
+        for pacman in pacmen:
+            hits = self.swarm.collide(pacman)
+            if len(hits) == 0:
+                continue
+            modes = self.swarm.mode[hits]
+            for i in hits[modes == FREIGHT]:
+                self.updateScore(self.swarm.points, pacman)
+                self.textgroup.addText(str(self.swarm.points), WHITE, self.swarm.position[i, 0], self.swarm.position[i, 1], 8, time=1)
+                self.swarm.points *= 2
+            self.swarm.startSpawn(hits)
+            if ((modes != FREIGHT) & (modes != SPAWN)).any():
+                self.killPacman(pacman)
+
+    def killPacman(self, pacman):
+        if pacman.alive:
+            self.lives -=  1
+            self.deaths += 1
+            self.playerLives[pacman.index] -= 1
+            self.lifesprites.removeImage()
+            pacman.die()
+            if self.pacmen.alive():
+                # The others play on, this one comes back by itself after its death animation
+                self.timers.schedule(3, partial(self.respawn, pacman))
+                return
+            self.ghosts.hide()
+            if self.swarm is not None:
+                self.swarm.hide()
+            if self.lives <= 0:
+                self.prefetchLevel(0)
+                self.textgroup.showText(GAMEOVERTXT)
+                self.pause.setPause(pauseTime=3, func=self.restartGame)
+            else:
+                self.pause.setPause(pauseTime=3, func=self.resetLevel)
+
+    def respawn(self, pacman):
+        if pacman.alive:
+            return  # The whole level was reset in the meantime
+        if self.playerLives[pacman.index] > 0:
+            pacman.reset()
+            if pacman.input is not None:
+                pacman.input.clear()
+        else:
+            self.pacmen.retire(pacman)
+
+    def checkFruitEvents(self, pacmen=None):
+        if pacmen is None:
+            pacmen = self.pacmen.alive()
         if self.pellets.numEaten == 50 or self.pellets.numEaten == 140:
             if self.fruit is None:
-                self.fruit = Fruit(self.nodes.getNodeFromTiles(9, 20))
-        if self.fruit is not None:
-            if self.pacman.collideCheck(self.fruit):
-                self.updateScore(self.fruit.points)
+                self.fruit = Fruit(self.nodes.getNodeFromTiles(*self.mazedata.obj.fruitStart))
+                self.timers.schedule(self.fruit.lifespan, self.fruit.expire)
+                self.grid.add(self.fruit, FRUIT)
+        for pacman, candidate in self.grid.pairs(pacmen, FRUIT):
+            if self.fruit is candidate and pacman.collideCheck(candidate):
+                self.updateScore(self.fruit.points, pacman)
                 self.textgroup.addText(str(self.fruit.points), WHITE, self.fruit.position.x, self.fruit.position.y, 8, time=1)
                 fruitCaptured = False
                 for fruit in self.fruitCaptured:
@@ -193,57 +419,119 @@ class GameController(object):
                         break
                 if not fruitCaptured:
                     self.fruitCaptured.append(self.fruit.image)
-                self.fruit = None
-            elif self.fruit.destroy:
-                self.fruit = None
-
-    def checkPelletEvents(self):
-        pellet = self.pacman.eatPellets(self.pellets.pelletList)
-        if pellet:
-            self.pellets.numEaten += 1
-            self.updateScore(pellet.points)
-            if self.pellets.numEaten == 30:
-                self.ghosts.inky.startNode.allowAccess(RIGHT, self.ghosts.inky)
-            if self.pellets.numEaten == 70:
-                self.ghosts.clyde.startNode.allowAccess(LEFT, self.ghosts.clyde)
-            self.pellets.pelletList.remove(pellet)
-            if pellet.name == POWERPELLET:
-               self.ghosts.startFreight()
-            if self.pellets.isEmpty():
-                self.flashBG = True
-                self.hideEntities()
-                self.pause.setPause(pauseTime=3, func=self.nextLevel)
+                    self.hud.setFruit(self.fruitCaptured)
+                self.removeFruit()
+        if self.fruit is not None and self.fruit.destroy:
+            self.removeFruit()
+
+    def removeFruit(self):
+        if self.fruit is not None:
+            self.grid.remove(self.fruit)
+            self.fruit = None
+
+    def checkPelletEvents(self, pacmen=None):
+        if pacmen is None:
+            pacmen = self.pacmen.alive()
+        claims = {}  # Pellet -> Pac-Men touching it, in player order
+        for pacman in pacmen:
+            pellet = pacman.eatPellets(self.pellets.pelletsNear(pacman.position))
+            if pellet:
+                claims.setdefault(pellet, []).append(pacman)
+        for pellet, claimants in claims.items():
+            # Several Pac-Men on one pellet: the closest eats it, the lower player number on a tie
+            winner = min(claimants, key=lambda p: ((p.position - pellet.position).magnitudeSquared(), p.index))
+            self.eatPellet(winner, pellet)
+
+    def eatPellet(self, pacman, pellet):
+        self.pellets.numEaten += 1
+        self.updateScore(pellet.points, pacman)
+        if self.pellets.numEaten == 30:
+            self.ghosts.inky.startNode.allowAccess(RIGHT, self.ghosts.inky)
+        if self.pellets.numEaten == 70:
+            self.ghosts.clyde.startNode.allowAccess(LEFT, self.ghosts.clyde)
+        self.pellets.removePellet(pellet)
+        if pellet.name == POWERPELLET:
+            self.ghosts.startFreight()
+            if self.swarm is not None:
+                self.swarm.startFreight()
+        if len(self.pellets.pelletList) <= PREFETCHPELLETS:
+            self.prefetchLevel(self.level + 1)
+        if self.pellets.isEmpty():
+            self.flashBG = True
+            self.timers.schedule(self.flashTime, self.flashBackground, LEVELTIMERS, repeat=True)
+            self.hideEntities()
+            self.pause.setPause(pauseTime=3, func=self.nextLevel)
 
     def showEntities(self):
-        self.pacman.visible = True
+        self.pacmen.show()
         self.ghosts.show()
+        if self.swarm is not None:
+            self.swarm.show()
 
     def hideEntities(self):
-        self.pacman.visible = False
+        self.pacmen.hide()
         self.ghosts.hide()
+        if self.swarm is not None:
+            self.swarm.hide()
 
     def render(self):
-        self.screen.blit(self.background, (0, 0))
-        self.pellets.render(self.screen)
+        if self.playhead is not None:
+            self.renderRewind()
+            return
+        self.camera.follow(self.pacman.position)
+        if not self.camera.covers():
+            self.screen.fill(BLACK)  # The maze leaves part of the screen uncovered
+        self.background.render(self.screen, self.camera)
+        self.pellets.render(self.screen, self.camera)
         if self.fruit is not None:
-            self.fruit.render(self.screen)
-        self.pacman.render(self.screen)
-        self.ghosts.render(self.screen)
-        self.textgroup.render(self.screen)
-        for i in range(len(self.lifesprites.images)):
-            x = self.lifesprites.images[i].get_width() * i
-            y = SCREENHEIGHT - self.lifesprites.images[i].get_height()
-            self.screen.blit(self.lifesprites.images[i], (x, y))
-
-        for i in range(len(self.fruitCaptured)):
-            x = SCREENWIDTH - self.fruitCaptured[i].get_width() * (i+1)
-            y = SCREENHEIGHT - self.fruitCaptured[i].get_height()
-            self.screen.blit(self.fruitCaptured[i], (x, y))
-        pygame.display.update()
+            self.fruit.render(self.screen, self.camera)
+        self.pacmen.render(self.screen, self.camera)
+        self.ghosts.render(self.screen, self.camera)
+        if self.swarm is not None:
+            self.swarm.render(self.screen, self.camera)
+        self.hud.render(self.screen)
+        self.textgroup.renderPopups(self.screen, self.camera)
+        if self.recorder is not None:
+            self.recorder.submit(self.screen, self.pacer.steps)
+        if not self.headless:
+            pygame.display.update()
+
 
+    def renderRewind(self):
+        snapshot = self.rewind.seek(self.playhead)
+        self.rewindView.render(self.screen, snapshot, self.camera)
+        self.textgroup.updateScore(snapshot.score)
+        self.hud.render(self.screen)
+        if self.recorder is not None:
+            self.recorder.submit(self.screen, self.pacer.steps)
+        if not self.headless:
+            pygame.display.update()
 
 if __name__ == "__main__":
-    game = GameController()
-    game.startGame()
+    parser = argparse.ArgumentParser(description="Pacman")
+    parser.add_argument("--fps", type=int, default=FPS, help="simulation and render rate")
+    parser.add_argument("--max-skip", type=int, default=4, help="most renders skipped in a row when frames run late")
+    parser.add_argument("--watch", action="store_true", help="reload the maze files while playing when they are saved")
+    parser.add_argument("--mazes", default=None, help="directory of generated mazes to play instead of maze1 and maze2")
+    parser.add_argument("--swarm", type=int, default=0, help="add this many ghosts spread over the maze")
+    parser.add_argument("--rewind", type=float, default=0, help="megabytes of history kept for rewinding, hold Backspace to scrub back")
+    parser.add_argument("--checkpoint", default=None, help="resume from this file if it exists and save the game to it every few seconds")
+    parser.add_argument("--players", type=int, default=1, choices=(1, 2), help="Pac-Men in the maze, the second one plays with WASD")
+    parser.add_argument("--stats", action="store_true", help="print startup, frame pacing, input latency and rewind reports")
+    args = parser.parse_args()
+    game = GameController(fps=args.fps, maxSkip=args.max_skip, players=args.players)
+    game.stats = args.stats
+    game.swarmSize = args.swarm
+    if args.rewind > 0:
+        game.startRewind(int(args.rewind * 1024 * 1024))
+    if args.mazes is not None:
+        game.mazes = tuple(listMazes(args.mazes))
+    if args.watch:
+        game.watcher = MazeWatcher(game)
+    game.startup.measure("startGame", game.startGame)
+    if args.checkpoint is not None:
+        game.startCheckpoints(args.checkpoint)
+    if game.stats:
+        print(game.startup.report())
     while True:
         game.update()
\ No newline at end of file
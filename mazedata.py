@@ -1,5 +1,64 @@
+import json
+import threading
+from functools import partial
+import numpy as np
 from constants import *
 
+mazeCache = {}
+mazeLock = threading.Lock()
+
+def loadMazeFile(textfile):
+    # Each maze text file is parsed once per process and shared read-only
+    with mazeLock:
+        if textfile not in mazeCache:
+            data = np.loadtxt(textfile, dtype='<U1')
+            data.setflags(write=False)
+            mazeCache[textfile] = data
+        return mazeCache[textfile]
+
+def reloadMazeFiles(textfiles, check=None):
+    """
+    Parses maze files again after they were edited and replaces the shared copies.
+
+    Args:
+        textfiles (list): The files, such as a maze file and its rotation file.
+        check (callable, optional): Called with the parsed arrays, it raises to keep the old copies,
+            so the cache never holds one file of a half saved pair. Defaults to None.
+
+    Returns:
+        list: The parsed arrays, in the order of textfiles.
+    """
+    parsed = []
+    for textfile in textfiles:
+        data = np.loadtxt(textfile, dtype='<U1')
+        data.setflags(write=False)
+        parsed.append(data)
+    if check is not None:
+        check(*parsed)
+    with mazeLock:
+        for textfile, data in zip(textfiles, parsed):
+            mazeCache[textfile] = data
+    return parsed
+
+def loadMazeMeta(metafile):
+    # Generated mazes describe their MazeBase settings in a JSON file next to the maze file
+    with mazeLock:
+        if metafile not in mazeCache:
+            with open(metafile) as source:
+                mazeCache[metafile] = json.load(source)
+        return mazeCache[metafile]
+
+def registerMaze(name, data, rotdata, meta):
+    # Puts a maze built in memory into the cache, so it is played without ever being written to disk
+    for array in (data, rotdata):
+        array.setflags(write=False)
+    with mazeLock:
+        mazeCache[name+".txt"] = data
+        mazeCache[name+"_rotation.txt"] = rotdata
+        mazeCache[name+".json"] = meta
+
+DIRECTIONS = {"UP":UP, "DOWN":DOWN, "LEFT":LEFT, "RIGHT":RIGHT}
+
 class MazeBase(object):
     def __init__(self):
         self.portalPairs = {}
@@ -55,10 +114,55 @@ class Maze2(MazeBase):
                               RIGHT:(self.addOffset(2, 3),)}
 
 
+class MazeFile(MazeBase):
+    def __init__(self, name):
+        MazeBase.__init__(self)
+        meta = loadMazeMeta(name+".json")
+        self.name = name
+        self.portalPairs = {i:(tuple(a), tuple(b)) for i, (a, b) in enumerate(meta["portalPairs"])}
+        self.homeoffset = tuple(meta["homeoffset"])
+        self.homenodeconnectLeft = tuple(meta["homenodeconnectLeft"])
+        self.homenodeconnectRight = tuple(meta["homenodeconnectRight"])
+        self.pacmanStart = tuple(meta["pacmanStart"])
+        self.fruitStart = tuple(meta["fruitStart"])
+        for direction, cells in meta["ghostNodeDeny"].items():
+            self.ghostNodeDeny[DIRECTIONS[direction]] = tuple(tuple(cell) for cell in cells)
+
+
 class MazeData(object):
-    def __init__(self):
+    def __init__(self, mazes=None):
+        # mazes names maze files to play in turn, such as generated ones, instead of maze1 and maze2
         self.obj = None
-        self.mazedict = {0:Maze1, 1:Maze2}
+        if mazes is None:
+            self.mazedict = {0:Maze1, 1:Maze2}
+        else:
+            self.mazedict = {i:partial(MazeFile, name) for i, name in enumerate(mazes)}
 
     def loadMaze(self, level):
-        self.obj = self.mazedict[level%len(self.mazedict)]()
\ No newline at end of file
+        self.obj = self.mazedict[level%len(self.mazedict)]()
+
+    def gridShape(self):
+        """
+        Returns the size every maze of the set shares, for consumers that lay out one buffer for all of them.
+
+        Returns:
+            tuple: Tile rows and columns.
+
+        Raises:
+            ValueError: If the mazes differ in size.
+        """
+        shapes = {}
+        for maze in self.mazedict.values():
+            name = maze().name
+            shapes.setdefault(loadMazeFile(name+".txt").shape, name)
+        if len(shapes) > 1:
+            raise ValueError("the maze set mixes sizes: " + ", ".join(
+                "%s is %dx%d" % ((name,) + shape) for shape, name in shapes.items()))
+        return next(iter(shapes))
+
+    def preload(self):
+        # Parses every maze and rotation file up front so later levels never touch the disk
+        for maze in self.mazedict.values():
+            name = maze().name
+            loadMazeFile(name+".txt")
+            loadMazeFile(name+"_rotation.txt")
\ No newline at end of file
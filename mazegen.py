@@ -0,0 +1,394 @@
+#generates random mazes in the maze file format, with their metadata, in a process pool
+
+import os
+import json
+import time
+import argparse
+import multiprocessing
+from functools import partial
+import numpy as np
+from constants import *
+from rng import RandomSource
+from rng import STREAMMAZE
+
+SPACING = 3  # Tiles between neighbouring junctions, leaving walls two tiles thick
+TOPROWS = 3  # Rows above the maze kept free for the score
+BOTTOMROWS = 2  # Rows below the maze kept free for the lives and fruit
+
+# The walls of the ghost house, the same as in maze1, drawn inside a 10x7 ring of path
+HOUSE = (("4", "5", "5", "=", "=", "5", "5", "4"),
+         ("5", "X", "X", "X", "X", "X", "X", "5"),
+         ("5", "X", "X", "X", "X", "X", "X", "5"),
+         ("5", "X", "X", "X", "X", "X", "X", "5"),
+         ("4", "5", "5", "5", "5", "5", "5", "4"))
+HOUSEROTATION = (("0", "0", "0", ".", ".", "0", "0", "3"),
+                 ("1", ".", ".", ".", ".", ".", ".", "3"),
+                 ("1", ".", ".", ".", ".", ".", ".", "3"),
+                 ("1", ".", ".", ".", ".", ".", ".", "3"),
+                 ("1", "2", "2", "2", "2", "2", "2", "2"))
+
+class MazeGenerator(object):
+    def __init__(self, cols=8, rows=10, loops=0.1, symmetric=True, portals=True):
+        """
+        Initializes the MazeGenerator object.
+
+        A maze is a lattice of junctions SPACING tiles apart. A random
+        spanning tree over the lattice keeps every corridor reachable, dead
+        ends are then joined to a neighbour and a share of the remaining
+        corridors is opened to make loops. The ghost house sits in the
+        middle with Pac-Man's start below it. Wall tiles are picked from
+        the shape of the walls around them, so generated mazes use the same
+        sprites and rotations as the hand made ones.
+
+        Args:
+            cols (int, optional): Junctions per row, even for a symmetric maze. Defaults to 8.
+            rows (int, optional): Junctions per column. Defaults to 10.
+            loops (float, optional): Chance that a corridor left out of the tree is opened anyway. Defaults to 0.1.
+            symmetric (bool, optional): Mirror the left half onto the right half. Defaults to True.
+            portals (bool, optional): Add a tunnel between the left and right edges. Defaults to True.
+        """
+        if cols < 6 or rows < 5:
+            raise ValueError("A maze needs at least 6x5 junctions to fit the ghost house")
+        if symmetric and cols % 2:
+            raise ValueError("A symmetric maze needs an even number of junction columns")
+        self.cols = cols
+        self.rows = rows
+        self.loops = loops
+        self.symmetric = symmetric
+        self.portals = portals
+        self.houseCol = (cols - 4) // 2  # Junction at the top left corner of the ring around the house
+        self.houseRow = max(1, (rows - 3) // 2 - 1)
+        self.shape = (TOPROWS + SPACING * (rows - 1) + 3 + BOTTOMROWS, SPACING * (cols - 1) + 3)
+
+    def tile(self, point):
+        # Maze tile (row, col) of a junction
+        return TOPROWS + 1 + point[0] * SPACING, 1 + point[1] * SPACING
+
+    def mirror(self, edge):
+        (r1, c1), (r2, c2) = edge
+        a, b = (r1, self.cols - 1 - c1), (r2, self.cols - 1 - c2)
+        return (a, b) if a <= b else (b, a)
+
+    def lattice(self):
+        # Junctions and corridors before any are chosen, without the inside of the ghost house
+        hr, hc = self.houseRow, self.houseCol
+        inside = {(hr + 1, hc + 1), (hr + 1, hc + 2)}
+        points = [(r, c) for r in range(self.rows) for c in range(self.cols) if (r, c) not in inside]
+        edges = []
+        for r, c in points:
+            for other in ((r, c + 1), (r + 1, c)):
+                if other[0] < self.rows and other[1] < self.cols and other not in inside:
+                    edges.append(((r, c), other))
+        # The ring of corridors around the house is always open
+        ring = set()
+        for c in range(hc, hc + 3):
+            ring.add(((hr, c), (hr, c + 1)))
+            ring.add(((hr + 2, c), (hr + 2, c + 1)))
+        for r in range(hr, hr + 2):
+            ring.add(((r, hc), (r + 1, hc)))
+            ring.add(((r, hc + 3), (r + 1, hc + 3)))
+        return points, edges, ring
+
+    def carve(self, rng):
+        """
+        Chooses which corridors are open.
+
+        Args:
+            rng (RandomStream): Source of every random choice.
+
+        Returns:
+            set: Open corridors as ((row, col), (row, col)) junction pairs.
+        """
+        points, edges, ring = self.lattice()
+        hr, hc = self.houseRow, self.houseCol
+        start = (hr + 3, hc + 2)
+        forced = set(ring) | {((start[0], hc + 1), start), (start, (start[0], hc + 3))}
+        parent = {point: point for point in points}
+
+        def find(point):
+            while parent[point] != point:
+                parent[point] = parent[parent[point]]
+                point = parent[point]
+            return point
+
+        def union(edge):
+            a, b = find(edge[0]), find(edge[1])
+            if a == b:
+                return False
+            parent[a] = b
+            return True
+
+        def group(edge):
+            # An edge and its mirror image are always opened together
+            return {edge, self.mirror(edge)} if self.symmetric else {edge}
+
+        open_ = set()
+        for edge in forced:
+            for member in group(edge):
+                union(member)
+                open_.add(member)
+        keys = [rng.random() for edge in edges]
+        order = [edges[i] for i in sorted(range(len(edges)), key=keys.__getitem__)]
+        closed = []
+        for edge in order:
+            if edge in open_:
+                continue
+            if self.symmetric and edge[0][1] >= self.cols // 2:
+                continue  # The left half decides for the right half
+            if union(edge):
+                for member in group(edge):
+                    union(member)
+                    open_.add(member)
+            else:
+                closed.append(edge)
+        for edge in closed:
+            if edge not in open_ and rng.random() < self.loops:
+                open_.update(group(edge))
+        # Pac-Man mazes have no dead ends, every junction left with one corridor gets a second
+        degree = dict.fromkeys(points, 0)
+        for a, b in open_:
+            degree[a] += 1
+            degree[b] += 1
+        neighbours = {point: [] for point in points}
+        for edge in edges:
+            neighbours[edge[0]].append(edge)
+            neighbours[edge[1]].append(edge)
+        for point in points:
+            if degree[point] == 1:
+                options = [edge for edge in neighbours[point] if edge not in open_]
+                if options:
+                    for member in group(rng.choice(options)):
+                        open_.add(member)
+                        degree[member[0]] += 1
+                        degree[member[1]] += 1
+        return open_
+
+    def build(self, rng):
+        """
+        Generates one maze.
+
+        Args:
+            rng (RandomStream): Source of every random choice.
+
+        Returns:
+            tuple: (data, rotdata, meta), the maze and rotation symbols as arrays
+                and the MazeBase metadata as a dict.
+        """
+        open_ = self.carve(rng)
+        nrows, ncols = self.shape
+        path = np.zeros(self.shape, dtype=bool)
+        for a, b in open_:
+            (r1, c1), (r2, c2) = self.tile(a), self.tile(b)
+            path[r1:r2+1, c1:c2+1] = True
+        hr, hc = self.tile((self.houseRow, self.houseCol))
+        tunnel = self.tile((self.houseRow + 1, 0))[0]
+        portalPairs = []
+        if self.portals:
+            path[tunnel, 0] = path[tunnel, ncols-1] = True
+            portalPairs.append(((0, tunnel), (ncols - 1, tunnel)))
+        start = self.tile((self.houseRow + 3, self.houseCol + 2))
+        meta = {"portalPairs": portalPairs,
+                "homeoffset": (hc + 2.5, hr),
+                "homenodeconnectLeft": (hc + 3, hr),
+                "homenodeconnectRight": (hc + 6, hr),
+                "pacmanStart": (start[1], start[0]),
+                "fruitStart": (hc, hr + 6),
+                "ghostNodeDeny": {"UP": [(hc + 3, hr), (hc + 6, hr), (hc + 3, start[0]), (hc + 6, start[0])],
+                                  "LEFT": [(hc + 4.5, hr + 3)], "RIGHT": [(hc + 4.5, hr + 3)]}}
+        data, rotdata = self.drawWalls(path)
+        data[hr+1:hr+6, hc+1:hc+9] = HOUSE
+        rotdata[hr+1:hr+6, hc+1:hc+9] = HOUSEROTATION
+        nodes = [(start[0], start[1]), (hr, hc + 3), (hr, hc + 6)]
+        plain = set((hr, c) for c in range(hc, hc + 10)) | set((hr + 6, c) for c in range(hc, hc + 10))
+        plain |= set((r, hc) for r in range(hr, hr + 7)) | set((r, hc + 9) for r in range(hr, hr + 7))
+        if self.portals:
+            plain |= {(tunnel, 0), (tunnel, ncols - 1)}
+        corners = [self.tile(point) for point in ((1, 0), (1, self.cols - 1), (self.rows - 3, 0), (self.rows - 3, self.cols - 1))]
+        self.drawPaths(data, path, nodes, plain, corners)
+        return data, rotdata, meta
+
+    def drawWalls(self, path):
+        # Picks the wall sprite and rotation of every tile from which of its neighbours are path
+        nrows, ncols = self.shape
+        padded = np.zeros((nrows + 2, ncols + 2), dtype=bool)
+        padded[1:-1, 1:-1] = path
+        around = lambda dr, dc: padded[1+dr:nrows+1+dr, 1+dc:ncols+1+dc]
+        up, down, left, right = around(-1, 0), around(1, 0), around(0, -1), around(0, 1)
+        wall = ~path
+        wall[:TOPROWS] = False
+        wall[nrows-BOTTOMROWS:] = False
+        data = np.full(self.shape, "X", dtype="<U1")
+        rotdata = np.full(self.shape, ".", dtype="<U1")
+        orthogonal = up | down | left | right
+        if (wall & ((up & down) | (left & right))).any():
+            raise ValueError("Wall thinner than two tiles")
+        rules = [(up & left, "2", "0"), (down & left, "2", "1"), (down & right, "2", "2"), (up & right, "2", "3"),
+                 (up & ~left & ~right, "3", "0"), (left & ~up & ~down, "3", "1"),
+                 (down & ~left & ~right, "3", "2"), (right & ~up & ~down, "3", "3"),
+                 (~orthogonal & around(1, 1), "9", "0"), (~orthogonal & around(-1, 1), "9", "1"),
+                 (~orthogonal & around(-1, -1), "9", "2"), (~orthogonal & around(1, -1), "9", "3")]
+        done = ~wall
+        for mask, symbol, rotation in rules:
+            mask = mask & ~done
+            data[mask] = symbol
+            rotdata[mask] = rotation
+            done |= mask
+        return data, rotdata
+
+    def drawPaths(self, data, path, nodes, plain, corners):
+        # Nodes go wherever a path turns, splits or ends, corners get the power pellets
+        nodes = set(nodes)
+        corners = set(corners)
+        grid = path.tolist()
+        last = (self.shape[0] - 1, self.shape[1] - 1)
+        for row, line in enumerate(grid):
+            for col, open_ in enumerate(line):
+                if not open_:
+                    continue
+                up = row > 0 and grid[row-1][col]
+                down = row < last[0] and grid[row+1][col]
+                left = col > 0 and line[col-1]
+                right = col < last[1] and line[col+1]
+                horizontal = left and right and not up and not down
+                vertical = up and down and not left and not right
+                isNode = (row, col) in nodes or not (horizontal or vertical)
+                if (row, col) in corners:
+                    data[row, col] = "P" if isNode else "p"
+                elif (row, col) in plain:
+                    data[row, col] = "n" if isNode else ("-" if horizontal else "|")
+                else:
+                    data[row, col] = "+" if isNode else "."
+
+
+def checkMaze(data, meta):
+    """
+    Checks that a maze can be played: the tiles the game looks up are
+    nodes, and every path tile can be reached from Pac-Man's start.
+
+    Args:
+        data (numpy.ndarray): The maze symbols.
+        meta (dict): The MazeBase metadata.
+
+    Raises:
+        ValueError: If the maze is not playable.
+    """
+    nodeSymbols = ('+', 'P', 'n')
+    pathSymbols = nodeSymbols + ('.', '-', '|', 'p')
+    required = [meta["pacmanStart"], meta["fruitStart"], meta["homenodeconnectLeft"], meta["homenodeconnectRight"]]
+    for pair in meta["portalPairs"]:
+        required.extend(pair)
+    for col, row in required:
+        if data[row][col] not in nodeSymbols:
+            raise ValueError("Tile (%d, %d) must be a node" % (col, row))
+    path = np.isin(data, pathSymbols)
+    links = {}
+    for (c1, r1), (c2, r2) in meta["portalPairs"]:
+        links[(r1, c1)] = (r2, c2)
+        links[(r2, c2)] = (r1, c1)
+    # Flood fill over a set of open tiles, which beats indexing the array tile by tile
+    rows, cols = np.nonzero(path)
+    unseen = set(zip(rows.tolist(), cols.tolist()))
+    col, row = meta["pacmanStart"]
+    unseen.discard((row, col))
+    stack = [(row, col)]
+    while stack:
+        row, col = stack.pop()
+        following = [(row-1, col), (row+1, col), (row, col-1), (row, col+1)]
+        if (row, col) in links:
+            following.append(links[(row, col)])
+        for tile in following:
+            if tile in unseen:
+                unseen.remove(tile)
+                stack.append(tile)
+    if unseen:
+        raise ValueError("%d path tiles cannot be reached from the start" % len(unseen))
+
+def generateMaze(seed, index=0, **options):
+    """
+    Generates and checks one maze.
+
+    Args:
+        seed (int): Seed of the whole batch.
+        index (int, optional): Number of the maze within the batch, the maze only depends on (seed, index). Defaults to 0.
+        **options: MazeGenerator keyword arguments.
+
+    Returns:
+        tuple: (data, rotdata, meta).
+    """
+    data, rotdata, meta = MazeGenerator(**options).build(RandomSource(seed).stream(STREAMMAZE, index))
+    checkMaze(data, meta)
+    return data, rotdata, meta
+
+def writeMaze(name, data, rotdata, meta):
+    """
+    Writes a maze as name.txt, name_rotation.txt and name.json, the files MazeFile reads.
+
+    Args:
+        name (str): Path of the maze without an extension.
+        data (numpy.ndarray): The maze symbols.
+        rotdata (numpy.ndarray): The wall rotations.
+        meta (dict): The MazeBase metadata.
+    """
+    for path, symbols in ((name+".txt", data), (name+"_rotation.txt", rotdata)):
+        with open(path, "w") as mazefile:
+            mazefile.write("\n".join(" ".join(row) for row in symbols.tolist()) + "\n")
+    with open(name+".json", "w") as metafile:
+        json.dump(dict(meta, name=os.path.basename(name)), metafile)
+
+def buildMaze(index, outdir, seed, options):
+    # One job of the pool: generate, check and write maze number index
+    name = os.path.join(outdir, "maze%06d" % index)
+    writeMaze(name, *generateMaze(seed, index, **options))
+    return name
+
+def generateMazes(count, outdir, seed=0, workers=None, context=None, **options):
+    """
+    Generates a batch of mazes into a directory, spread over worker processes.
+
+    Args:
+        count (int): Number of mazes.
+        outdir (str): Directory the maze files are written to, created if needed.
+        seed (int, optional): Seed of the batch. Defaults to 0.
+        workers (int, optional): Worker processes. Defaults to the number of CPUs.
+        context (str, optional): Multiprocessing start method. Defaults to the platform default.
+        **options: MazeGenerator keyword arguments.
+
+    Returns:
+        list: The maze names in order, ready for MazeData.
+    """
+    os.makedirs(outdir, exist_ok=True)
+    job = partial(buildMaze, outdir=outdir, seed=seed, options=options)
+    with multiprocessing.get_context(context).Pool(workers) as pool:
+        names = list(pool.imap(job, range(count), chunksize=max(1, min(256, count // (4 * (workers or os.cpu_count() or 1))))))
+    return names
+
+def listMazes(outdir):
+    """
+    Finds the generated mazes in a directory.
+
+    Args:
+        outdir (str): The directory.
+
+    Returns:
+        list: Maze names in sorted order.
+    """
+    return sorted(os.path.join(outdir, entry[:-5]) for entry in os.listdir(outdir) if entry.endswith(".json"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate random mazes in the maze file format.")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--out", default="generated", help="directory for the maze files")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cols", type=int, default=8, help="junctions per row")
+    parser.add_argument("--rows", type=int, default=10, help="junctions per column")
+    parser.add_argument("--loops", type=float, default=0.1, help="chance of opening an extra corridor")
+    parser.add_argument("--asymmetric", action="store_true")
+    parser.add_argument("--no-portals", action="store_true")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    began = time.perf_counter()
+    names = generateMazes(args.count, args.out, args.seed, args.workers, cols=args.cols, rows=args.rows,
+                          loops=args.loops, symmetric=not args.asymmetric, portals=not args.no_portals)
+    elapsed = time.perf_counter() - began
+    print("Generated %d mazes in %s in %.2f s (%.0f per second)" % (len(names), args.out, elapsed, len(names) / max(elapsed, 1e-9)))
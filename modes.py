@@ -1,61 +1,103 @@
 from constants import *
+from timers import TimerService
+
+# Scatter/chase timelines from the arcade game, keyed by the first level (0 based) they apply to.
+# Entries alternate SCATTER and CHASE durations in seconds, None lasts for the rest of the level.
+SCHEDULES = {0: (7, 20, 7, 20, 5, 20, 5, None),
+             1: (7, 20, 7, 20, 5, 1033, 1/60.0, None),
+             4: (5, 20, 5, 20, 5, 1037, 1/60.0, None)}
+FREIGHTTIME = 7  # Seconds a power pellet keeps the ghosts in FREIGHT
+
+def getSchedule(level):
+    return SCHEDULES[max(key for key in SCHEDULES if key <= level)]
+
 
 class MainMode(object):
-    def __init__(self):
-        self.timer = 0
-        self.scatter()
+    def __init__(self, level=0, schedule=None):
+        # One scheduler per level, shared by every ghost that subscribes to it
+        self.schedule = schedule if schedule is not None else getSchedule(level)
+        self.subscribers = []
+        self.timers = None
+        self.phaseTimer = None
+        self.freightTimer = None
+        self.setPhase(0)
 
-    def update(self, dt):
-        self.timer += dt
-        if self.timer >= self.time:
-            if self.mode is SCATTER:
-                self.chase()
-            elif self.mode is CHASE:
-                self.scatter()
+    def subscribe(self, controller):
+        self.subscribers.append(controller)
+
+    def start(self, timers):
+        # Phase boundaries and FREIGHT expiry are world timers, so they stop while the game is paused
+        self.timers = timers
+        self.schedulePhase()
+
+    def setPhase(self, phase):
+        self.phase = phase
+        self.mode = SCATTER if phase % 2 == 0 else CHASE
+        self.time = self.schedule[phase]
 
-    def scatter(self):
-        self.mode = SCATTER
-        self.time = 7
-        self.timer = 0
+    def schedulePhase(self):
+        if self.time is not None:
+            self.phaseTimer = self.timers.schedule(self.time, self.nextPhase, WORLDTIMERS)
 
-    def chase(self):
-        self.mode = CHASE
-        self.time = 20
-        self.timer = 0
+    def nextPhase(self):
+        self.setPhase(self.phase + 1)
+        self.schedulePhase()
+        for controller in self.subscribers:
+            controller.mainModeChanged()
+
+    def startFreight(self):
+        if self.timers is None:
+            return
+        self.timers.cancel(self.freightTimer)
+        self.freightTimer = self.timers.schedule(FREIGHTTIME, self.endFreight, WORLDTIMERS)
+
+    def endFreight(self):
+        self.freightTimer = None
+        for controller in self.subscribers:
+            controller.endFreight()
+
+    def freightRemaining(self):
+        if self.freightTimer is None:
+            return 0
+        return self.timers.remaining(self.freightTimer)
 
 
 class ModeController(object):
-    def __init__(self, entity):
-        self.timer = 0
-        self.time = None
-        self.mainmode = MainMode()
+    def __init__(self, entity, mainmode=None):
+        self.timers = None  # Runs a private scheduler, None when the scheduler is shared
+        if mainmode is None:
+            # A ghost on its own keeps its own clock, ticked from update like the shared one is by the game
+            mainmode = MainMode()
+            self.timers = TimerService()
+            mainmode.start(self.timers)
+        self.mainmode = mainmode
+        self.mainmode.subscribe(self)
         self.current = self.mainmode.mode
-        self.entity = entity 
+        self.entity = entity
 
     def update(self, dt):
-        self.mainmode.update(dt)
-        if self.current is FREIGHT:
-            self.timer += dt
-            if self.timer >= self.time:
-                self.time = None
-                self.entity.normalMode()
-                self.current = self.mainmode.mode
-        elif self.current in [SCATTER, CHASE]:
-            self.current = self.mainmode.mode
-
+        if self.timers is not None:
+            self.timers.update(dt)
         if self.current is SPAWN:
             if self.entity.node == self.entity.spawnNode:
                 self.entity.normalMode()
                 self.current = self.mainmode.mode
 
+    def mainModeChanged(self):
+        if self.current in [SCATTER, CHASE]:
+            self.current = self.mainmode.mode
+
+    def endFreight(self):
+        if self.current is FREIGHT:
+            self.entity.normalMode()
+            self.current = self.mainmode.mode
+
     def setSpawnMode(self):
         if self.current is FREIGHT:
            self.current = SPAWN
 
     def setFreightMode(self):
-        if self.current in [SCATTER, CHASE]:
-            self.timer = 0
-            self.time = 7
+        # Nothing would end FREIGHT before a shared scheduler is started, so the ghost stays as it is
+        if self.current in [SCATTER, CHASE, FREIGHT] and self.mainmode.timers is not None:
+            self.mainmode.startFreight()
             self.current = FREIGHT
-        elif self.current is FREIGHT:
-            self.timer = 0
\ No newline at end of file
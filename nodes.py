@@ -1,6 +1,7 @@
 import pygame
 from vector import Vector2
 from constants import *
+from mazedata import loadMazeFile
 import numpy as np
 
 class Node(object):
@@ -30,10 +31,37 @@ class Node(object):
 
 
 
+class GoalTable(object):
+    def __init__(self, goal, nodes=()):
+        # Ranks the four directions at each node by how close one step takes an entity to a fixed goal
+        self.goal = goal.copy()
+        self.order = (UP, DOWN, LEFT, RIGHT)
+        self.steps = [Vector2(0, -1) * TILEWIDTH, Vector2(0, 1) * TILEWIDTH,
+                      Vector2(-1, 0) * TILEWIDTH, Vector2(1, 0) * TILEWIDTH]
+        self.ranks = {}
+        for node in nodes:
+            self.rank(node)
+
+    def rank(self, node):
+        if node not in self.ranks:
+            distances = [((node.position + step) - self.goal).magnitudeSquared() for step in self.steps]
+            # Ties go to the earlier direction, the same way goalDirection breaks them
+            order = sorted(range(len(self.order)), key=lambda i: (distances[i], i))
+            self.ranks[node] = tuple(self.order[i] for i in order)
+        return self.ranks[node]
+
+    def choose(self, node, directions):
+        for direction in self.rank(node):
+            if direction in directions:
+                return direction
+        return None
+
+
 class NodeGroup(object):
     def __init__(self, level):
         self.level = level
         self.nodesLUT = {}
+        self.goalTables = {}
         self.nodeSymbols = ['+', 'P', 'n']
         self.pathSymbols = ['.', '-', '|', 'p']
         data = self.readMazeFile(level)
@@ -43,23 +71,27 @@ class NodeGroup(object):
         self.homekey = None
 
     def readMazeFile(self, textfile):
-        return np.loadtxt(textfile, dtype='<U1')
+        return loadMazeFile(textfile)
 
     def createNodeTable(self, data, xoffset=0, yoffset=0):
-        for row in list(range(data.shape[0])):
-            for col in list(range(data.shape[1])):
-                if data[row][col] in self.nodeSymbols:
+        # Plain lists index far faster than numpy element by element, which matters for big mazes
+        for row, line in enumerate(data.tolist()):
+            for col, symbol in enumerate(line):
+                if symbol in self.nodeSymbols:
                     x, y = self.constructKey(col+xoffset, row+yoffset)
                     self.nodesLUT[(x, y)] = Node(x, y)
 
     def constructKey(self, x, y):
         return x * TILEWIDTH, y * TILEHEIGHT
 
-    def connectHorizontally(self, data, xoffset=0, yoffset=0):
-        for row in list(range(data.shape[0])):
+    def connectHorizontally(self, data, xoffset=0, yoffset=0, rows=None):
+        lines = data.tolist()
+        if rows is None:
+            rows = range(len(lines))
+        for row in rows:
             key = None
-            for col in list(range(data.shape[1])):
-                if data[row][col] in self.nodeSymbols:
+            for col, symbol in enumerate(lines[row]):
+                if symbol in self.nodeSymbols:
                     if key is None:
                         key = self.constructKey(col+xoffset, row+yoffset)
                     else:
@@ -67,15 +99,17 @@ class NodeGroup(object):
                         self.nodesLUT[key].neighbors[RIGHT] = self.nodesLUT[otherkey]
                         self.nodesLUT[otherkey].neighbors[LEFT] = self.nodesLUT[key]
                         key = otherkey
-                elif data[row][col] not in self.pathSymbols:
+                elif symbol not in self.pathSymbols:
                     key = None
 
-    def connectVertically(self, data, xoffset=0, yoffset=0):
-        dataT = data.transpose()
-        for col in list(range(dataT.shape[0])):
+    def connectVertically(self, data, xoffset=0, yoffset=0, cols=None):
+        lines = data.transpose().tolist()
+        if cols is None:
+            cols = range(len(lines))
+        for col in cols:
             key = None
-            for row in list(range(dataT.shape[1])):
-                if dataT[col][row] in self.nodeSymbols:
+            for row, symbol in enumerate(lines[col]):
+                if symbol in self.nodeSymbols:
                     if key is None:
                         key = self.constructKey(col+xoffset, row+yoffset)
                     else:
@@ -83,9 +117,39 @@ class NodeGroup(object):
                         self.nodesLUT[key].neighbors[DOWN] = self.nodesLUT[otherkey]
                         self.nodesLUT[otherkey].neighbors[UP] = self.nodesLUT[key]
                         key = otherkey
-                elif dataT[col][row] not in self.pathSymbols:
+                elif symbol not in self.pathSymbols:
                     key = None
 
+    def patch(self, data, cells):
+        # Brings the graph in line with edited maze data. Only nodes on the changed tiles are added or
+        # removed, and only the rows and columns through them are reconnected.
+        rows = sorted(set(row for row, col in cells))
+        cols = sorted(set(col for row, col in cells))
+        removed = []
+        for row, col in cells:
+            key = self.constructKey(col, row)
+            isNode = data[row][col] in self.nodeSymbols
+            if key in self.nodesLUT and not isNode:
+                node = self.nodesLUT.pop(key)
+                if node.neighbors[PORTAL] is not None:
+                    node.neighbors[PORTAL].neighbors[PORTAL] = None
+                removed.append(node)
+            elif key not in self.nodesLUT and isNode:
+                self.nodesLUT[key] = Node(*key)
+        for row in rows:
+            for col in range(data.shape[1]):
+                node = self.getNodeFromTiles(col, row)
+                if node is not None:
+                    node.neighbors[LEFT] = node.neighbors[RIGHT] = None
+        for col in cols:
+            for row in range(data.shape[0]):
+                node = self.getNodeFromTiles(col, row)
+                if node is not None:
+                    node.neighbors[UP] = node.neighbors[DOWN] = None
+        self.connectHorizontally(data, rows=rows)
+        self.connectVertically(data, cols=cols)
+        return removed
+
     def getNodeFromPixels(self, xpixel, ypixel):
         if (xpixel, ypixel) in self.nodesLUT.keys():
             return self.nodesLUT[(xpixel, ypixel)]
@@ -97,6 +161,12 @@ class NodeGroup(object):
             return self.nodesLUT[(x, y)]
         return None
 
+    def getGoalTable(self, goal):
+        key = goal.asTuple()
+        if key not in self.goalTables:
+            self.goalTables[key] = GoalTable(goal, self.nodesLUT.values())
+        return self.goalTables[key]
+
     def getStartTempNode(self):
         nodes = list(self.nodesLUT.values())
         return nodes[0]
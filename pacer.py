@@ -0,0 +1,110 @@
+#paces the game loop: fixed simulation steps, rendering skipped when a frame runs out of time
+
+import time
+import pygame
+from constants import *
+
+class FramePacer(object):
+    def __init__(self, fps=FPS, maxSkip=4, maxSteps=5, timer=None):
+        """
+        Initializes the FramePacer object.
+
+        The simulation always advances in steps of 1/fps seconds, as many as
+        the elapsed wall-clock time calls for, so the game runs at the same
+        speed however slow rendering is. Rendering is what gets dropped: a
+        frame is not drawn when its measured cost would overrun the frame
+        budget, unless maxSkip frames in a row were already skipped.
+
+        Args:
+            fps (int, optional): Target simulation and render rate. Defaults to FPS.
+            maxSkip (int, optional): Most renders skipped in a row. Defaults to 4.
+            maxSteps (int, optional): Most simulation steps per frame. Time beyond that
+                is dropped, for example after the window was dragged. Defaults to 5.
+            timer (StartupTimer, optional): Instrumentation that receives the pacing counters. Defaults to None.
+        """
+        self.fps = fps
+        self.dt = 1.0 / fps
+        self.maxSkip = maxSkip
+        self.maxSteps = maxSteps
+        self.timer = timer
+        self.clock = pygame.time.Clock()  # Only used to sleep, elapsed time comes from perf_counter
+        self.accumulator = 0.0  # Wall-clock time not simulated yet
+        self.frameStart = None
+        self.renderCost = 0.0  # Moving average of the seconds a render takes
+        self.skipped = 0  # Renders skipped in a row
+        self.frames = 0
+        self.steps = 0
+        self.rendered = 0
+        self.skips = 0
+        self.dropped = 0.0  # Seconds of wall-clock time that were never simulated
+
+    def count(self, name, amount=1):
+        if self.timer is not None:
+            self.timer.count(name, amount)
+
+    def beginFrame(self):
+        """
+        Waits for the next frame and works out how far the simulation is behind.
+
+        Returns:
+            int: The number of dt steps to simulate this frame.
+        """
+        self.clock.tick(self.fps)  # Sleeps until the frame is due
+        now = time.perf_counter()
+        if self.frameStart is not None:
+            self.accumulator += now - self.frameStart
+        else:
+            self.accumulator = self.dt
+        self.frameStart = now
+        self.frames += 1
+        # tick only sleeps in whole milliseconds, so a frame that is slightly early still gets
+        # its step and the difference is paid back over the next frames
+        steps = int(self.accumulator / self.dt + 0.25)
+        self.accumulator -= steps * self.dt
+        if steps > self.maxSteps:
+            self.dropped += (steps - self.maxSteps) * self.dt
+            self.count("pacer: seconds dropped", (steps - self.maxSteps) * self.dt)
+            steps = self.maxSteps
+        self.steps += steps
+        if steps > 1:
+            self.count("pacer: catch-up steps", steps - 1)
+        return steps
+
+    def shouldRender(self):
+        """
+        Decides whether there is time left in this frame to draw it.
+
+        Returns:
+            bool: True to render, False to skip this frame's render.
+        """
+        elapsed = time.perf_counter() - self.frameStart
+        if elapsed + self.renderCost <= self.dt or self.skipped >= self.maxSkip:
+            self.skipped = 0
+            return True
+        self.skipped += 1
+        self.skips += 1
+        self.count("pacer: renders skipped")
+        return False
+
+    def render(self, func):
+        """
+        Renders through func and updates the render cost estimate.
+
+        Args:
+            func (callable): Draws and presents the frame.
+        """
+        began = time.perf_counter()
+        func()
+        cost = time.perf_counter() - began
+        self.renderCost = cost if self.rendered == 0 else self.renderCost * 0.9 + cost * 0.1
+        self.rendered += 1
+
+    def report(self):
+        """
+        Summarizes the pacing decisions so far.
+
+        Returns:
+            str: Frames, simulation steps, renders skipped and the render cost.
+        """
+        return "Pacing at %d fps: %d frames, %d steps, %d rendered, %d skipped, %.2f s dropped, %.1f ms per render" % (
+            self.fps, self.frames, self.steps, self.rendered, self.skips, self.dropped, self.renderCost * 1000)
@@ -15,10 +15,12 @@ from entity import Entity
 from sprites import PacmanSprites
 
 class Pacman(Entity):
-    def __init__(self, node):
+    def __init__(self, node, index=0):
         # Initialize Pacman entity
         Entity.__init__(self, node)
         self.name = PACMAN
+        self.index = index  # Player number, picks the score and lives this Pacman plays for
+        self.out = False  # Out of lives while other players go on
         self.directions = {STOP: Vector2(), UP: Vector2(0, -1), DOWN: Vector2(0, 1), LEFT: Vector2(-1, 0), RIGHT: Vector2(1, 0)}
         self.direction = LEFT  # Initial direction
         self.speed = 100 * TILEWIDTH / 16  # Speed of Pacman
@@ -29,6 +31,8 @@ class Pacman(Entity):
         self.target = node  # Target node of Pacman
         self.collideRadius = 5  # Collider radius for collision checks
         self.alive = True  # Pacman's alive status
+        self.action = None  # Direction set by an agent, overrides the keyboard when not None
+        self.input = None  # InputBuffer with the player's buffered direction, the key state is read without one
         self.sprites = PacmanSprites(self)  # Pacman's sprites
         self.reset()  # Reset Pacman's initial state
 
@@ -55,6 +59,7 @@ class Pacman(Entity):
         self.sprites.update(dt)  # Update Pacman's sprites
         self.position += self.directions[self.direction] * self.speed * dt  # Move Pacman
         direction = self.getValidKey()  # Get valid input direction
+        previous = self.direction  # Direction before this frame, to tell when the input turned Pacman
         if self.overshotTarget():  # Check if Pacman has overshot its target node
             # Update Pacman's current node and target node based on direction
             self.node = self.target
@@ -71,6 +76,24 @@ class Pacman(Entity):
         else:
             if self.oppositeDirection(direction):  # If Pacman tries to move in opposite direction
                 self.reverseDirection()  # Reverse Pacman's direction
+            elif self.input is not None:
+                self.preTurn(direction)  # Take a turn a few pixels early
+        if self.input is not None:
+            self.input.applied(self.direction, self.direction != previous)  # Use up the buffered direction
+
+    def preTurn(self, direction):
+        # Arcade cornering: turn onto a side path just before reaching its node instead of stopping at it
+        if direction is STOP or direction == self.direction or self.oppositeDirection(direction):
+            return False
+        if self.target.neighbors[PORTAL] is not None or self.target.neighbors[direction] is None:
+            return False
+        if (self.target.position - self.position).magnitudeSquared() > self.input.cornering**2:
+            return False
+        self.node = self.target
+        self.target = self.node.neighbors[direction]
+        self.direction = direction
+        self.setPosition()
+        return True
 
     def validDirection(self, direction):
         # Check if a direction is valid for Pacman to move
@@ -87,6 +110,10 @@ class Pacman(Entity):
 
     def getValidKey(self):
         # Get valid directional input key
+        if self.action is not None:
+            return self.action
+        if self.input is not None:
+            return self.input.direction()
         key_pressed = pygame.key.get_pressed()
         if key_pressed[K_UP]:
             return UP
@@ -141,3 +168,152 @@ class Pacman(Entity):
         if dSquared <= rSquared:  # If the squared distance is less than or equal to the squared sum of radii
             return True  # Collision occurred, return True
         return False  # No collision, return False
+
+
+class PacmanGroup(object):
+    def __init__(self, node, count=1):
+        """
+        Initializes a group of Pac-Men, one per player.
+
+        The first one is the primary Pac-Man, the one the keyboard drives,
+        the camera follows and single player code calls game.pacman.
+
+        Args:
+            node (Node): The start node of the primary Pac-Man, the others start there too until spread.
+            count (int, optional): Number of players. Defaults to 1.
+        """
+        self.pacmen = [Pacman(node, i) for i in range(count)]
+        self.primary = self.pacmen[0]
+
+    def __iter__(self):
+        """
+        Allows iteration over the Pac-Men.
+        """
+        return iter(self.pacmen)
+
+    def __len__(self):
+        return len(self.pacmen)
+
+    def spread(self):
+        """
+        Moves every Pac-Man but the primary one to its own start node, spaced
+        out over the nodes Pac-Man can reach in breadth first order. Call it
+        once the home access is denied, so nobody starts in the ghost house.
+        """
+        if len(self.pacmen) < 2:
+            return
+        start = self.primary.startNode
+        order = [start]
+        seen = set(order)
+        for node in order:
+            for direction in (UP, DOWN, LEFT, RIGHT, PORTAL):
+                neighbor = node.neighbors[direction]
+                if neighbor is None or neighbor in seen:
+                    continue
+                if direction is not PORTAL and PACMAN not in node.access[direction]:
+                    continue
+                seen.add(neighbor)
+                order.append(neighbor)
+        for i, pacman in enumerate(self.pacmen[1:], 1):
+            pacman.setStartNode(order[i * len(order) // len(self.pacmen)])
+            pacman.reset()
+
+    def alive(self):
+        """
+        Returns the Pac-Men that are in play.
+
+        Returns:
+            list: The living Pac-Men, in player order.
+        """
+        return [pacman for pacman in self.pacmen if pacman.alive and not pacman.out]
+
+    def nearest(self, position):
+        """
+        Finds the living Pac-Man closest to a position.
+
+        Args:
+            position (Vector2): Usually a ghost's position.
+
+        Returns:
+            Pacman: The closest one, the primary Pac-Man when none is alive. Ties go to the lower player number.
+        """
+        best = self.primary
+        bestDistance = None
+        for pacman in self.pacmen:
+            if pacman.alive and not pacman.out:
+                distance = (pacman.position - position).magnitudeSquared()
+                if bestDistance is None or distance < bestDistance:
+                    best = pacman
+                    bestDistance = distance
+        return best
+
+    def setActions(self, actions):
+        """
+        Sets the direction every Pac-Man's agent asks for.
+
+        Args:
+            actions (list): One direction per player, None hands a Pac-Man back to its keyboard input.
+        """
+        for pacman, action in zip(self.pacmen, actions):
+            pacman.action = action
+
+    def update(self, dt, paused=False):
+        """
+        Moves every Pac-Man, the dead ones keep playing their death animation while paused.
+
+        Args:
+            dt (float): Time elapsed since the last update.
+            paused (bool, optional): The game is paused. Defaults to False.
+        """
+        for pacman in self.pacmen:
+            if pacman.out:
+                continue
+            if pacman.alive:
+                if not paused:
+                    pacman.update(dt)
+            else:
+                pacman.update(dt)
+
+    def retire(self, pacman):
+        """
+        Takes a Pac-Man that has no lives left out of play.
+
+        Args:
+            pacman (Pacman): The Pac-Man to take out.
+        """
+        pacman.die()
+        pacman.out = True
+        pacman.visible = False
+
+    def reset(self):
+        """
+        Puts every Pac-Man still in play back at its start.
+        """
+        for pacman in self.pacmen:
+            if not pacman.out:
+                pacman.reset()
+
+    def hide(self):
+        """
+        Hides every Pac-Man.
+        """
+        for pacman in self.pacmen:
+            pacman.visible = False
+
+    def show(self):
+        """
+        Shows every Pac-Man still in play.
+        """
+        for pacman in self.pacmen:
+            pacman.visible = not pacman.out
+
+    def render(self, screen, camera=None):
+        """
+        Renders every Pac-Man.
+
+        Args:
+            screen: The pygame screen to render on.
+            camera (Camera, optional): The view of a maze bigger than the screen.
+        """
+        for pacman in self.pacmen:
+            pacman.render(screen, camera)
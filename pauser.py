@@ -1,25 +1,46 @@
+from constants import *
+
 class Pause(object):
-    def __init__(self, paused=False):
+    def __init__(self, paused=False, timers=None):
+        self.timers = timers
         self.paused = paused
-        self.timer = 0
+        self.timer = None
         self.pauseTime = None
         self.func = None
 
-    def update(self, dt):
-        if self.pauseTime is not None:
-            self.timer += dt
-            if self.timer >= self.pauseTime:
-                self.timer = 0
-                self.paused = False
-                self.pauseTime = None
-                return self.func
-        return None
+    @property
+    def paused(self):
+        return self._paused
+
+    @paused.setter
+    def paused(self, paused):
+        # Gameplay timers only run while the game does
+        self._paused = paused
+        if self.timers is not None:
+            self.timers.setPaused(WORLDTIMERS, paused)
+
+    def expire(self):
+        self.timer = None
+        self.paused = False
+        self.pauseTime = None
+        func, self.func = self.func, None
+        if func is not None:
+            func()
 
     def setPause(self, playerPaused=False, pauseTime=None, func=None):
-        self.timer = 0
+        self.cancel()
         self.func = func
         self.pauseTime = pauseTime
+        if pauseTime is not None:
+            self.timer = self.timers.schedule(pauseTime, self.expire, PAUSETIMERS)
         self.flip()
 
+    def cancel(self):
+        if self.timer is not None:
+            self.timers.cancel(self.timer)
+            self.timer = None
+        self.pauseTime = None
+        self.func = None
+
     def flip(self):
-        self.paused = not self.paused
\ No newline at end of file
+        self.paused = not self.paused
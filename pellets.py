@@ -1,6 +1,8 @@
 import pygame
 from vector import Vector2
 from constants import *
+from mazedata import loadMazeFile
+from camera import TileChunks
 import numpy as np
 
 class Pellet(object):
@@ -14,10 +16,14 @@ class Pellet(object):
         self.points = 10
         self.visible = True
 
-    def render(self, screen):
+    def render(self, screen, camera=None):
         if self.visible:
             adjust = Vector2(TILEWIDTH, TILEHEIGHT) / 2
             p = self.position + adjust
+            if camera is not None:
+                if not camera.isVisible(p):
+                    return
+                p -= camera.offset
             pygame.draw.circle(screen, self.color, p.asInt(), self.radius)
 
 
@@ -27,14 +33,6 @@ class PowerPellet(Pellet):
         self.name = POWERPELLET
         self.radius = int(8 * TILEWIDTH / 16)
         self.points = 50
-        self.flashTime = 0.2
-        self.timer= 0
-
-    def update(self, dt):
-        self.timer += dt
-        if self.timer >= self.flashTime:
-            self.visible = not self.visible
-            self.timer = 0
 
 
 
@@ -42,32 +40,105 @@ class PelletGroup(object):
     def __init__(self, pelletfile):
         self.pelletList = []
         self.powerpellets = []
+        self.cells = {}  # (row, column) -> pellet, for looking pellets up by tile
+        self.layer = None
+        self.grid = None
+        self.flashTime = 0.2
+        self.edits = None  # (row, column, kind) of every pellet added or removed, kept while a RewindBuffer listens
+        self.distances = None  # PelletDistances kept up to date as pellets are added and removed
         self.createPelletList(pelletfile)
         self.numEaten = 0
 
-    def update(self, dt):
+    def start(self, timers):
+        # One repeating timer blinks every power pellet together
+        timers.schedule(self.flashTime, self.flash, LEVELTIMERS, repeat=True)
+
+    def flash(self):
         for powerpellet in self.powerpellets:
-            powerpellet.update(dt)
+            powerpellet.visible = not powerpellet.visible
 
     def createPelletList(self, pelletfile):
         data = self.readPelletfile(pelletfile)        
-        for row in range(data.shape[0]):
-            for col in range(data.shape[1]):
-                if data[row][col] in ['.', '+']:
-                    self.pelletList.append(Pellet(row, col))
-                elif data[row][col] in ['P', 'p']:
-                    pp = PowerPellet(row, col)
-                    self.pelletList.append(pp)
-                    self.powerpellets.append(pp)
+        self.grid = np.zeros(data.shape, dtype=np.int8)  # Pellet kind per tile, 0 where there is none
+        self.grid[np.isin(data, ['.', '+'])] = PELLET
+        self.grid[np.isin(data, ['P', 'p'])] = POWERPELLET
+        for row, col in np.argwhere(self.grid).tolist():
+            if self.grid[row, col] == PELLET:
+                self.addPellet(Pellet(row, col))
+            else:
+                self.addPellet(PowerPellet(row, col))
+        self.createLayer(data.shape)
+
+    def createLayer(self, shape):
+        # Plain pellets never change, so they are drawn once per chunk and erased as they are eaten
+        self.layer = TileChunks(shape, self.drawRegion, colorkey=BLACK)
+        self.layer.prebuild()
+
+    def drawRegion(self, surface, row0, col0, rows, cols):
+        # Draws the plain pellets of a block of tiles with tile (row0, col0) at the top left corner of the surface
+        radius = int(2 * TILEWIDTH / 16)
+        for row, col in np.argwhere(self.grid[row0:row0+rows, col0:col0+cols] == PELLET).tolist():
+            center = (int(col*TILEWIDTH + TILEWIDTH/2), int(row*TILEHEIGHT + TILEHEIGHT/2))
+            pygame.draw.circle(surface, WHITE, center, radius)
+
+    def addPellet(self, pellet):
+        row, col = int(pellet.position.y // TILEHEIGHT), int(pellet.position.x // TILEWIDTH)
+        self.pelletList.append(pellet)
+        self.cells[(row, col)] = pellet
+        self.grid[row, col] = pellet.name
+        if self.edits is not None:
+            self.edits.append((row, col, pellet.name))
+        if self.distances is not None:
+            self.distances.added(row, col, pellet.name)
+        if pellet.name == POWERPELLET:
+            self.powerpellets.append(pellet)
+
+    def removePellet(self, pellet):
+        row, col = int(pellet.position.y // TILEHEIGHT), int(pellet.position.x // TILEWIDTH)
+        self.pelletList.remove(pellet)
+        del self.cells[(row, col)]
+        self.grid[row, col] = 0
+        if self.edits is not None:
+            self.edits.append((row, col, 0))
+        if self.distances is not None:
+            self.distances.removed(row, col, pellet.name)
+        if pellet.name == PELLET:
+            self.layer.eraseTile(row, col)
+        else:
+            self.powerpellets.remove(pellet)
+
+    def pelletAt(self, row, col):
+        return self.cells.get((row, col))
+
+    def pelletsNear(self, position):
+        # Pellets on the tiles around a position, the only ones an entity there can touch
+        row, col = int(round(position.y / TILEHEIGHT)), int(round(position.x / TILEWIDTH))
+        cells = self.cells
+        return [cells[(r, c)] for r in range(row-1, row+2) for c in range(col-1, col+2) if (r, c) in cells]
+
+    def setCell(self, row, col, symbol):
+        # Puts the pellet a maze symbol stands for on a tile, replacing whatever was there
+        pellet = self.pelletAt(row, col)
+        if pellet is not None:
+            self.removePellet(pellet)
+        if symbol in ['.', '+']:
+            self.addPellet(Pellet(row, col))
+            self.layer.invalidate([(row, col)])
+        elif symbol in ['P', 'p']:
+            pp = PowerPellet(row, col)
+            if self.powerpellets:
+                pp.visible = self.powerpellets[0].visible  # Blink in step with the others
+            self.addPellet(pp)
 
     def readPelletfile(self, textfile):
-        return np.loadtxt(textfile, dtype='<U1')
+        return loadMazeFile(textfile)
 
     def isEmpty(self):
         if len(self.pelletList) == 0:
             return True
         return False
 
-    def render(self, screen):
-        for pellet in self.pelletList:
-            pellet.render(screen)
\ No newline at end of file
+    def render(self, screen, camera=None):
+        self.layer.render(screen, camera)
+        for powerpellet in self.powerpellets:
+            powerpellet.render(screen, camera)
\ No newline at end of file
@@ -0,0 +1,125 @@
+#turns rendered frames into downsampled, stacked pixel observations
+
+from contextlib import contextmanager
+import numpy as np
+import pygame
+
+class PixelObserver(object):
+    def __init__(self, surface, size=(84, 84), stack=4, grayscale=True):
+        """
+        Initializes the PixelObserver object.
+
+        Frames are read through pygame.surfarray.pixels2d, which references
+        the surface's own memory. Only the sampled pixels are gathered, and
+        every step writes into buffers allocated here, so capturing a frame
+        allocates nothing.
+
+        Args:
+            surface (pygame.Surface): The 32 bit surface the game renders to.
+            size (tuple, optional): Output (width, height). Defaults to (84, 84).
+            stack (int, optional): Number of most recent frames kept. Defaults to 4.
+            grayscale (bool, optional): Convert frames to luma. Defaults to True.
+        """
+        self.surface = surface
+        self.grayscale = grayscale
+        width, height = surface.get_size()
+        outwidth, outheight = size
+        # Nearest neighbour sampling: the source pixel at the centre of every output pixel
+        cols = ((np.arange(outwidth) + 0.5) * width / outwidth).astype(np.intp)
+        rows = ((np.arange(outheight) + 0.5) * height / outheight).astype(np.intp)
+        pitch = surface.get_pitch() // surface.get_bytesize()
+        self.index = rows[:, None] * pitch + cols[None, :]  # Offsets of the sampled pixels in the surface memory
+        self.shifts = surface.get_shifts()[:3]
+        self.packed = np.zeros((outheight, outwidth), dtype=np.uint32)
+        self.channel = np.zeros((outheight, outwidth), dtype=np.uint32)
+        self.luma = np.zeros((outheight, outwidth), dtype=np.uint32)
+        if grayscale:
+            self.frames = np.zeros((stack, outheight, outwidth), dtype=np.uint8)
+        else:
+            self.frames = np.zeros((stack, outheight, outwidth, 3), dtype=np.uint8)
+
+    @contextmanager
+    def view(self):
+        """
+        Gives direct access to the surface pixels.
+
+        The surface is locked while the view exists, so nothing can be
+        blitted to it until the with block ends.
+
+        Yields:
+            numpy.ndarray: A (width, height) array of packed pixels sharing memory with the surface.
+        """
+        pixels = pygame.surfarray.pixels2d(self.surface)
+        try:
+            yield pixels
+        finally:
+            del pixels
+
+    def sample(self):
+        """
+        Gathers the sampled pixels of the current frame into self.packed.
+        """
+        with self.view() as pixels:
+            # pixels is (width, height) over row-major memory, so its transpose can be read flat
+            flat = np.lib.stride_tricks.as_strided(pixels, shape=(self.index.max() + 1,), strides=(pixels.strides[0],))
+            np.take(flat, self.index, out=self.packed)
+            del flat
+
+    def unpack(self, shift):
+        """
+        Extracts one colour channel of the sampled pixels into self.channel.
+
+        Args:
+            shift (int): Bit position of the channel in a packed pixel.
+        """
+        np.right_shift(self.packed, shift, out=self.channel)
+        self.channel &= 255
+
+    def write(self, frame):
+        """
+        Writes the sampled frame into a slot of the frame stack.
+
+        Args:
+            frame (numpy.ndarray): The (height, width) or (height, width, 3) slot to fill.
+        """
+        rshift, gshift, bshift = self.shifts
+        if self.grayscale:
+            # Integer BT.601 luma: (77 R + 150 G + 29 B) / 256
+            self.unpack(rshift)
+            np.multiply(self.channel, 77, out=self.luma)
+            self.unpack(gshift)
+            self.channel *= 150
+            self.luma += self.channel
+            self.unpack(bshift)
+            self.channel *= 29
+            self.luma += self.channel
+            self.luma >>= 8
+            np.copyto(frame, self.luma, casting="unsafe")
+        else:
+            for i, shift in enumerate(self.shifts):
+                self.unpack(shift)
+                np.copyto(frame[:, :, i], self.channel, casting="unsafe")
+
+    def capture(self):
+        """
+        Pushes the current surface contents onto the frame stack.
+
+        Returns:
+            numpy.ndarray: The frame stack, oldest frame first.
+        """
+        self.sample()
+        self.frames[:-1] = self.frames[1:]
+        self.write(self.frames[-1])
+        return self.frames
+
+    def reset(self):
+        """
+        Fills the whole frame stack with the current surface contents.
+
+        Returns:
+            numpy.ndarray: The frame stack.
+        """
+        self.sample()
+        for frame in self.frames:
+            self.write(frame)
+        return self.frames
@@ -0,0 +1,196 @@
+#records rendered frames to disk from a background process
+
+import os
+import json
+import shutil
+import time
+import queue
+import multiprocessing
+from multiprocessing import resource_tracker
+from multiprocessing import shared_memory
+import numpy as np
+import pygame
+
+def framePath(path, number):
+    return os.path.join(path, "frame%06d.png" % number)
+
+def writer(path, fmt, size, shifts, slots, memoryName, pending, done):
+    """
+    Encodes frames handed over by a FrameRecorder until it sends its end.
+
+    Runs in its own process because PNG encoding holds the GIL for the
+    whole frame and would stall the game loop from a thread. Frame numbers
+    count game ticks, so a number that skips ahead, for a render the pacer
+    skipped or a frame that was dropped, is filled by repeating the frame
+    before it.
+
+    Args:
+        path (str): The output directory.
+        fmt (str): "png" for numbered PNG files, "raw" for one RGB24 stream.
+        size (tuple): Frame (width, height).
+        shifts (tuple): Bit positions of red, green and blue in a packed pixel.
+        slots (int): Number of frame slots in the shared block.
+        memoryName (str): Name of the shared block holding the slots.
+        pending (Queue): (slot, frame number) pairs to encode, then (None, frame count).
+        done (Queue): Slots that can be reused.
+    """
+    width, height = size
+    memory = shared_memory.SharedMemory(name=memoryName)
+    frames = np.ndarray((slots, height, width), dtype=np.uint32, buffer=memory.buf)
+    rgb = np.zeros((height, width, 3), dtype=np.uint8)
+    stream = open(os.path.join(path, "frames.rgb"), "wb") if fmt == "raw" else None
+    written = 0
+    try:
+        while True:
+            slot, number = pending.get()
+            while 0 < written < number:
+                # rgb still holds the last frame written
+                if stream is not None:
+                    stream.write(rgb.data)
+                else:
+                    shutil.copyfile(framePath(path, written - 1), framePath(path, written))
+                written += 1
+            if slot is None:
+                break
+            for i, shift in enumerate(shifts):
+                np.copyto(rgb[:, :, i], (frames[slot] >> shift) & 255, casting="unsafe")
+            done.put(slot)
+            if stream is not None:
+                stream.write(rgb.data)
+            else:
+                image = pygame.image.frombuffer(rgb.data, size, "RGB")
+                pygame.image.save(image, framePath(path, number))
+            written = number + 1
+    finally:
+        if stream is not None:
+            stream.close()
+        del frames
+        memory.close()
+
+
+class FrameRecorder(object):
+    def __init__(self, path, surface, fmt="png", slots=32, fps=30, context=None):
+        """
+        Starts recording frames of a surface.
+
+        submit() copies a frame into a free shared-memory slot and queues it
+        for the writer process. When every slot is still waiting to be
+        encoded the frame is dropped and counted instead of blocking the game.
+        Every game tick gets one frame in the output: ticks without a frame of
+        their own repeat the one before, so the recording plays back in real
+        time at fps.
+
+        Args:
+            path (str): The output directory, created if needed.
+            surface (pygame.Surface): A 32 bit surface of the size every frame will have.
+            fmt (str, optional): "png" or "raw". Raw frames go to frames.rgb and can be
+                encoded later with ffmpeg -f rawvideo -pix_fmt rgb24. Defaults to "png".
+            slots (int, optional): Frames that can wait for the writer. Defaults to 32.
+            fps (int, optional): Game ticks per second, the frame rate written to the info file. Defaults to 30.
+            context (str, optional): Multiprocessing start method. Defaults to the platform default.
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.fmt = fmt
+        self.fps = fps
+        self.size = surface.get_size()
+        width, height = self.size
+        resource_tracker.ensure_running()  # The writer shares this tracker, so only stop() unlinks the block
+        self.memory = shared_memory.SharedMemory(create=True, size=slots * width * height * 4)
+        self.frames = np.ndarray((slots, height, width), dtype=np.uint32, buffer=self.memory.buf)
+        self.frames.fill(0)  # Fault the pages in now rather than during the first frames
+        self.free = list(range(slots))
+        ctx = multiprocessing.get_context(context)
+        self.pending = ctx.Queue()
+        self.done = ctx.Queue()
+        self.process = ctx.Process(target=writer, daemon=True,
+                                   args=(path, fmt, self.size, surface.get_shifts()[:3], slots,
+                                         self.memory.name, self.pending, self.done))
+        self.process.start()
+        self.submitted = 0  # Frames queued for the writer
+        self.dropped = 0  # Frames skipped because every slot was busy
+        self.firstTick = None  # Game tick of the first queued frame, frame 0 of the output
+        self.lastTick = None  # Game tick of the last frame submitted
+        self.submitTime = 0.0  # Seconds spent inside submit
+        self.maxSubmitTime = 0.0
+
+    def submit(self, surface, tick=None):
+        """
+        Queues a copy of the surface for writing.
+
+        Args:
+            surface (pygame.Surface): The finished frame.
+            tick (int, optional): The game tick the frame shows. Ticks skipped since the
+                last frame repeat it in the output. Defaults to the tick after the last one.
+
+        Returns:
+            bool: True if the frame was queued, False if it was dropped or its tick already has a frame.
+        """
+        if tick is None:
+            tick = 0 if self.lastTick is None else self.lastTick + 1
+        elif self.lastTick is not None and tick <= self.lastTick:
+            return False  # Rendered again without a tick in between, the output has this tick already
+        self.lastTick = tick
+        began = time.perf_counter()
+        try:
+            while True:
+                self.free.append(self.done.get_nowait())
+        except queue.Empty:
+            pass
+        queued = False
+        if not self.free:
+            self.dropped += 1
+        else:
+            slot = self.free.pop()
+            pixels = pygame.surfarray.pixels2d(surface)
+            np.copyto(self.frames[slot], pixels.T)
+            del pixels
+            if self.firstTick is None:
+                self.firstTick = tick
+            self.pending.put((slot, tick - self.firstTick))
+            self.submitted += 1
+            queued = True
+        elapsed = time.perf_counter() - began
+        self.submitTime += elapsed
+        self.maxSubmitTime = max(self.maxSubmitTime, elapsed)
+        return queued
+
+    def stop(self):
+        """
+        Waits for the queued frames to be written and writes info.json.
+
+        Returns:
+            str: The report from report().
+        """
+        self.pending.put((None, self.frameCount()))
+        self.process.join()
+        with open(os.path.join(self.path, "info.json"), "w") as info:
+            json.dump({"format": self.fmt, "size": self.size, "fps": self.fps, "frames": self.frameCount(),
+                       "rendered": self.submitted, "dropped": self.dropped}, info)
+        self.frames = None
+        self.memory.close()
+        self.memory.unlink()
+        return self.report()
+
+    def frameCount(self):
+        """
+        Counts the frames in the output, one per game tick from the first frame queued to the last submitted.
+
+        Returns:
+            int: The frame count.
+        """
+        if self.firstTick is None:
+            return 0
+        return self.lastTick - self.firstTick + 1
+
+    def report(self):
+        """
+        Summarizes how the recording went.
+
+        Returns:
+            str: Frames written, rendered and dropped, and the cost added to each frame.
+        """
+        calls = max(self.submitted + self.dropped, 1)
+        return "Recorded %d frames at %d fps to %s, %d rendered, dropped %d, %.3f ms per frame (max %.3f ms)" % (
+            self.frameCount(), self.fps, self.path, self.submitted, self.dropped,
+            self.submitTime / calls * 1000, self.maxSubmitTime * 1000)
@@ -0,0 +1,282 @@
+#keeps the last minutes of a game as keyframes and per tick deltas so they can be scrubbed back through
+
+import sys
+import zlib
+import struct
+from bisect import bisect_right
+from collections import deque
+import numpy as np
+import pygame
+from vector import Vector2
+from constants import *
+from sprites import loadSheet
+
+# One row per entity: Pac-Men, the four ghosts, then the fruit slot
+ENTITY = np.dtype([("index", "u1"), ("x", "<f4"), ("y", "<f4"), ("sx", "<u2"), ("sy", "<u2"),
+                   ("direction", "i1"), ("mode", "i1"), ("flags", "u1")])
+EDIT = np.dtype([("cell", "<u4"), ("kind", "i1")])  # A pellet tile that changed, 0 once eaten
+HEADER = struct.Struct("<ihhBHH")  # Score, lives, level, pause and blink flags, entity rows, pellet edits
+
+VISIBLE = 1
+ALIVE = 2
+PRESENT = 4  # The fruit slot is in use
+HASIMAGE = 8
+
+PAUSED = 1
+TIMEDPAUSE = 2  # Paused by a countdown, such as after a death, rather than by the player
+POWERHIDDEN = 4  # The power pellets are in the off half of their blink
+
+class Snapshot(object):
+    def __init__(self, tick, header, entities, grid, background):
+        """
+        Initializes the Snapshot object, the state of the game at one tick.
+
+        Args:
+            tick (int): The tick it belongs to.
+            header (tuple): Score, lives, level and pause flags.
+            entities (numpy.ndarray): ENTITY rows.
+            grid (numpy.ndarray): Pellet kind per tile, like PelletGroup.grid.
+            background (TileChunks): The maze background of the level it was taken on.
+        """
+        self.tick = tick
+        self.score, self.lives, self.level, self.pause = header
+        self.entities = entities
+        self.grid = grid
+        self.background = background
+
+    @property
+    def paused(self):
+        return bool(self.pause & PAUSED)
+
+    def copy(self):
+        return Snapshot(self.tick, (self.score, self.lives, self.level, self.pause),
+                        self.entities.copy(), self.grid.copy(), self.background)
+
+
+class RewindBuffer(object):
+    def __init__(self, capacity=4*1024*1024, interval=150):
+        """
+        Initializes the RewindBuffer object.
+
+        Every interval ticks a keyframe holds the whole state, with the
+        pellet grid compressed. Every other tick stores only what changed
+        since the tick before: the entity rows that moved or changed image,
+        mode or visibility, the pellet tiles that were eaten or added, and
+        a small header with score, lives, level and pause. Records are
+        packed bytes, so the memory used is known, and whole segments
+        (a keyframe and its deltas) are dropped oldest first to stay under
+        capacity. The regular ghost swarm is not recorded.
+
+        Args:
+            capacity (int, optional): Most bytes kept. Defaults to 4 MB.
+            interval (int, optional): Ticks between keyframes, the most deltas a seek applies. Defaults to 150.
+        """
+        self.capacity = capacity
+        self.interval = interval
+        self.segments = deque()  # [first tick, keyframe, background, shape, deltas], oldest first
+        self.starts = deque()  # First tick of every segment, for bisect
+        self.nbytes = 0
+        self.tick = -1  # Last tick recorded
+        self.pellets = None  # PelletGroup the recorded edits come from
+        self.previous = None  # ENTITY rows of the last tick
+        self.cached = None  # Last snapshot seek built, reused when scrubbing forward
+
+    def __len__(self):
+        return self.tick - self.first() + 1 if self.segments else 0
+
+    def first(self):
+        """
+        Returns the oldest tick that can still be reached.
+
+        Returns:
+            int: The tick, -1 when nothing was recorded.
+        """
+        return self.starts[0] if self.starts else -1
+
+    def last(self):
+        return self.tick
+
+    def capture(self, game):
+        # The entity rows of the current tick
+        entities = list(game.pacmen) + game.ghosts.ghosts + [game.fruit]
+        rows = []
+        for i, entity in enumerate(entities):
+            if entity is None:
+                rows.append((i, 0, 0, 0, 0, 0, -1, 0))
+                continue
+            flags = PRESENT
+            if entity.visible:
+                flags |= VISIBLE
+            if getattr(entity, "alive", True):
+                flags |= ALIVE
+            sx, sy = 0, 0
+            if entity.image is not None:
+                flags |= HASIMAGE
+                sx, sy = entity.image.get_offset()
+            mode = -1 if entity.name == PACMAN or entity.name == FRUIT else entity.mode.current
+            rows.append((i, entity.position.x, entity.position.y, sx, sy, entity.direction, mode, flags))
+        return np.array(rows, dtype=ENTITY)
+
+    def header(self, game, entities, edits):
+        pause = 0
+        if game.pause.paused:
+            pause |= PAUSED
+        if game.pause.pauseTime is not None:
+            pause |= TIMEDPAUSE
+        if game.pellets.powerpellets and not game.pellets.powerpellets[0].visible:
+            pause |= POWERHIDDEN
+        return HEADER.pack(game.score, game.lives, game.level, pause, entities, edits)
+
+    def record(self, game):
+        """
+        Stores the current tick, call it once after every game step.
+
+        Args:
+            game (GameController): The running game.
+        """
+        self.tick += 1
+        rows = self.capture(game)
+        newLevel = game.pellets is not self.pellets
+        if newLevel:
+            if self.pellets is not None:
+                self.pellets.edits = None
+            self.pellets = game.pellets
+            self.pellets.edits = []
+        edits = self.pellets.edits
+        if (newLevel or self.previous is None or len(rows) != len(self.previous)
+                or self.tick - self.starts[-1] >= self.interval):
+            self.keyframe(game, rows)
+        else:
+            changed = rows[(rows != self.previous)]
+            cols = self.pellets.grid.shape[1]
+            edit = np.array([(row * cols + col, kind) for row, col, kind in edits], dtype=EDIT)
+            blob = (self.header(game, len(changed), len(edit)) + changed.tobytes() + edit.tobytes())
+            self.segments[-1][4].append(blob)
+            self.nbytes += sys.getsizeof(blob) + 8
+        del edits[:]
+        self.previous = rows
+        self.trim()
+
+    def keyframe(self, game, rows):
+        # Starts a segment with the whole state
+        grid = self.pellets.grid
+        blob = self.header(game, len(rows), 0) + rows.tobytes() + zlib.compress(grid.tobytes(), 1)
+        self.segments.append([self.tick, blob, game.background_norm, grid.shape, []])
+        self.starts.append(self.tick)
+        self.nbytes += sys.getsizeof(blob) + 64
+
+    def trim(self):
+        # Drops the oldest segments, never the one being written
+        while self.nbytes > self.capacity and len(self.segments) > 1:
+            start, blob, background, shape, deltas = self.segments.popleft()
+            self.starts.popleft()
+            self.nbytes -= sys.getsizeof(blob) + 64 + sum(sys.getsizeof(delta) + 8 for delta in deltas)
+            if self.cached is not None and self.cached.tick < self.starts[0]:
+                self.cached = None
+
+    def clear(self):
+        """
+        Forgets everything, for a new game.
+        """
+        if self.pellets is not None:
+            self.pellets.edits = None
+        self.__init__(self.capacity, self.interval)
+
+    def seek(self, tick):
+        """
+        Rebuilds the state of a past tick.
+
+        Args:
+            tick (int): The tick, clamped to the ticks still kept.
+
+        Returns:
+            Snapshot: The state, None if nothing was recorded.
+        """
+        if not self.segments:
+            return None
+        tick = min(max(tick, self.first()), self.tick)
+        index = bisect_right(self.starts, tick) - 1
+        start, blob, background, shape, deltas = self.segments[index]
+        cached = self.cached
+        if cached is not None and start <= cached.tick <= tick:
+            snapshot = cached.copy()
+        else:
+            snapshot = self.decodeKeyframe(start, blob, background, shape)
+        for t in range(snapshot.tick + 1, tick + 1):
+            self.applyDelta(snapshot, deltas[t - start - 1])
+        snapshot.tick = tick
+        self.cached = snapshot
+        return snapshot.copy()
+
+    def decodeKeyframe(self, start, blob, background, shape):
+        header = HEADER.unpack_from(blob)
+        count = header[4]
+        offset = HEADER.size + count * ENTITY.itemsize
+        entities = np.frombuffer(blob, ENTITY, count, HEADER.size).copy()
+        grid = np.frombuffer(zlib.decompress(blob[offset:]), np.int8).reshape(shape).copy()
+        return Snapshot(start, header[:4], entities, grid, background)
+
+    def applyDelta(self, snapshot, blob):
+        header = HEADER.unpack_from(blob)
+        snapshot.score, snapshot.lives, snapshot.level, snapshot.pause = header[:4]
+        rows = np.frombuffer(blob, ENTITY, header[4], HEADER.size)
+        snapshot.entities[rows["index"]] = rows
+        edits = np.frombuffer(blob, EDIT, header[5], HEADER.size + header[4] * ENTITY.itemsize)
+        snapshot.grid.reshape(-1)[edits["cell"]] = edits["kind"]
+
+    def report(self):
+        """
+        Describes how much is kept.
+
+        Returns:
+            str: Ticks, segments and memory in use.
+        """
+        return "rewind: %d ticks in %d segments, %.2f MB of %.2f MB" % (
+            len(self), len(self.segments), self.nbytes / 1048576.0, self.capacity / 1048576.0)
+
+
+class RewindView(object):
+    def __init__(self):
+        """
+        Initializes the RewindView object, which draws snapshots without touching the live game.
+        """
+        self.sheet = loadSheet()
+        self.images = {}  # Sheet offset -> sprite
+
+    def image(self, sx, sy):
+        key = (sx, sy)
+        if key not in self.images:
+            self.images[key] = self.sheet.subsurface(pygame.Rect(sx, sy, 2*TILEWIDTH, 2*TILEHEIGHT).clip(self.sheet.get_rect()))
+        return self.images[key]
+
+    def render(self, screen, snapshot, camera):
+        """
+        Draws a snapshot the way GameController.render draws the game.
+
+        Args:
+            screen (pygame.Surface): The surface to draw on.
+            snapshot (Snapshot): The state to show.
+            camera (Camera): The view, it follows the primary Pac-Man of the snapshot.
+        """
+        primary = snapshot.entities[0]
+        camera.follow(Vector2(float(primary["x"]), float(primary["y"])))
+        if not camera.covers():
+            screen.fill(BLACK)
+        snapshot.background.render(screen, camera)
+        offset = camera.offset
+        row0, row1, col0, col1 = camera.visibleTiles()
+        grid = snapshot.grid[max(row0, 0):row1, max(col0, 0):col1]
+        kinds = (PELLET,) if snapshot.pause & POWERHIDDEN else (PELLET, POWERPELLET)
+        for row, col in np.argwhere(np.isin(grid, kinds)).tolist():
+            row += max(row0, 0)
+            col += max(col0, 0)
+            radius = int(2 * TILEWIDTH / 16) if snapshot.grid[row, col] == PELLET else int(8 * TILEWIDTH / 16)
+            center = (int(col*TILEWIDTH + TILEWIDTH/2 - offset.x), int(row*TILEHEIGHT + TILEHEIGHT/2 - offset.y))
+            pygame.draw.circle(screen, WHITE, center, radius)
+        # The fruit first, then Pac-Men and ghosts, the order GameController.render uses
+        entities = snapshot.entities
+        for row in np.concatenate([entities[-1:], entities[:-1]]):
+            flags = row["flags"]
+            if flags & PRESENT and flags & VISIBLE and flags & HASIMAGE:
+                position = (float(row["x"]) - offset.x - TILEWIDTH / 2, float(row["y"]) - offset.y - TILEHEIGHT / 2)
+                screen.blit(self.image(int(row["sx"]), int(row["sy"])), position)
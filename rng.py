@@ -0,0 +1,137 @@
+#seeded random number streams so every game instance draws from its own generator
+
+import numpy as np
+
+# First element of a stream key, so streams for different consumers never overlap
+STREAMGHOSTS = 0  # (STREAMGHOSTS, game, level, ghost) -> one stream per ghost per level
+STREAMACTIONS = 1  # (STREAMACTIONS,) -> the environment's sticky actions
+STREAMAGENT = 2  # (STREAMAGENT,) -> decisions of a scripted agent
+STREAMMAZE = 3  # (STREAMMAZE, index) -> layout of a generated maze
+STREAMSWARM = 4  # (STREAMSWARM, game, level) -> FREIGHT turns of the ghost swarm
+STREAMDATASET = 5  # (STREAMDATASET,) -> minibatches sampled from a trajectory dataset
+
+class RandomStream(object):
+    def __init__(self, seedsequence=None, batch=4096):
+        """
+        Initializes the RandomStream object.
+
+        Values are generated by a PCG64 generator in batches of batch doubles
+        and handed out one at a time, which keeps single draws cheap.
+
+        Args:
+            seedsequence (SeedSequence, optional): Where the stream starts. Defaults to fresh OS entropy.
+            batch (int, optional): Number of values generated at once. Defaults to 4096.
+        """
+        self.generator = np.random.Generator(np.random.PCG64(seedsequence))
+        self.batch = batch
+        self.values = []
+        self.index = 0
+        self.origin = None  # Generator state the current batch was generated from
+
+    def refill(self):
+        self.origin = self.generator.bit_generator.state
+        self.values = self.generator.random(self.batch).tolist()
+        self.index = 0
+
+    def random(self):
+        """
+        Draws one float.
+
+        Returns:
+            float: A value in [0, 1).
+        """
+        if self.index >= len(self.values):
+            self.refill()
+        value = self.values[self.index]
+        self.index += 1
+        return value
+
+    def choice(self, items):
+        """
+        Picks one element of a sequence uniformly.
+
+        Args:
+            items (sequence): A non-empty sequence.
+
+        Returns:
+            The chosen element.
+        """
+        return items[int(self.random() * len(items))]
+
+    def draw(self, count):
+        """
+        Draws many floats at once, straight from the generator.
+
+        Args:
+            count (int): Number of values.
+
+        Returns:
+            numpy.ndarray: count values in [0, 1).
+        """
+        return self.generator.random(count)
+
+    def getState(self):
+        """
+        Returns everything needed to continue the stream later.
+
+        The current batch is not copied: it is kept as the state it was
+        generated from and how far into it the stream is, so the state
+        stays a few dozen bytes whatever the batch size.
+
+        Returns:
+            tuple: The batch's starting state (None before the first batch), the position in the batch and the generator state.
+        """
+        return self.origin, self.index, self.generator.bit_generator.state
+
+    def setState(self, state):
+        """
+        Continues the stream from a state returned by getState.
+
+        Args:
+            state (tuple): The saved state.
+        """
+        origin, index, current = state
+        if origin is None:
+            self.values = []
+            self.origin = None
+        else:
+            self.generator.bit_generator.state = origin
+            self.refill()  # The same batch again, generated from the same state
+        self.index = index
+        self.generator.bit_generator.state = current
+
+
+class RandomSource(object):
+    def __init__(self, seed=None):
+        """
+        Initializes the RandomSource object, the root of a game's streams.
+
+        Every stream is derived from the seed and a key, not from the streams
+        drawn before it, so ghosts, levels and games can be simulated in any
+        order or in separate processes and still get the same values.
+
+        Args:
+            seed (int, optional): The seed. Defaults to fresh OS entropy.
+        """
+        self.seed(seed)
+
+    def seed(self, seed=None):
+        """
+        Replaces the seed all later streams are derived from.
+
+        Args:
+            seed (int, optional): The seed. Defaults to fresh OS entropy.
+        """
+        self.entropy = np.random.SeedSequence(seed).entropy
+
+    def stream(self, *key):
+        """
+        Creates the stream for a key.
+
+        Args:
+            *key (int): Identifies the consumer, see the STREAM constants.
+
+        Returns:
+            RandomStream: A stream that only depends on the seed and the key.
+        """
+        return RandomStream(np.random.SeedSequence(self.entropy, spawn_key=key))
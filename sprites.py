@@ -1,5 +1,7 @@
+import threading
 import pygame
 from constants import *
+from mazedata import loadMazeFile
 import numpy as np
 from animation import Animator
 
@@ -7,20 +9,30 @@ BASETILEWIDTH = 16
 BASETILEHEIGHT = 16
 DEATH = 5
 
+sheetCache = {}
+sheetLock = threading.Lock()
+
+def loadSheet(path="spritesheet.png"):
+    # Every sprite class shares one decoded and scaled copy of the sheet
+    with sheetLock:
+        if path not in sheetCache:
+            sheet = pygame.image.load(path).convert()
+            transcolor = sheet.get_at((0,0))
+            sheet.set_colorkey(transcolor)
+            width = int(sheet.get_width() / BASETILEWIDTH * TILEWIDTH)
+            height = int(sheet.get_height() / BASETILEHEIGHT * TILEHEIGHT)
+            sheetCache[path] = pygame.transform.scale(sheet, (width, height))
+        return sheetCache[path]
+
 class Spritesheet(object):
     def __init__(self):
-        self.sheet = pygame.image.load("spritesheet.png").convert()
-        transcolor = self.sheet.get_at((0,0))
-        self.sheet.set_colorkey(transcolor)
-        width = int(self.sheet.get_width() / BASETILEWIDTH * TILEWIDTH)
-        height = int(self.sheet.get_height() / BASETILEHEIGHT * TILEHEIGHT)
-        self.sheet = pygame.transform.scale(self.sheet, (width, height))
+        self.sheet = loadSheet()
 
     def getImage(self, x, y, width, height):
         x *= TILEWIDTH
         y *= TILEHEIGHT
-        self.sheet.set_clip(pygame.Rect(x, y, width, height))
-        return self.sheet.subsurface(self.sheet.get_clip())
+        rect = pygame.Rect(x, y, width, height).clip(self.sheet.get_rect())
+        return self.sheet.subsurface(rect)
 
 
 class PacmanSprites(Spritesheet):
@@ -105,6 +117,26 @@ class GhostSprites(Spritesheet):
                self.entity.image = self.getImage(8, 4)
 
 
+class SwarmSprites(Spritesheet):
+    def __init__(self):
+        # Every image GhostSprites can pick, indexed by ghost kind, mode and direction index (UP, DOWN, LEFT, RIGHT, STOP)
+        Spritesheet.__init__(self)
+        rows = {0:4, 1:6, 2:8, 3:10, 4:4}
+        self.table = np.empty((4, 4, 5), dtype=object)
+        for kind, x in enumerate((0, 2, 4, 6)):
+            for d, y in rows.items():
+                self.table[kind, SCATTER, d] = self.getImage(x, y)
+                self.table[kind, CHASE, d] = self.getImage(x, y)
+                self.table[kind, FREIGHT, d] = self.getImage(10, 4)
+                self.table[kind, SPAWN, d] = self.getImage(8, y)
+
+    def getImage(self, x, y):
+        return Spritesheet.getImage(self, x, y, 2*TILEWIDTH, 2*TILEHEIGHT)
+
+    def images(self, kinds, modes, directions):
+        return self.table[kinds, modes, directions].tolist()
+
+
 class FruitSprites(Spritesheet):
     def __init__(self, entity, level):
         Spritesheet.__init__(self)
@@ -127,8 +159,10 @@ class LifeSprites(Spritesheet):
     def removeImage(self):
         if len(self.images) > 0:
             self.images.pop(0)
+            self.dirty = True
 
     def resetLives(self, numlives):
+        self.dirty = True
         self.images = []
         for i in range(numlives):
             self.images.append(self.getImage(0,0))
@@ -147,22 +181,26 @@ class MazeSprites(Spritesheet):
         return Spritesheet.getImage(self, x, y, TILEWIDTH, TILEHEIGHT)
 
     def readMazeFile(self, mazefile):
-        return np.loadtxt(mazefile, dtype='<U1')
-
-    def constructBackground(self, background, y):
-        for row in list(range(self.data.shape[0])):
-            for col in list(range(self.data.shape[1])):
-                if self.data[row][col].isdigit():
-                    x = int(self.data[row][col]) + 12
-                    sprite = self.getImage(x, y)
-                    rotval = int(self.rotdata[row][col])
-                    sprite = self.rotate(sprite, rotval)
-                    background.blit(sprite, (col*TILEWIDTH, row*TILEHEIGHT))
-                elif self.data[row][col] == '=':
-                    sprite = self.getImage(10, 8)
-                    background.blit(sprite, (col*TILEWIDTH, row*TILEHEIGHT))
-
-        return background
+        return loadMazeFile(mazefile)
+
+    def drawRegion(self, y, background, row0, col0, rows, cols):
+        # Draws a block of tiles with tile (row0, col0) at the top left corner of the surface, one chunk of a big maze
+        origin = (col0*TILEWIDTH, row0*TILEHEIGHT)
+        for row in range(row0, row0 + rows):
+            for col in range(col0, col0 + cols):
+                self.drawTile(background, y, row, col, origin)
+
+    def drawTile(self, background, y, row, col, origin=(0, 0)):
+        position = (col*TILEWIDTH - origin[0], row*TILEHEIGHT - origin[1])
+        if self.data[row][col].isdigit():
+            x = int(self.data[row][col]) + 12
+            sprite = self.getImage(x, y)
+            rotval = int(self.rotdata[row][col])
+            sprite = self.rotate(sprite, rotval)
+            background.blit(sprite, position)
+        elif self.data[row][col] == '=':
+            sprite = self.getImage(10, 8)
+            background.blit(sprite, position)
 
     def rotate(self, sprite, value):
        return pygame.transform.rotate(sprite, value*90)
\ No newline at end of file
@@ -0,0 +1,151 @@
+#times startup phases and loads assets on background threads
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+class StartupTimer(object):
+    def __init__(self):
+        """
+        Initializes the StartupTimer object and starts the clock.
+        """
+        self.start = time.perf_counter()  # Reference point for every phase
+        self.phases = []  # (name, thread name, start offset, duration) per phase
+        self.firstFrame = None  # Seconds until the first frame was shown
+        self.counters = {}  # Running totals reported by the game loop, such as the frame pacer
+        self.lock = threading.Lock()  # Phases are recorded from several threads
+
+    def measure(self, name, func, *args):
+        """
+        Runs a function and records how long it took.
+
+        Args:
+            name (str): The name of the phase.
+            func (callable): The function to run.
+
+        Returns:
+            The return value of the function.
+        """
+        began = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            ended = time.perf_counter()
+            with self.lock:
+                self.phases.append((name, threading.current_thread().name, began - self.start, ended - began))
+
+    def count(self, name, amount=1):
+        """
+        Adds to a named counter.
+
+        Args:
+            name (str): The counter.
+            amount (float, optional): How much to add. Defaults to 1.
+        """
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def markFirstFrame(self):
+        """
+        Records the moment the first frame reached the screen.
+        """
+        if self.firstFrame is None:
+            self.firstFrame = time.perf_counter() - self.start
+
+    def report(self):
+        """
+        Builds a human readable breakdown of the startup phases and counters.
+
+        Returns:
+            str: One line per phase, in the order the phases started.
+        """
+        with self.lock:
+            phases = sorted(self.phases, key=lambda phase: phase[2])
+        lines = ["Startup breakdown:"]
+        for name, thread, offset, duration in phases:
+            lines.append("  %-12s %7.1f ms  (at %7.1f ms, %s)" % (name, duration * 1000, offset * 1000, thread))
+        if self.firstFrame is not None:
+            lines.append("  first frame  %7.1f ms" % (self.firstFrame * 1000))
+        lines.append("  total        %7.1f ms" % ((time.perf_counter() - self.start) * 1000))
+        with self.lock:
+            counters = sorted(self.counters.items())
+        for name, value in counters:
+            lines.append("  %-26s %g" % (name, value))
+        return "\n".join(lines)
+
+
+class AssetLoader(object):
+    def __init__(self, timer, workers=3):
+        """
+        Initializes the AssetLoader object.
+
+        Args:
+            timer (StartupTimer): The timer that records how long each job takes.
+            workers (int, optional): Number of background threads. Defaults to 3.
+        """
+        self.timer = timer
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="assets")
+        self.jobs = {}  # Futures keyed by job name
+
+    def submit(self, name, func, *args):
+        """
+        Starts a job on a background thread, replacing any earlier job with the same name.
+
+        Args:
+            name (str): The name used to collect the result later.
+            func (callable): The function that builds the asset.
+        """
+        self.jobs[name] = self.executor.submit(self.timer.measure, name, func, *args)
+
+    def ready(self, name):
+        """
+        Checks whether a job has finished.
+
+        Args:
+            name (str): The name of the job.
+
+        Returns:
+            bool: True if the job exists and is done, False otherwise.
+        """
+        return name in self.jobs and self.jobs[name].done()
+
+    def take(self, name):
+        """
+        Waits for a job and removes it from the loader.
+
+        Args:
+            name (str): The name of the job.
+
+        Returns:
+            The result of the job, or None if no such job was submitted.
+        """
+        job = self.jobs.pop(name, None)
+        if job is None:
+            return None
+        return job.result()
+
+    def discard(self, name):
+        """
+        Forgets a job without waiting for it, for results that went out of date.
+
+        Args:
+            name (str): The name of the job.
+        """
+        self.jobs.pop(name, None)
+
+    def whenReady(self, name, func):
+        """
+        Calls a function with the result of a job once it finishes.
+
+        Args:
+            name (str): The name of the job.
+            func (callable): Called with the job result, right away if the job is already done.
+        """
+        if name in self.jobs:
+            self.jobs[name].add_done_callback(lambda job: func(job.result()))
+
+    def shutdown(self):
+        """
+        Stops the background threads once the queued jobs are done.
+        """
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,321 @@
+#moves hundreds of ghosts at once, their state kept in numpy arrays
+
+import numpy as np
+from constants import *
+from rng import RandomStream
+from sprites import SwarmSprites
+
+# Array direction index -> direction constant, the order validDirections tries them in
+DIRECTIONS = np.array([UP, DOWN, LEFT, RIGHT, STOP])
+DIRINDEX = {UP:0, DOWN:1, LEFT:2, RIGHT:3, STOP:4}
+STOPINDEX = 4
+OPPOSITE = np.array([1, 0, 3, 2, 4])  # Index of the reverse of each direction, STOP stays STOP
+STEPS = np.array([[0, -1], [0, 1], [-1, 0], [1, 0], [0, 0]], dtype=np.float64)
+
+# Ghost kinds in the swarm, each chases the way the ghost of that name does
+KINDS = (BLINKY, PINKY, INKY, CLYDE)
+
+class NodeArrays(object):
+    def __init__(self, nodes, names=KINDS):
+        """
+        Initializes the NodeArrays object, a copy of the node graph as arrays.
+
+        Args:
+            nodes (NodeGroup): The graph to copy.
+            names (tuple, optional): Entity names whose access rules are copied. Defaults to KINDS.
+        """
+        self.nodes = list(nodes.nodesLUT.values())
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        count = len(self.nodes)
+        self.positions = np.array([node.position.asTuple() for node in self.nodes], dtype=np.float64).reshape(count, 2)
+        self.neighbors = np.full((count, 5), -1, dtype=np.int64)  # UP, DOWN, LEFT, RIGHT, PORTAL
+        self.access = np.zeros((len(names), count, 4), dtype=bool)  # Name, node, direction
+        for i, node in enumerate(self.nodes):
+            for d, direction in enumerate((UP, DOWN, LEFT, RIGHT, PORTAL)):
+                if node.neighbors[direction] is not None:
+                    self.neighbors[i, d] = self.index[node.neighbors[direction]]
+            for k, name in enumerate(names):
+                for d, direction in enumerate((UP, DOWN, LEFT, RIGHT)):
+                    self.access[k, i, d] = name in node.access[direction]
+
+
+class GhostSwarm(object):
+    def __init__(self, nodes, pacman, count, mainmode, spawnNode, homeNode, bounds, rng=None):
+        """
+        Initializes the GhostSwarm object.
+
+        Every ghost follows the Ghost and Entity movement rules: it picks a
+        direction each time it reaches a node, heading for its goal in
+        SCATTER, CHASE and SPAWN and at random in FREIGHT. The state of all
+        ghosts lives in arrays and each update is a few vectorized passes,
+        with Python only touching the ghosts that reached a node.
+
+        Args:
+            nodes (NodeGroup): The node graph, copied into arrays.
+            pacman (Pacman): The Pac-Man the ghosts hunt.
+            count (int): Number of ghosts, kinds go Blinky, Pinky, Inky, Clyde in turn.
+            mainmode (MainMode): The shared scatter/chase scheduler.
+            spawnNode (Node): Where eaten ghosts return to.
+            homeNode (Node): The node above the ghost house, only eaten ghosts may go down from it.
+            bounds (tuple): (width, height) of the maze in pixels, for the scatter corners.
+            rng (RandomStream, optional): Source of the FREIGHT directions. Defaults to an unseeded stream.
+        """
+        self.graph = NodeArrays(nodes)
+        self.spawnNode = self.graph.index[spawnNode]
+        self.homeNode = self.graph.index[homeNode]
+        self.pacman = pacman
+        self.pacmen = None  # PacmanGroup when several Pac-Men play, each ghost chases the nearest
+        self.count = count
+        self.mainmode = mainmode
+        self.mainmode.subscribe(self)
+        self.rng = rng if rng is not None else RandomStream()
+        width, height = bounds
+        self.corners = np.array([[0, 0], [width, 0], [width, height], [0, height]], dtype=np.float64)
+        self.kind = np.arange(count) % len(KINDS)
+        blinkies = np.flatnonzero(self.kind == 0)
+        # Every Inky works with the Blinky of its own set of four, the way Inky uses blinky
+        self.leader = blinkies[np.minimum(np.arange(count) // len(KINDS), len(blinkies) - 1)]
+        self.collideRadius = 5
+        self.points = 200
+        self.visible = True
+        self.sprites = SwarmSprites()
+        self.place(None)
+
+    def place(self, starts):
+        """
+        Puts every ghost on a node, standing still.
+
+        Args:
+            starts (list): A Node per ghost, None to spread the ghosts evenly over the maze.
+        """
+        if starts is None:
+            # Spread over the maze, but not within 8 tiles of Pac-Man's start or he would die straight away
+            start = np.array(self.pacman.position.asTuple())
+            far = np.flatnonzero(((self.graph.positions - start) ** 2).sum(axis=1) > (TILEWIDTH * 8) ** 2)
+            if len(far) == 0:
+                far = np.arange(len(self.graph.nodes))
+            self.startNodes = far[np.arange(self.count) * len(far) // max(self.count, 1)]
+        else:
+            self.startNodes = np.array([self.graph.index[node] for node in starts], dtype=np.int64)
+        self.reset()
+
+    def reset(self):
+        """
+        Sends every ghost back to its start node.
+        """
+        self.node = self.startNodes.copy()
+        self.target = self.startNodes.copy()
+        self.position = self.graph.positions[self.node].copy()
+        self.direction = np.full(self.count, STOPINDEX, dtype=np.int64)
+        self.speed = np.full(self.count, 100 * TILEWIDTH / 16)
+        self.mode = np.full(self.count, self.mainmode.mode, dtype=np.int8)
+        self.homeAccess = np.zeros(self.count, dtype=bool)  # Eaten ghosts may enter the house
+        self.goal = np.zeros((self.count, 2))
+        self.points = 200
+        self.visible = True
+
+    def relink(self, nodes, spawnNode, homeNode):
+        """
+        Copies the node graph again after it was patched, keeping every ghost on its node.
+
+        Args:
+            nodes (NodeGroup): The patched graph.
+            spawnNode (Node): Where eaten ghosts return to.
+            homeNode (Node): The node above the ghost house.
+        """
+        old = self.graph
+        self.graph = NodeArrays(nodes)
+        self.spawnNode = self.graph.index[spawnNode]
+        self.homeNode = self.graph.index[homeNode]
+        kept = np.array([self.graph.index.get(node, -1) for node in old.nodes], dtype=np.int64)
+        # Old node index -> new node index, nodes that were deleted go to the closest node that is left
+        mapping = kept.copy()
+        for i in np.flatnonzero(kept < 0):
+            mapping[i] = ((self.graph.positions - old.positions[i]) ** 2).sum(axis=1).argmin()
+        lost = (kept[self.node] < 0) | (kept[self.target] < 0)
+        self.startNodes = mapping[self.startNodes]
+        self.node = mapping[self.node]
+        self.target = mapping[self.target]
+        self.target[lost] = self.node[lost]
+        self.position[lost] = self.graph.positions[self.node[lost]]
+
+    def setTargets(self, pacmen):
+        """
+        Lets every ghost chase the nearest of several Pac-Men.
+
+        Args:
+            pacmen (PacmanGroup): The Pac-Men in the maze.
+        """
+        self.pacmen = pacmen
+
+    def mainModeChanged(self):
+        normal = (self.mode == SCATTER) | (self.mode == CHASE)
+        self.mode[normal] = self.mainmode.mode
+
+    def endFreight(self):
+        self.normalMode(self.mode == FREIGHT)
+
+    def normalMode(self, mask):
+        self.mode[mask] = self.mainmode.mode
+        self.speed[mask] = 100 * TILEWIDTH / 16
+        self.homeAccess[mask] = False
+
+    def startFreight(self):
+        """
+        Frightens every ghost that is not on its way back to the house.
+        """
+        mask = self.mode != SPAWN
+        if mask.any():
+            self.mainmode.startFreight()
+            self.mode[mask] = FREIGHT
+            self.speed[mask] = 50 * TILEWIDTH / 16
+        self.points = 200
+
+    def startSpawn(self, indices):
+        """
+        Sends eaten ghosts back to the house.
+
+        Args:
+            indices (numpy.ndarray): The ghosts that were eaten.
+        """
+        indices = indices[self.mode[indices] == FREIGHT]
+        self.mode[indices] = SPAWN
+        self.speed[indices] = 150 * TILEWIDTH / 16
+        self.homeAccess[indices] = True
+        self.goal[indices] = self.graph.positions[self.spawnNode]
+
+    def updateGoals(self):
+        # The vectorized form of Ghost.scatter and each ghost's chase
+        scatter = self.mode == SCATTER
+        self.goal[scatter] = self.corners[self.kind[scatter]]
+        chase = np.flatnonzero(self.mode == CHASE)
+        if len(chase) == 0:
+            return
+        hunted = [self.pacman] if self.pacmen is None else (self.pacmen.alive() or [self.pacmen.primary])
+        pacman = np.array([p.position.asTuple() for p in hunted])
+        ahead = np.array([p.directions[p.direction].asTuple() for p in hunted]) * TILEWIDTH
+        kind = self.kind[chase]
+        if len(hunted) > 1:
+            # One row per chasing ghost, the Pac-Man nearest to it, ties to the lower player number.
+            # Inky hunts the one its Blinky hunts, like Inky.pickTarget
+            hunters = np.where(kind == 2, self.leader[chase], chase)
+            nearest = ((self.position[hunters][:, None, :] - pacman[None]) ** 2).sum(axis=2).argmin(axis=1)
+        else:
+            nearest = np.zeros(len(chase), dtype=np.int64)
+        pacman = pacman[nearest]
+        ahead = ahead[nearest]
+        goals = np.empty((len(chase), 2))
+        goals[:] = pacman  # Blinky
+        pinky = kind == 1
+        goals[pinky] = pacman[pinky] + ahead[pinky] * 4  # Pinky
+        inky = kind == 2
+        if inky.any():
+            blinky = self.position[self.leader[chase[inky]]]
+            goals[inky] = blinky + (pacman[inky] + ahead[inky] * 2 - blinky) * 2
+        clyde = kind == 3
+        if clyde.any():
+            near = ((pacman[clyde] - self.position[chase[clyde]]) ** 2).sum(axis=1) <= (TILEWIDTH * 8) ** 2
+            goals[clyde] = np.where(near[:, None], self.corners[3], pacman[clyde] + ahead[clyde] * 4)
+        self.goal[chase] = goals
+
+    def update(self, dt):
+        """
+        Moves every ghost, choosing new directions for those that reached a node.
+
+        Args:
+            dt (float): Time elapsed since the last update.
+        """
+        graph = self.graph
+        back = (self.mode == SPAWN) & (self.node == self.spawnNode)
+        if back.any():
+            self.normalMode(back)
+        self.updateGoals()
+        self.position += STEPS[self.direction] * (self.speed * dt)[:, None]
+        nodePos = graph.positions[self.node]
+        reach = ((graph.positions[self.target] - nodePos) ** 2).sum(axis=1)
+        moved = ((self.position - nodePos) ** 2).sum(axis=1)
+        arrived = np.flatnonzero(moved >= reach)
+        if len(arrived):
+            self.turn(arrived)
+
+    def allowed(self, ghosts, nodes):
+        # Which of UP, DOWN, LEFT, RIGHT each ghost may take from a node, the vectorized validDirection
+        allowed = self.graph.access[self.kind[ghosts], nodes] & (self.graph.neighbors[nodes, :4] >= 0)
+        home = (nodes == self.homeNode) & self.homeAccess[ghosts]
+        allowed[home, 1] = self.graph.neighbors[self.homeNode, 1] >= 0
+        return allowed
+
+    def turn(self, ghosts):
+        # Entity.update for the ghosts that overshot their target
+        graph = self.graph
+        node = self.target[ghosts]
+        direction = self.direction[ghosts]
+        rows = np.arange(len(ghosts))
+        valid = self.allowed(ghosts, node)
+        valid[rows, np.minimum(OPPOSITE[direction], 3)] &= OPPOSITE[direction] == STOPINDEX  # No turning back
+        options = valid.sum(axis=1)
+        # Goal seeking: the valid direction whose next tile is closest to the goal, ties to the earlier one
+        ahead = graph.positions[node][:, None, :] + STEPS[None, :4] * TILEWIDTH
+        distance = ((ahead - self.goal[ghosts][:, None, :]) ** 2).sum(axis=2)
+        distance[~valid] = np.inf
+        choice = distance.argmin(axis=1)
+        freight = np.flatnonzero((self.mode[ghosts] == FREIGHT) & (options > 0))
+        if len(freight):
+            # randomDirection: the k-th valid direction for a uniform k, as RandomStream.choice picks
+            k = (self.rng.draw(len(freight)) * options[freight]).astype(np.int64)
+            order = np.cumsum(valid[freight], axis=1) - 1
+            choice[freight] = (valid[freight] & (order == k[:, None])).argmax(axis=1)
+        choice[options == 0] = OPPOSITE[direction[options == 0]]  # Dead end, the only way is back
+        portal = graph.neighbors[node, 4]
+        node = np.where(portal >= 0, portal, node)
+        allowed = np.concatenate([self.allowed(ghosts, node), np.zeros((len(ghosts), 1), dtype=bool)], axis=1)
+        neighbors = np.concatenate([graph.neighbors[node, :4], node[:, None]], axis=1)
+        turned = allowed[rows, choice]
+        kept = allowed[rows, direction]
+        target = np.where(turned, neighbors[rows, choice], np.where(kept, neighbors[rows, direction], node))
+        self.direction[ghosts] = np.where(turned, choice, direction)
+        self.node[ghosts] = node
+        self.target[ghosts] = target
+        self.position[ghosts] = graph.positions[node]
+
+    def collide(self, entity):
+        """
+        Finds the ghosts touching an entity.
+
+        Args:
+            entity (Entity): Usually Pac-Man.
+
+        Returns:
+            numpy.ndarray: Indices of the touching ghosts.
+        """
+        d = self.position - np.array(entity.position.asTuple())
+        return np.flatnonzero((d ** 2).sum(axis=1) <= (self.collideRadius + entity.collideRadius) ** 2)
+
+    def hide(self):
+        self.visible = False
+
+    def show(self):
+        self.visible = True
+
+    def render(self, screen, camera=None):
+        """
+        Draws the ghosts that are on screen.
+
+        Args:
+            screen (pygame.Surface): The surface to draw on.
+            camera (Camera, optional): The view of a maze bigger than the screen. Defaults to None.
+        """
+        if not self.visible:
+            return
+        offset = np.zeros(2)
+        shown = np.arange(self.count)
+        if camera is not None:
+            offset = np.array(camera.offset.asTuple())
+            margin = 2 * TILEWIDTH
+            low = offset - margin
+            high = offset + (camera.width + margin, camera.height + margin)
+            inside = ((self.position >= low) & (self.position <= high)).all(axis=1)
+            shown = np.flatnonzero(inside)
+        corners = self.position[shown] - offset - (TILEWIDTH / 2, TILEHEIGHT / 2)
+        images = self.sprites.images(self.kind[shown], self.mode[shown], self.direction[shown])
+        screen.blits(list(zip(images, corners.tolist())), doreturn=False)
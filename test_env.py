@@ -0,0 +1,31 @@
+#checks that PacmanEnv keeps its observations right when the maze changes size
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+import numpy as np
+from env import PacmanEnv
+from mazegen import generateMaze, writeMaze
+
+def writeMazes(directory):
+    # One maze of the default size and a larger one
+    names = []
+    for i, options in enumerate(({}, {"cols": 10, "rows": 12})):
+        name = os.path.join(str(directory), "maze%d" % i)
+        writeMaze(name, *generateMaze(0, i, **options))
+        names.append(name)
+    return tuple(names)
+
+def test_observations_follow_maze_size(tmp_path):
+    small, big = writeMazes(tmp_path)
+    env = PacmanEnv(mazes=(small, big), startLevel=1)
+    for level in (1, 0):
+        env.startLevel = level
+        obs, info = env.reset(seed=0)
+        shape = env.game.pellets.grid.shape
+        for key in ("pellets", "walls", "pelletDistance", "powerDistance"):
+            assert obs[key].shape == shape
+        np.testing.assert_array_equal(obs["pellets"], env.game.pellets.grid)
+        np.testing.assert_array_equal(obs["pelletDistance"], env.game.distances.pellet.distance)
+        obs = env.step(1)[0]
+        assert obs is env.obs
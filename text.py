@@ -1,7 +1,26 @@
+import threading
+from functools import partial
 import pygame
 from vector import Vector2
 from constants import *
 
+FONTPATH = "PressStart2P-Regular.ttf"
+fontCache = {}
+fontLock = threading.Lock()
+
+def loadFont(fontpath, size):
+    # Fonts are opened once per size and shared by every Text
+    with fontLock:
+        if (fontpath, size) not in fontCache:
+            fontCache[(fontpath, size)] = pygame.font.Font(fontpath, size)
+        return fontCache[(fontpath, size)]
+
+def preloadFonts(sizes=(TILEHEIGHT, 8)):
+    # Opens the fonts the HUD and score popups use
+    pygame.font.init()
+    for size in sizes:
+        loadFont(FONTPATH, size)
+
 class Text(object):
     def __init__(self, text, color, x, y, size, time=None, id=None, visible=True):
         self.id = id
@@ -10,15 +29,13 @@ class Text(object):
         self.size = size
         self.visible = visible
         self.position = Vector2(x, y)
-        self.timer = 0
         self.lifespan = time
         self.label = None
-        self.destroy = False
-        self.setupFont("PressStart2P-Regular.ttf")
+        self.setupFont(FONTPATH)
         self.createLabel()
 
     def setupFont(self, fontpath):
-        self.font = pygame.font.Font(fontpath, self.size)
+        self.font = loadFont(fontpath, self.size)
 
     def createLabel(self):
         self.label = self.font.render(self.text, 1, self.color)
@@ -27,34 +44,40 @@ class Text(object):
         self.text = str(newtext)
         self.createLabel()
 
-    def update(self, dt):
-        if self.lifespan is not None:
-            self.timer += dt
-            if self.timer >= self.lifespan:
-                self.timer = 0
-                self.lifespan = None
-                self.destroy = True
-
-    def render(self, screen):
+    def render(self, screen, camera=None):
         if self.visible:
             x, y = self.position.asTuple()
+            if camera is not None:
+                x, y = x - camera.offset.x, y - camera.offset.y  # Popups sit at world positions
             screen.blit(self.label, (x, y))
 
 
 class TextGroup(object):
-    def __init__(self):
+    def __init__(self, timers):
+        self.timers = timers
         self.nextid = 10
         self.alltext = {}
+        self.popups = {}
+        self.dirty = True
         self.setupText()
         self.showText(READYTXT)
 
     def addText(self, text, color, x, y, size, time=None, id=None):
         self.nextid += 1
-        self.alltext[self.nextid] = Text(text, color, x, y, size, time=time, id=id)
+        if time is None:
+            self.alltext[self.nextid] = Text(text, color, x, y, size, time=time, id=id)
+            self.dirty = True
+        else:
+            self.popups[self.nextid] = Text(text, color, x, y, size, time=time, id=id)
+            self.timers.schedule(time, partial(self.removeText, self.nextid), HUDTIMERS)
         return self.nextid
 
     def removeText(self, id):
-        self.alltext.pop(id)
+        if id in self.popups:
+            self.popups.pop(id)
+        elif id in self.alltext:
+            self.alltext.pop(id)
+            self.dirty = True
 
     def setupText(self):
         size = TILEHEIGHT
@@ -66,20 +89,16 @@ class TextGroup(object):
         self.addText("SCORE", WHITE, 0, 0, size)
         self.addText("LEVEL", WHITE, 23*TILEWIDTH, 0, size)
 
-    def update(self, dt):
-        for tkey in list(self.alltext.keys()):
-            self.alltext[tkey].update(dt)
-            if self.alltext[tkey].destroy:
-                self.removeText(tkey)
-
     def showText(self, id):
         self.hideText()
         self.alltext[id].visible = True
+        self.dirty = True
 
     def hideText(self):
         self.alltext[READYTXT].visible = False
         self.alltext[PAUSETXT].visible = False
         self.alltext[GAMEOVERTXT].visible = False
+        self.dirty = True
 
     def updateScore(self, score):
         self.updateText(SCORETXT, str(score).zfill(8))
@@ -88,9 +107,18 @@ class TextGroup(object):
         self.updateText(LEVELTXT, str(level + 1).zfill(3))
 
     def updateText(self, id, value):
-        if id in self.alltext.keys():
+        if id in self.alltext.keys() and self.alltext[id].text != str(value):
             self.alltext[id].setText(value)
+            self.dirty = True
+
+    def renderStatic(self, screen):
+        for text in self.alltext.values():
+            text.render(screen)
+
+    def renderPopups(self, screen, camera=None):
+        for text in self.popups.values():
+            text.render(screen, camera)
 
     def render(self, screen):
-        for tkey in list(self.alltext.keys()):
-            self.alltext[tkey].render(screen)
\ No newline at end of file
+        self.renderStatic(screen)
+        self.renderPopups(screen)
\ No newline at end of file
@@ -0,0 +1,185 @@
+#runs every timed game event from one place instead of per-object countdowns
+
+import heapq
+import itertools
+from constants import *
+
+class Timer(object):
+    def __init__(self, due, delay, func, group, repeat):
+        """
+        A scheduled callback. Only TimerService creates these.
+
+        Args:
+            due (float): Group clock time at which the timer fires.
+            delay (float): Seconds between scheduling and firing.
+            func (callable): Called with no arguments when the timer fires.
+            group (int): The timer group it belongs to.
+            repeat (bool): Schedule it again after every firing.
+        """
+        self.due = due
+        self.delay = delay
+        self.func = func
+        self.group = group
+        self.repeat = repeat
+        self.active = True  # Cleared by cancel, the heap entry is then skipped
+
+
+class TimerGroup(object):
+    def __init__(self):
+        # Every group has its own clock, which stands still while the group is paused
+        self.clock = 0.0
+        self.paused = False
+        self.heap = []
+
+
+class TimerService(object):
+    def __init__(self, groups=(WORLDTIMERS, LEVELTIMERS, HUDTIMERS, PAUSETIMERS)):
+        """
+        Initializes the TimerService object.
+
+        Timers are kept in one heap per group, ordered by when they are due,
+        so update only touches the timers that actually fire. Groups are
+        advanced in the order given here.
+
+        Args:
+            groups (tuple, optional): The timer groups. Defaults to the four game groups.
+        """
+        self.groups = {group: TimerGroup() for group in groups}
+        self.order = groups
+        self.counter = itertools.count()  # Keeps timers due at the same time in scheduling order
+
+    def schedule(self, delay, func, group=WORLDTIMERS, repeat=False):
+        """
+        Calls func once delay seconds of the group's time have passed.
+
+        Args:
+            delay (float): Seconds until the timer fires.
+            func (callable): Called with no arguments.
+            group (int, optional): The timer group. Defaults to WORLDTIMERS.
+            repeat (bool, optional): Keep firing every delay seconds until cancelled. Defaults to False.
+
+        Returns:
+            Timer: A handle for cancel and remaining.
+        """
+        timer = Timer(self.groups[group].clock + delay, delay, func, group, repeat)
+        self.push(timer)
+        return timer
+
+    def push(self, timer):
+        heapq.heappush(self.groups[timer.group].heap, (timer.due, next(self.counter), timer))
+
+    def cancel(self, timer):
+        """
+        Stops a timer from firing. Cancelling twice or after it fired is harmless.
+
+        Args:
+            timer (Timer): The handle returned by schedule.
+        """
+        if timer is not None:
+            timer.active = False
+
+    def cancelGroup(self, group):
+        """
+        Drops every timer in a group.
+
+        Args:
+            group (int): The timer group.
+        """
+        for entry in self.groups[group].heap:
+            entry[2].active = False
+        self.groups[group].heap = []
+
+    def setPaused(self, group, paused):
+        """
+        Freezes or resumes a group. Its timers keep the time they had left.
+
+        Args:
+            group (int): The timer group.
+            paused (bool): True to freeze the group.
+        """
+        self.groups[group].paused = paused
+
+    def remaining(self, timer):
+        """
+        Returns the seconds of group time left before a timer fires.
+
+        Args:
+            timer (Timer): The handle returned by schedule.
+
+        Returns:
+            float: Seconds left, 0 if the timer is no longer active.
+        """
+        if timer is None or not timer.active:
+            return 0
+        return max(timer.due - self.groups[timer.group].clock, 0)
+
+    def pending(self, group):
+        """
+        Returns the timers of a group that have yet to fire.
+
+        Args:
+            group (int): The timer group.
+
+        Returns:
+            list: The active timers, in the order they will fire.
+        """
+        return [entry[2] for entry in sorted(self.groups[group].heap, key=lambda entry: entry[:2]) if entry[2].active]
+
+    def restore(self, group, clock, timers):
+        """
+        Replaces a group's clock and timers, such as ones read from a checkpoint.
+
+        Args:
+            group (int): The timer group.
+            clock (float): The group's clock.
+            timers (list): Timers with their due times on that clock, in the order they should fire.
+        """
+        self.cancelGroup(group)
+        self.groups[group].clock = clock
+        for timer in timers:
+            timer.active = True
+            self.push(timer)
+
+    def nextDue(self):
+        """
+        Returns how long the service can sleep before anything fires.
+
+        Returns:
+            float: Seconds until the next active timer in a running group, or None if there is none.
+        """
+        soonest = None
+        for group in self.groups.values():
+            if group.paused:
+                continue
+            while group.heap and not group.heap[0][2].active:
+                heapq.heappop(group.heap)
+            if group.heap:
+                wait = group.heap[0][0] - group.clock
+                if soonest is None or wait < soonest:
+                    soonest = wait
+        return soonest if soonest is None else max(soonest, 0)
+
+    def update(self, dt):
+        """
+        Advances every running group and fires the timers that became due.
+
+        Args:
+            dt (float): Time elapsed since the last update.
+        """
+        for key in self.order:
+            group = self.groups[key]
+            if group.paused:
+                continue
+            group.clock += dt
+            while group.heap and group.heap[0][0] <= group.clock:
+                timer = heapq.heappop(group.heap)[2]
+                if not timer.active:
+                    continue
+                if timer.repeat:
+                    timer.due = group.clock + timer.delay
+                    self.push(timer)
+                else:
+                    timer.active = False
+                timer.func()
+                if self.groups[key].paused:
+                    break  # The callback paused the group, the rest waits until it resumes
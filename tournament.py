@@ -0,0 +1,252 @@
+#plays agents against ghost policies on the headless engine and ranks them from a SQLite store
+
+import os
+import time
+import hashlib
+import sqlite3
+import argparse
+import itertools
+import importlib
+import multiprocessing
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")  # Keep every worker from printing the pygame banner
+
+# Ghost policies are scatter/chase timelines, None plays the arcade tables of each level
+GHOSTPOLICIES = {"arcade": None,
+                 "chase": (0, None),  # No scatter phases at all
+                 "scatter": (None,),  # Ghosts never hunt Pac-Man
+                 "relentless": (2, 60, 2, None)}  # Short breaks, then chase for good
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    agent TEXT NOT NULL,
+    policy TEXT NOT NULL,
+    maze INTEGER NOT NULL,
+    seed INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    levels INTEGER NOT NULL,
+    deaths INTEGER NOT NULL,
+    steps INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (agent, policy, maze, seed)
+)
+"""
+
+# Settings every result in a store was played with, results played otherwise do not belong in it
+SETTINGS = """
+CREATE TABLE IF NOT EXISTS settings (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+)
+"""
+
+RANKING = """
+SELECT agent, COUNT(*), AVG(score), MAX(score), AVG(levels), AVG(deaths), AVG(steps)
+FROM results GROUP BY agent ORDER BY AVG(score) DESC
+"""
+
+MATCHUPS = """
+SELECT agent, policy, COUNT(*), AVG(score), AVG(levels), AVG(deaths),
+       RANK() OVER (PARTITION BY policy ORDER BY AVG(score) DESC)
+FROM results GROUP BY agent, policy ORDER BY policy, AVG(score) DESC
+"""
+
+envs = {}  # Environments already built by this worker, keyed by (policy, maze, maxSteps, mazes)
+
+def loadPolicy(name):
+    # A key of GHOSTPOLICIES, or "module:NAME" for a schedule defined elsewhere
+    if name in GHOSTPOLICIES:
+        return GHOSTPOLICIES[name]
+    module, _, attr = name.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+def playMatch(match):
+    """
+    Plays one game in a worker process.
+
+    Args:
+        match (tuple): (agent, policy, maze, seed, maxSteps, mazes).
+
+    Returns:
+        tuple: The result row, in the column order of the results table.
+    """
+    from env import PacmanEnv
+    from agents import loadAgent
+    agentName, policy, maze, seed, maxSteps, mazes = match
+    key = (policy, maze, maxSteps, mazes)
+    if key not in envs:
+        envs[key] = PacmanEnv(maxSteps=maxSteps, startLevel=maze, continueLevels=True,
+                              ghostSchedule=loadPolicy(policy), mazes=mazes)
+    env = envs[key]
+    agent = loadAgent(agentName)(seed)
+    began = time.perf_counter()
+    obs, info = env.reset(seed=seed)
+    agent.reset(obs)
+    terminated = truncated = False
+    while not (terminated or truncated):
+        obs, reward, terminated, truncated, info = env.step(agent.act(obs))
+    return (agentName, policy, maze, seed, info["score"], info["levelsCleared"], info["deaths"],
+            info["steps"], time.perf_counter() - began)
+
+
+class ResultStore(object):
+    def __init__(self, path):
+        """
+        Opens or creates the results database.
+
+        WAL mode lets the ranking queries read while a tournament is writing,
+        and synchronous=NORMAL only syncs at checkpoints, which is safe in
+        WAL mode and keeps commits cheap.
+
+        Args:
+            path (str): The database file.
+        """
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(SCHEMA)
+        self.connection.execute(SETTINGS)
+        self.connection.commit()
+
+    def claim(self, name, value):
+        """
+        Records a setting the store's results are played with, or checks it against the one recorded.
+
+        Args:
+            name (str): The setting.
+            value: Its value, compared as text.
+
+        Raises:
+            ValueError: If the store holds results played with another value.
+        """
+        with self.connection:
+            self.connection.execute("INSERT OR IGNORE INTO settings VALUES (?, ?)", (name, str(value)))
+        stored = self.connection.execute("SELECT value FROM settings WHERE name = ?", (name,)).fetchone()[0]
+        if stored != str(value):
+            raise ValueError("the store holds results played with %s %s, not %s" % (name, stored, value))
+
+    def finished(self):
+        """
+        Returns the matchups that already have a result.
+
+        Returns:
+            set: (agent, policy, maze, seed) tuples.
+        """
+        return set(self.connection.execute("SELECT agent, policy, maze, seed FROM results"))
+
+    def write(self, rows):
+        """
+        Stores a batch of results in one transaction.
+
+        Args:
+            rows (list): Result tuples from playMatch.
+        """
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def ranking(self):
+        return self.connection.execute(RANKING).fetchall()
+
+    def matchups(self):
+        return self.connection.execute(MATCHUPS).fetchall()
+
+    def close(self):
+        self.connection.close()
+
+
+def describeMazeSet(mazeSet):
+    # The maze set as stored in the settings table, the index of a maze in it is what the results refer to
+    if mazeSet is None:
+        return "maze1 maze2"
+    return "%d mazes %s" % (len(mazeSet), hashlib.sha1("\n".join(mazeSet).encode()).hexdigest())
+
+def runTournament(store, agents, policies, mazes, seeds, maxSteps=10000, workers=None,
+                  batch=500, flushTime=2.0, context=None, mazeSet=None):
+    """
+    Plays every (agent, policy, maze, seed) matchup that has no result yet.
+
+    Results are written from this process only, in batches of up to batch
+    rows or every flushTime seconds, whichever comes first. An interrupted
+    run loses at most the unwritten batch and picks up where it stopped.
+
+    Args:
+        store (ResultStore): Where the results go.
+        agents (list): Agent names, see agents.loadAgent.
+        policies (list): Ghost policy names, see loadPolicy.
+        mazes (list): Start levels, the level picks the maze from the maze set.
+        seeds (iterable): Seeds to play every combination with.
+        maxSteps (int, optional): Steps before a game is cut off, the same for every run on a store. Defaults to 10000.
+        workers (int, optional): Worker processes. Defaults to the number of CPUs.
+        batch (int, optional): Results per transaction. Defaults to 500.
+        flushTime (float, optional): Longest time a result waits to be written. Defaults to 2.0.
+        context (str, optional): Multiprocessing start method. Defaults to the platform default.
+        mazeSet (tuple, optional): Maze names, such as generated ones, in place of maze1 and maze2,
+            the same for every run on a store. Defaults to None.
+
+    Returns:
+        int: The number of games played.
+
+    Raises:
+        ValueError: If the store holds results played with another maxSteps or maze set.
+    """
+    # Results are keyed by maze index and seed, other settings would skip the games already stored and skew the rankings
+    store.claim("maxSteps", maxSteps)
+    store.claim("mazeSet", describeMazeSet(mazeSet))
+    done = store.finished()
+    matches = [(agent, policy, maze, seed, maxSteps, mazeSet)
+               for agent, policy, maze, seed in itertools.product(agents, policies, mazes, seeds)
+               if (agent, policy, maze, seed) not in done]
+    if not matches:
+        return 0
+    ctx = multiprocessing.get_context(context)
+    pending = []
+    flushed = time.perf_counter()
+    with ctx.Pool(workers) as pool:
+        for row in pool.imap_unordered(playMatch, matches, chunksize=4):
+            pending.append(row)
+            if len(pending) >= batch or time.perf_counter() - flushed >= flushTime:
+                store.write(pending)
+                pending = []
+                flushed = time.perf_counter()
+    store.write(pending)
+    return len(matches)
+
+def printReport(store):
+    print("%-20s %6s %9s %7s %7s %7s %8s" % ("agent", "games", "score", "best", "levels", "deaths", "steps"))
+    for agent, games, score, best, levels, deaths, steps in store.ranking():
+        print("%-20s %6d %9.1f %7d %7.2f %7.2f %8.1f" % (agent, games, score, best, levels, deaths, steps))
+    print()
+    print("%-12s %4s %-20s %6s %9s %7s %7s" % ("policy", "rank", "agent", "games", "score", "levels", "deaths"))
+    for agent, policy, games, score, levels, deaths, rank in store.matchups():
+        print("%-12s %4d %-20s %6d %9.1f %7.2f %7.2f" % (policy, rank, agent, games, score, levels, deaths))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play agents against ghost policies and rank them.")
+    parser.add_argument("--db", default="tournament.db", help="SQLite results file, reused to resume")
+    parser.add_argument("--agents", nargs="+", default=["random", "wander"])
+    parser.add_argument("--policies", nargs="+", default=["arcade"])
+    parser.add_argument("--mazes", nargs="+", type=int, default=[0, 1], help="start levels")
+    parser.add_argument("--maze-dir", default=None, help="play the generated mazes in this directory, --mazes then indexes them")
+    parser.add_argument("--seeds", type=int, default=100, help="seeds 0..N-1 per combination")
+    parser.add_argument("--max-steps", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch", type=int, default=500, help="results per transaction")
+    parser.add_argument("--report", action="store_true", help="only print the rankings")
+    args = parser.parse_args()
+    store = ResultStore(args.db)
+    if not args.report:
+        began = time.perf_counter()
+        mazeSet = None
+        if args.maze_dir is not None:
+            from mazegen import listMazes
+            mazeSet = tuple(listMazes(args.maze_dir))
+        try:
+            played = runTournament(store, args.agents, args.policies, args.mazes, range(args.seeds),
+                                   args.max_steps, args.workers, args.batch, mazeSet=mazeSet)
+        except ValueError as error:
+            parser.error("%s: %s, use another --db" % (args.db, error))
+        elapsed = time.perf_counter() - began
+        print("Played %d games in %.1f s (%.0f games per minute)" % (played, elapsed, played / max(elapsed, 1e-9) * 60))
+    printReport(store)
+    store.close()
@@ -0,0 +1,217 @@
+#runs several environments in worker processes that share their output buffers
+
+import os
+import multiprocessing
+from multiprocessing import resource_tracker
+from multiprocessing import shared_memory
+import numpy as np
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")  # Keep every worker from printing the pygame banner
+
+def worker(index, pipe, envArgs):
+    """
+    Runs one PacmanEnv and answers commands from the VectorEnv.
+
+    Args:
+        index (int): The slot of this worker in the shared buffers.
+        pipe (Connection): The worker end of the command pipe.
+        envArgs (dict): Keyword arguments for PacmanEnv.
+    """
+    from env import PacmanEnv
+    from mazedata import MazeData
+    MazeData(envArgs.get("mazes")).preload()
+    env = PacmanEnv(**envArgs)
+    pipe.send({key: (value.shape, value.dtype.str) for key, value in env.obs.items()})
+    layout = pipe.recv()
+    memory = shared_memory.SharedMemory(name=layout["name"])
+    buffers = attachBuffers(memory, layout["arrays"])
+    try:
+        while True:
+            command, arg = pipe.recv()
+            if command == "reset":
+                obs, info = env.reset(seed=arg)
+                writeObservation(buffers, index, obs)
+                buffers["rewards"][index] = 0
+                buffers["terminated"][index] = False
+                buffers["truncated"][index] = False
+                pipe.send(info)
+            elif command == "step":
+                obs, reward, terminated, truncated, info = env.step(int(buffers["actions"][index]))
+                if (terminated or truncated) and arg:
+                    # The reset overwrites the observation buffers, the last state goes back with the info
+                    info = {"final_info": info, "final_observation": {key: value.copy() for key, value in obs.items()}}
+                    obs, resetInfo = env.reset()
+                    info.update(resetInfo)
+                writeObservation(buffers, index, obs)
+                buffers["rewards"][index] = reward
+                buffers["terminated"][index] = terminated
+                buffers["truncated"][index] = truncated
+                pipe.send(info)
+            elif command == "close":
+                break
+    finally:
+        del buffers
+        memory.close()
+        pipe.close()
+
+def writeObservation(buffers, index, obs):
+    # Copies one environment's observation into its row of the shared arrays
+    for key, value in obs.items():
+        buffers[key][index] = value
+
+def attachBuffers(memory, arrays):
+    # Builds NumPy views over the shared block from (key, shape, dtype, offset) entries
+    return {key: np.ndarray(shape, dtype=np.dtype(dtype), buffer=memory.buf, offset=offset)
+            for key, shape, dtype, offset in arrays}
+
+
+class VectorEnv(object):
+    def __init__(self, numEnvs, seed=None, autoReset=True, context=None, **envArgs):
+        """
+        Starts numEnvs PacmanEnv workers.
+
+        Observations, rewards and done flags are written by the workers into
+        one shared memory block and returned as NumPy views of it, so the
+        learner reads them without any pickling. The views are overwritten
+        by the next reset or step.
+
+        Args:
+            numEnvs (int): Number of environments, one process each.
+            seed (int, optional): Master seed, each worker gets its own derived seed. Defaults to None.
+            autoReset (bool, optional): Reset finished environments inside step. Their info then holds
+                the last episode's info under "final_info" and its last observation under
+                "final_observation". Defaults to True.
+            context (str, optional): Multiprocessing start method. Defaults to the platform default.
+            **envArgs: Passed on to every PacmanEnv.
+
+        Raises:
+            ValueError: If the mazes of envArgs differ in size.
+        """
+        from mazedata import MazeData
+        MazeData(envArgs.get("mazes")).gridShape()  # The shared buffers are laid out for a single maze size
+        self.numEnvs = numEnvs
+        self.autoReset = autoReset
+        self.seeds = self.deriveSeeds(seed)  # Used by the first reset only
+        self.waiting = False
+        self.closed = False
+        ctx = multiprocessing.get_context(context)
+        resource_tracker.ensure_running()  # Workers share this tracker, so only close() unlinks the block
+        self.pipes = []
+        self.processes = []
+        for index in range(numEnvs):
+            parent, child = ctx.Pipe()
+            process = ctx.Process(target=worker, args=(index, child, envArgs), daemon=True)
+            process.start()
+            child.close()
+            self.pipes.append(parent)
+            self.processes.append(process)
+        specs = [pipe.recv() for pipe in self.pipes]
+        self.memory, layout = self.allocate(specs[0])
+        for pipe in self.pipes:
+            pipe.send(layout)
+
+    def allocate(self, spec):
+        """
+        Creates the shared block holding every worker's outputs and actions.
+
+        Args:
+            spec (dict): Observation key -> (shape, dtype) reported by a worker.
+
+        Returns:
+            tuple: The SharedMemory block and the layout sent to the workers.
+        """
+        fields = [(key, (self.numEnvs,) + tuple(shape), dtype) for key, (shape, dtype) in spec.items()]
+        fields += [("rewards", (self.numEnvs,), "<f4"),
+                   ("terminated", (self.numEnvs,), "|b1"),
+                   ("truncated", (self.numEnvs,), "|b1"),
+                   ("actions", (self.numEnvs,), "<i8")]
+        arrays = []
+        offset = 0
+        for key, shape, dtype in fields:
+            offset = -(-offset // 8) * 8  # Keep every array 8 byte aligned
+            arrays.append((key, shape, dtype, offset))
+            offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+        memory = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        self.buffers = attachBuffers(memory, arrays)
+        self.obs = {key: self.buffers[key] for key in spec}
+        return memory, {"name": memory.name, "arrays": arrays}
+
+    def deriveSeeds(self, seed):
+        # One seed per worker from a master seed
+        return [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(self.numEnvs)]
+
+    def reset(self, seed=None):
+        """
+        Resets every environment.
+
+        The first reset seeds every worker from the master seed given to the
+        constructor. Later resets carry on with each worker's next episode,
+        like auto-resets do, unless a new master seed is given.
+
+        Args:
+            seed (int, optional): Reseeds every worker from this master seed when given. Defaults to None.
+
+        Returns:
+            tuple: The batched observation views and a list of info dicts.
+        """
+        seeds = self.seeds if seed is None else self.deriveSeeds(seed)
+        if seeds is None:
+            seeds = [None] * self.numEnvs
+        self.seeds = None
+        for pipe, workerSeed in zip(self.pipes, seeds):
+            pipe.send(("reset", workerSeed))
+        return self.obs, [pipe.recv() for pipe in self.pipes]
+
+    def stepAsync(self, actions):
+        """
+        Hands one action to each environment without waiting for the results.
+
+        Args:
+            actions (sequence): One action index per environment.
+        """
+        self.buffers["actions"][:] = actions
+        for pipe in self.pipes:
+            pipe.send(("step", self.autoReset))
+        self.waiting = True
+
+    def stepWait(self):
+        """
+        Waits for the step started by stepAsync.
+
+        Returns:
+            tuple: observations, rewards, terminated, truncated and a list of info dicts.
+        """
+        infos = [pipe.recv() for pipe in self.pipes]
+        self.waiting = False
+        return self.obs, self.buffers["rewards"], self.buffers["terminated"], self.buffers["truncated"], infos
+
+    def step(self, actions):
+        """
+        Steps every environment and waits for all of them.
+
+        Args:
+            actions (sequence): One action index per environment.
+
+        Returns:
+            tuple: observations, rewards, terminated, truncated and a list of info dicts.
+        """
+        self.stepAsync(actions)
+        return self.stepWait()
+
+    def close(self):
+        """
+        Stops the workers and frees the shared block.
+        """
+        if self.closed:
+            return
+        if self.waiting:
+            self.stepWait()
+        for pipe in self.pipes:
+            pipe.send(("close", None))
+        for process in self.processes:
+            process.join()
+        self.obs = None
+        self.buffers = None
+        self.memory.close()
+        self.memory.unlink()
+        self.closed = True